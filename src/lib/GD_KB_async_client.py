@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from lib.GD_KB_client import USERS_PAGE_SIZE
+
+_last_attempts = contextvars.ContextVar('last_attempts', default=0)
+
+
+class asyncClientGoodDataKeboola:
+    """
+    Asyncio counterpart of clientGoodDataKeboola.
+
+    All methods are coroutines with the same arguments and return values as their synchronous counterparts. The
+    requests are executed by a pool of worker threads, which share connection pools and the TT token of the
+    wrapped synchronous client, hence many independent operations can be awaited concurrently on one event loop.
+    """
+
+    def __init__(self, client, max_workers):
+        """
+        Client class initialization.
+
+        Parameters
+        ----------
+        client : clientGoodDataKeboola
+            An authenticated synchronous client, which executes the requests.
+        max_workers : int
+            Maximum number of requests executed at the same time.
+        """
+
+        self.client = client
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gd_client')
+
+        logging.debug("Async client created with %s workers." % max_workers)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        A function executing any blocking callable in the worker pool.
+
+        Parameters
+        ----------
+        self : class
+        func : callable
+            A blocking function to be executed.
+        *args, **kwargs
+            Arguments passed to the function.
+
+        Returns
+        -------
+        any
+            Return value of the function.
+        """
+
+        _loop = asyncio.get_event_loop()
+        _result, _attempts = await _loop.run_in_executor(self._executor,
+                                                         functools.partial(self._call, func, *args, **kwargs))
+
+        _last_attempts.set(_attempts)
+
+        return _result
+
+    def _call(self, func, *args, **kwargs):
+        """
+        A function executed in the worker thread, returning the result of the callable together with number
+        of attempts made by the last request.
+
+        Parameters
+        ----------
+        self : class
+        func : callable
+            A blocking function to be executed.
+        *args, **kwargs
+            Arguments passed to the function.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 2, return value of the function and number of attempts.
+        """
+
+        self.client.reset_last_attempts()
+        _result = func(*args, **kwargs)
+
+        return _result, self.client.get_last_attempts()
+
+    @staticmethod
+    def last_attempts():
+        """
+        A function returning number of attempts made by the last request awaited in the current task.
+
+        Returns
+        -------
+        int
+            Number of attempts, 0 if no request was awaited yet.
+        """
+
+        return _last_attempts.get()
+
+    def close(self):
+        """
+        A function shutting down the worker pool, after all submitted requests are finished.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        self._executor.shutdown(wait=True)
+
+    async def _GD_get_users(self, page_size=USERS_PAGE_SIZE):
+        """
+        See clientGoodDataKeboola._GD_get_users. All pages are downloaded before the list of users is returned.
+        """
+
+        return await self.run(lambda: list(self.client._GD_get_users(page_size)))
+
+    async def _GD_get_project_invitations(self):
+        """
+        See clientGoodDataKeboola._GD_get_project_invitations.
+        """
+
+        return await self.run(self.client._GD_get_project_invitations)
+
+    async def _GD_get_attributes(self):
+        """
+        See clientGoodDataKeboola._GD_get_attributes.
+        """
+
+        return await self.run(self.client._GD_get_attributes)
+
+    async def _GD_get_uris_by_identifiers(self, identifiers):
+        """
+        See clientGoodDataKeboola._GD_get_uris_by_identifiers.
+        """
+
+        return await self.run(self.client._GD_get_uris_by_identifiers, identifiers)
+
+    async def _GD_get_user_filters(self):
+        """
+        See clientGoodDataKeboola._GD_get_user_filters.
+        """
+
+        return await self.run(self.client._GD_get_user_filters)
+
+    async def _GD_get_objects(self, uris):
+        """
+        See clientGoodDataKeboola._GD_get_objects.
+        """
+
+        return await self.run(self.client._GD_get_objects, uris)
+
+    async def _GD_get_attribute_values(self, attribute_uri):
+        """
+        See clientGoodDataKeboola._GD_get_attribute_values.
+        """
+
+        return await self.run(self.client._GD_get_attribute_values, attribute_uri)
+
+    async def _GD_get_attribute_state(self, attribute_uri):
+        """
+        See clientGoodDataKeboola._GD_get_attribute_state.
+        """
+
+        return await self.run(self.client._GD_get_attribute_state, attribute_uri)
+
+    async def _GD_find_attribute_elements(self, attribute_uri, titles, elements_uri=None):
+        """
+        See clientGoodDataKeboola._GD_find_attribute_elements.
+        """
+
+        return await self.run(self.client._GD_find_attribute_elements, attribute_uri, titles, elements_uri)
+
+    async def _GD_get_role_details(self, role_uri):
+        """
+        See clientGoodDataKeboola._GD_get_role_details.
+        """
+
+        return await self.run(self.client._GD_get_role_details, role_uri)
+
+    async def _GD_get_roles(self, cached_roles=None):
+        """
+        See clientGoodDataKeboola._GD_get_roles.
+        """
+
+        return await self.run(self.client._GD_get_roles, cached_roles)
+
+    async def _GD_update_project_users(self, updates):
+        """
+        See clientGoodDataKeboola._GD_update_project_users.
+        """
+
+        return await self.run(self.client._GD_update_project_users, updates)
+
+    async def _GD_remove_user_from_project(self, user_uri):
+        """
+        See clientGoodDataKeboola._GD_remove_user_from_project.
+        """
+
+        return await self.run(self.client._GD_remove_user_from_project, user_uri)
+
+    async def _GD_invite_users(self, emails, role, userFilters):
+        """
+        See clientGoodDataKeboola._GD_invite_users.
+        """
+
+        return await self.run(self.client._GD_invite_users, emails, role, userFilters)
+
+    async def _GD_create_MUF(self, expression, name):
+        """
+        See clientGoodDataKeboola._GD_create_MUF.
+        """
+
+        return await self.run(self.client._GD_create_MUF, expression, name)
+
+    async def _GD_assign_MUFs(self, assignments):
+        """
+        See clientGoodDataKeboola._GD_assign_MUFs.
+        """
+
+        return await self.run(self.client._GD_assign_MUFs, assignments)
+
+    async def _GD_get_data_permissions_for_user(self, user_uri):
+        """
+        See clientGoodDataKeboola._GD_get_data_permissions_for_user.
+        """
+
+        return await self.run(self.client._GD_get_data_permissions_for_user, user_uri)
+
+    async def _KBC_get_projects(self):
+        """
+        See clientGoodDataKeboola._KBC_get_projects.
+        """
+
+        return await self.run(self.client._KBC_get_projects)
+
+    async def _KBC_get_users(self):
+        """
+        See clientGoodDataKeboola._KBC_get_users.
+        """
+
+        return await self.run(self.client._KBC_get_users)
+
+    async def _KBC_create_user(self, login, first_name, last_name, sso_provider=None):
+        """
+        See clientGoodDataKeboola._KBC_create_user.
+        """
+
+        return await self.run(self.client._KBC_create_user, login, first_name, last_name, sso_provider)
+
+    async def _KBC_add_user_to_project(self, login, role):
+        """
+        See clientGoodDataKeboola._KBC_add_user_to_project.
+        """
+
+        return await self.run(self.client._KBC_add_user_to_project, login, role)
+
+    async def _KBC_remove_user_from_project(self, login):
+        """
+        See clientGoodDataKeboola._KBC_remove_user_from_project.
+        """
+
+        return await self.run(self.client._KBC_remove_user_from_project, login)
@@ -4,6 +4,31 @@ import requests
 import logging
 import sys
 import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlencode, urlsplit
+from requests.adapters import HTTPAdapter
+from lib.compact_element_index import CompactElementIndex, CompactElementIndexBuilder
+from lib.concurrency_controller import AIMDController
+from lib.metrics import MetricsCollector
+from lib.rate_limiter import RateLimiter
+from lib.retry import RetryPolicy
+from lib.single_flight import SingleFlight
+from lib.token_manager import TokenManager
+
+GD_POOL_SIZE = 10
+KBC_POOL_SIZE = 4
+USERS_PAGE_SIZE = 1000
+ELEMENTS_PAGE_SIZE = 10000
+IDENTIFIERS_BATCH_SIZE = 500
+OBJECTS_BATCH_SIZE = 50
+SNAPSHOT_MAX_SIZE = 20 * 1024 * 1024
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 120
+SNAPSHOT_HEADERS = ('Link',)
 
 
 class clientGoodDataKeboola:
@@ -15,7 +40,10 @@ class clientGoodDataKeboola:
     Keboola GoodData Provisioning API: https://keboolagooddataprovisioning.docs.apiary.io/
     """
 
-    def __init__(self, username, password, pid, domain, gd_url, kbc_url, sapi_token):
+    def __init__(self, username, password, pid, domain, gd_url, kbc_url, sapi_token,
+                 gd_pool_size=GD_POOL_SIZE, kbc_pool_size=KBC_POOL_SIZE, retry_policy=None, rate_limiter=None,
+                 concurrency_controller=None, elements_page_size=ELEMENTS_PAGE_SIZE, snapshots=None,
+                 read_timeout=READ_TIMEOUT):
         """
         Client class initialization.
 
@@ -35,6 +63,24 @@ class clientGoodDataKeboola:
             Stack parameter, default KBC Provisioning API URL.
         sapi_token : str
             Environment variabel, storage API token to Keboola.
+        gd_pool_size : int
+            Maximum number of keep-alive connections kept open to the GoodData host.
+        kbc_pool_size : int
+            Maximum number of keep-alive connections kept open to the KBC Provisioning API host.
+        retry_policy : RetryPolicy
+            A policy used to repeat throttled and failed requests. If not provided, default policy is used.
+        rate_limiter : RateLimiter
+            A limiter of requests per second, applied to all requests. If not provided, default limits are used.
+        concurrency_controller : AIMDController
+            Adaptive limits of concurrent mutations. If not provided, limits are bounded by the GD pool size.
+        elements_page_size : int
+            Number of attribute elements downloaded in a single request.
+        snapshots : dict
+            Responses saved by the previous run, see `_get_conditional`. If provided, the responses are revalidated
+            with conditional requests instead of being downloaded again.
+        read_timeout : float
+            Maximum number of seconds to wait for a response of the server. Connections are established with
+            a timeout of `CONNECT_TIMEOUT` seconds.
         """
 
         self.username = username
@@ -52,7 +98,360 @@ class clientGoodDataKeboola:
         logging.info("GD domain set to %s." % self.gd_url)
         logging.info("KBC domain set to %s." % self.kbc_url)
 
+        self.metrics = MetricsCollector()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.concurrency_controller = concurrency_controller if concurrency_controller is not None \
+            else AIMDController(maximum=gd_pool_size)
+        self._local = threading.local()
+        self.single_flight = SingleFlight(metrics=self.metrics)
+
+        self.snapshots = snapshots if snapshots is not None else {}
+        self._new_snapshots = {}
+        self._new_snapshots_size = 0
+        self._snapshots_lock = threading.Lock()
+        self._snapshots_unsupported = set()
+
+        self.elements_page_size = elements_page_size
+        self.timeout = (CONNECT_TIMEOUT, read_timeout)
+        self._fetch_executor = ThreadPoolExecutor(max_workers=gd_pool_size, thread_name_prefix='gd_fetch')
+        self._fetch_window = gd_pool_size * 2
+
+        self._sessions = {}
+        self._mount_session(self.gd_url, gd_pool_size)
+        self._mount_session(self.kbc_url, kbc_pool_size)
+
         self._GD_get_SST_token()
+        self.token_manager = TokenManager(self._GD_get_TT_token)
+
+    @staticmethod
+    def _get_host(url):
+        """
+        A function returning the scheme and host part of the URL, which identifies the connection pool.
+
+        Parameters
+        ----------
+        url : str
+            Any URL.
+
+        Returns
+        -------
+        str
+            Scheme and network location of the URL, e.g. `https://secure.gooddata.com`.
+        """
+
+        _split = urlsplit(url)
+        return f'{_split.scheme}://{_split.netloc}'
+
+    def _mount_session(self, base_url, pool_size):
+        """
+        A function creating a persistent session with its own connection pool for a host.
+
+        Parameters
+        ----------
+        self : class
+        base_url : str
+            URL of the host, for which the session is created.
+        pool_size : int
+            Maximum number of connections kept alive to the host.
+
+        Returns
+        -------
+        requests.Session
+            A session, which is reused for all requests to the host.
+        """
+
+        _host = self._get_host(base_url)
+
+        if _host in self._sessions:
+            return self._sessions[_host]
+
+        _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+
+        _session = requests.Session()
+        _session.mount('https://', _adapter)
+        _session.mount('http://', _adapter)
+
+        self._sessions[_host] = _session
+        logging.debug("Connection pool of size %s created for %s." % (pool_size, _host))
+
+        return _session
+
+    def _request(self, method, url, endpoint=None, idempotent=None, concurrency_key=None, endpoint_class=None,
+                 **kwargs):
+        """
+        A function sending a request through the keep-alive session of the target host. Every attempt waits for
+        the rate limiter of the client and, for mutations, for a slot of the adaptive concurrency limit. Throttled
+        and failed requests are repeated according to the retry policy.
+
+        Parameters
+        ----------
+        self : class
+        method : str
+            HTTP method of the request.
+        url : str
+            Full URL of the request.
+        endpoint : str
+            Logical name of the endpoint, under which the call is recorded in metrics.
+        idempotent : bool
+            Whether the request can be safely repeated after a server or connection error. If not provided,
+            the request is classified based on its method.
+        concurrency_key : str
+            Name of the adaptive concurrency limit, which applies to the request. See `AIMDController`.
+        endpoint_class : str
+            Either `read` or `write`, the bucket of the rate limiter, which applies to the request. If not provided,
+            the request is classified based on its method, hence read-only `POST` requests must set it explicitly.
+        **kwargs
+            Any additional arguments accepted by `requests.Session.request`.
+
+        Returns
+        -------
+        requests.Response
+            A response received from the server.
+        """
+
+        _host = self._get_host(url)
+        _session = self._sessions.get(_host)
+
+        if _session is None:
+            _session = self._mount_session(url, GD_POOL_SIZE)
+
+        _endpoint = endpoint if endpoint is not None else method + ' ' + _host
+        kwargs.setdefault('timeout', self.timeout)
+        _endpoint_class = endpoint_class if endpoint_class is not None else self.rate_limiter.get_endpoint_class(method)
+        _limiter = self.concurrency_controller.get_limiter(concurrency_key) if concurrency_key else None
+        _attempt = 0
+        _token_refreshed = False
+
+        while True:
+
+            _attempt += 1
+            self._local.attempts = _attempt
+
+            self.rate_limiter.acquire(_host, _endpoint_class)
+            _started = _limiter.acquire() if _limiter is not None else None
+
+            _sent = time.monotonic()
+
+            try:
+                _response = _session.request(method, url, **kwargs)
+
+            except requests.exceptions.RequestException as e:
+
+                self.metrics.record(_endpoint, 'error', time.monotonic() - _sent)
+
+                if _limiter is not None:
+                    _limiter.release(_started)
+
+                if not self.retry_policy.should_retry_exception(method, e, _attempt, idempotent):
+                    raise
+
+                _delay = self.retry_policy.get_delay(_attempt)
+                logging.warning("Request %s %s failed with %s. Retrying in %.1f seconds (attempt %s of %s)."
+                                % (method, url, type(e).__name__, _delay, _attempt, self.retry_policy.max_attempts))
+                time.sleep(_delay)
+
+                continue
+
+            _body = _response.request.body
+            self.metrics.record(_endpoint, _response.status_code, time.monotonic() - _sent,
+                                bytes_sent=len(_body) if _body else 0, bytes_received=len(_response.content))
+
+            if _limiter is not None:
+                _limiter.release(_started, _response.status_code)
+
+            _headers = kwargs.get('headers') or {}
+            _tt_token = _headers.get('X-GDC-AuthTT')
+
+            if _response.status_code == 401 and _tt_token is not None and _token_refreshed is False:
+
+                logging.debug("TT token was rejected by GoodData. Refreshing the token and repeating the request.")
+                self.token_manager.invalidate(_tt_token)
+
+                kwargs['headers'] = {**_headers, 'X-GDC-AuthTT': self.token_manager.get_token()}
+                _token_refreshed = True
+
+                continue
+
+            if self.retry_policy.should_retry(method, _response.status_code, _attempt, idempotent):
+
+                _delay = self.retry_policy.get_delay(_attempt, _response.headers.get('Retry-After'))
+                logging.warning("Request %s %s returned status code %s. Retrying in %.1f seconds (attempt %s of %s)."
+                                % (method, url, _response.status_code, _delay, _attempt,
+                                   self.retry_policy.max_attempts))
+                time.sleep(_delay)
+
+                continue
+
+            return _response
+
+    def _get_conditional(self, url, endpoint, headers, params=None):
+        """
+        A function sending a GET request, which is revalidated against the response saved by the previous run.
+        If the previous response had an `ETag` or `Last-Modified` header, the request is sent as conditional and
+        the saved response is used, if the server replies it was not modified. Responses with either header are
+        saved for the next run, up to `SNAPSHOT_MAX_SIZE` bytes in total. Endpoints, which respond without either
+        header, are logged once, since their responses are always downloaded again.
+
+        Parameters
+        ----------
+        self : class
+        url : str
+            Full URL of the request.
+        endpoint : str
+            Logical name of the endpoint, under which the call is recorded in metrics.
+        headers : dict
+            Headers of the request.
+        params : dict
+            Query parameters of the request.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 3, status code, json response and headers of the response.
+        """
+
+        _key = url + ('?' + urlencode(sorted(params.items())) if params else '')
+        _snapshot = self.snapshots.get(_key)
+        _headers = dict(headers)
+
+        if _snapshot is not None:
+
+            if _snapshot.get('etag'):
+                _headers['If-None-Match'] = _snapshot['etag']
+
+            if _snapshot.get('last_modified'):
+                _headers['If-Modified-Since'] = _snapshot['last_modified']
+
+        _response = self._request('GET', url, endpoint=endpoint, headers=_headers, params=params)
+
+        if _response.status_code == 304 and _snapshot is not None:
+
+            self.metrics.increment('snapshot.not_modified')
+
+            with self._snapshots_lock:
+                self._new_snapshots[_key] = _snapshot
+                self._new_snapshots_size += _snapshot['size']
+
+            return 200, _snapshot['json'], _snapshot['headers']
+
+        _sc, _json = self.rsp_splitter(_response)
+        _etag = _response.headers.get('ETag')
+        _last_modified = _response.headers.get('Last-Modified')
+
+        if _sc == 200 and (_etag or _last_modified):
+
+            self.metrics.increment('snapshot.modified' if _snapshot is not None else 'snapshot.new')
+            _size = len(_response.content)
+
+            with self._snapshots_lock:
+
+                if self._new_snapshots_size + _size <= SNAPSHOT_MAX_SIZE:
+
+                    self._new_snapshots[_key] = {'etag': _etag,
+                                                 'last_modified': _last_modified,
+                                                 'headers': {h: _response.headers[h] for h in SNAPSHOT_HEADERS
+                                                             if h in _response.headers},
+                                                 'size': _size,
+                                                 'json': _json}
+                    self._new_snapshots_size += _size
+
+        elif _sc == 200:
+
+            self.metrics.increment('snapshot.no_validator')
+
+            with self._snapshots_lock:
+                _logged = endpoint in self._snapshots_unsupported
+                self._snapshots_unsupported.add(endpoint)
+
+            if not _logged:
+                logging.info("Responses of endpoint %s have no ETag or Last-Modified header, they will be downloaded "
+                             "again by the next run." % endpoint)
+
+        return _sc, _json, _response.headers
+
+    def get_snapshots(self):
+        """
+        A function returning responses, which should be revalidated by the next run. Only responses used in this
+        run are returned.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        dict
+            A dictionary with URI of the request as a key and the saved response as a value.
+        """
+
+        with self._snapshots_lock:
+            return dict(self._new_snapshots)
+
+    def get_last_attempts(self):
+        """
+        A function returning number of attempts made by the last request sent from the current thread.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        int
+            Number of attempts, 0 if no request was sent yet.
+        """
+
+        return getattr(self._local, 'attempts', 0)
+
+    def reset_last_attempts(self):
+        """
+        A function resetting the number of attempts of the current thread.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        self._local.attempts = 0
+
+    def get_pool_statistics(self):
+        """
+        A function returning statistics about connection pools of all hosts.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        dict
+            A dictionary with host as a key and pool size, number of opened connections and number of requests
+            sent through the pool as a value.
+        """
+
+        _stats = {}
+
+        for _host, _session in self._sessions.items():
+
+            _adapter = _session.get_adapter(_host)
+            _pool_manager = _adapter.poolmanager
+            _host_stats = {'pool_size': _adapter._pool_maxsize,
+                           'connections': 0,
+                           'requests': 0}
+
+            for _key in list(_pool_manager.pools.keys()):
+                _pool = _pool_manager.pools.get(_key)
+
+                if _pool is None:
+                    continue
+
+                _host_stats['connections'] += _pool.num_connections
+                _host_stats['requests'] += _pool.num_requests
+
+            _stats[_host] = _host_stats
+
+        return _stats
 
     def _GD_get_SST_token(self):
         """
@@ -90,7 +489,7 @@ class clientGoodDataKeboola:
 
         url = self.gd_url + '/gdc/account/login'
 
-        auth_response = requests.post(url, headers=headers, data=_data)
+        auth_response = self._request('POST', url, endpoint='login', headers=headers, data=_data, idempotent=True)
         auth_sc, auth_json = self.rsp_splitter(auth_response)
 
         if auth_sc in (200, 201, 202):
@@ -114,13 +513,15 @@ class clientGoodDataKeboola:
             logging.error("Response received: %s" % json.dumps(auth_json))
             sys.exit(1)
 
-    def _GD_get_TT_token(self):
+    def _GD_get_TT_token(self, relogin=True):
         """
         Function for obtaining TT token.
 
         Parameters
         ----------
         self : class
+        relogin : bool
+            Whether to log in again and retry once, if the SST token is rejected.
 
         Returns
         -------
@@ -141,7 +542,7 @@ class clientGoodDataKeboola:
 
         url = self.gd_url + '/gdc/account/token'
 
-        TT_response = requests.get(url, headers=headers)
+        TT_response = self._request('GET', url, endpoint='token', headers=headers)
         TT_sc, TT_json = self.rsp_splitter(TT_response)
 
         if TT_sc in (200, 201, 202):
@@ -151,10 +552,20 @@ class clientGoodDataKeboola:
                 # logging.info("Successfully obtained the TT token.")
                 # logging.debug("TT Token: %s" % self.TT_token)
 
+                return self.TT_token
+
             except KeyError:
                 logging.error("Log in successful, however TT token " +
                               "could not be obtained. Please contact support.")
                 sys.exit(1)
+
+        elif TT_sc == 401 and relogin is True:
+
+            logging.info("SST token expired. Logging in to GoodData again.")
+            self._GD_get_SST_token()
+
+            return self._GD_get_TT_token(relogin=False)
+
         else:
 
             logging.error(
@@ -164,7 +575,8 @@ class clientGoodDataKeboola:
 
     def _GD_build_header(self):
         """
-        Function for building header for GD request. TT token needs to be refreshed after almost every request.
+        Function for building header for GD request. The TT token is cached by the token manager and only
+        refreshed when it's about to expire or was rejected by GoodData.
 
         Parameters
         ----------
@@ -175,45 +587,81 @@ class clientGoodDataKeboola:
             A header used for requests to GoodData.
         """
 
-        self._GD_get_TT_token()
-
         _header = {"Content-Type": "application/json",
                    "Accept": "application/json",
-                   "X-GDC-AuthTT": self.TT_token}
-
-        self._GD_header = _header
+                   "X-GDC-AuthTT": self.token_manager.get_token()}
 
-        logging.debug("Request header: %s" % _header)
+        return _header
 
-    def _GD_get_users(self):
+    def _GD_get_users(self, page_size=USERS_PAGE_SIZE):
         """
-        Function for getting all users (active and disabled), currently in the project.
+        Function for getting all users (active and disabled), currently in the project. The users are downloaded
+        page by page and only the fields needed for membership checks are kept.
 
         Parameters
         ----------
         self : class
+        page_size : int
+            Number of users downloaded in a single request.
 
         Returns
         -------
+        generator
+            A generator of dictionaries with `email`, `uri`, `role` and `status` of each user.
 
+        Raises
+        ------
+        SystemExit
+            If a page of users could not be obtained.
         """
 
-        self._GD_build_header()
-
         url = self.gd_url + f'/gdc/projects/{self.pid}/users'
+        _params = {'offset': 0, 'limit': page_size}
+        _previous_first = None
+        _count = 0
 
-        users_request = requests.get(url, headers=self._GD_header)
-        ur_sc = users_request.status_code
-        ur_json = users_request.json()
+        while url is not None:
 
-        if ur_sc in (200, 201, 202):
-            logging.info("Users were extracted successfully.")
-            return ur_json
-        else:
-            logging.error("There was an issue extracting users from GD. " +
-                          "Code received is %s." % str(ur_sc))
-            logging.error("Response: %s" % json.dumps(ur_json))
-            sys.exit(1)
+            ur_sc, ur_json, _ = self._get_conditional(url, 'users', self._GD_build_header(), params=_params)
+
+            if ur_sc not in (200, 201, 202):
+                logging.error("There was an issue extracting users from GD. " +
+                              "Code received is %s." % str(ur_sc))
+                logging.error("Response: %s" % json.dumps(ur_json))
+                sys.exit(1)
+
+            _users = ur_json.get('users', [])
+            _next = (ur_json.get('paging') or {}).get('next')
+
+            # Protection against endless loop, in case paging parameters were ignored.
+            _first = _users[0]['user']['links']['self'] if len(_users) > 0 else None
+            if _first is not None and _first == _previous_first:
+                break
+            _previous_first = _first
+
+            for u in _users:
+
+                _role = u['user']['content']['userRoles']
+
+                yield {'email': u['user']['content']['email'],
+                       'uri': u['user']['links']['self'],
+                       'role': _role[0] if _role != [] else '',
+                       'status': u['user']['content']['status']}
+
+            _count += len(_users)
+
+            if _next:
+                url = self.gd_url + _next
+                _params = None
+
+            elif 'paging' not in ur_json and len(_users) == page_size:
+                url = self.gd_url + f'/gdc/projects/{self.pid}/users'
+                _params = {'offset': _count, 'limit': page_size}
+
+            else:
+                url = None
+
+        logging.info("Users were extracted successfully. Number of users: %s." % _count)
 
     def _GD_get_project_invitations(self):
         """
@@ -228,13 +676,9 @@ class clientGoodDataKeboola:
 
         """
 
-        self._GD_build_header()
-
         url = self.gd_url + f'/gdc/projects/{self.pid}/invitations'
 
-        project_request = requests.get(url, headers=self._GD_header)
-        ur_sc = project_request.status_code
-        ur_json = project_request.json()
+        ur_sc, ur_json, _ = self._get_conditional(url, 'invitations', self._GD_build_header())
 
         if ur_sc in (200, 201, 202):
             return ur_json
@@ -247,6 +691,22 @@ class clientGoodDataKeboola:
     def _GD_get_attributes(self):
         """
         Function for getting all attributes in the project.
+        Concurrent calls are coalesced into a single request, see SingleFlight.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        See _GD_fetch_attributes.
+        """
+
+        return self.single_flight.do(('attributes',), self._GD_fetch_attributes)
+
+    def _GD_fetch_attributes(self):
+        """
+        Function for getting all attributes in the project.
 
         Parameters
         ----------
@@ -263,14 +723,9 @@ class clientGoodDataKeboola:
             If a list of users could not be obtained.
         """
 
-        self._GD_build_header()
-
         url = self.gd_url + f'/gdc/md/{self.pid}/query/attributes'
 
-        attr_response = requests.get(url, headers=self._GD_header)
-
-        att_sc = attr_response.status_code
-        att_json = attr_response.json()
+        att_sc, att_json, _ = self._get_conditional(url, 'attributes', self._GD_build_header())
 
         if att_sc == 200:
 
@@ -284,6 +739,108 @@ class clientGoodDataKeboola:
             logging.debug('Response: %s' % json.dumps(att_json))
             sys.exit(1)
 
+    def _GD_get_uris_by_identifiers(self, identifiers):
+        """
+        A function resolving identifiers of metadata objects, e.g. attributes, to their URIs.
+
+        Parameters
+        ----------
+        self : class
+        identifiers : list
+            Identifiers of the objects.
+
+        Returns
+        -------
+        dict
+            A dictionary with identifier as a key and URI as a value. Identifiers, which do not exist in the
+            project, are not present. If the identifiers could not be resolved, `None` is returned.
+        """
+
+        url = self.gd_url + f'/gdc/md/{self.pid}/identifiers'
+        _uris = {}
+
+        for i in range(0, len(identifiers), IDENTIFIERS_BATCH_SIZE):
+
+            _data = {'identifierToUri': identifiers[i:i + IDENTIFIERS_BATCH_SIZE]}
+
+            id_response = self._request('POST', url, endpoint='identifiers', idempotent=True, endpoint_class='read',
+                                        headers=self._GD_build_header(), data=json.dumps(_data))
+            id_sc, id_json = self.rsp_splitter(id_response)
+
+            if id_sc != 200:
+                logging.debug("Could not resolve identifiers. Received: %s - %s." % (id_sc, json.dumps(id_json)))
+                return None
+
+            for _item in id_json.get('identifiers', []):
+                _uris[_item['identifier']] = _item['uri']
+
+        return _uris
+
+    def _GD_get_user_filters(self):
+        """
+        A function listing all MUF objects in the project.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        list
+            Entries of the MUF objects, each with `link` and `title` of the object. If the objects could not be
+            listed, `None` is returned.
+        """
+
+        url = self.gd_url + f'/gdc/md/{self.pid}/query/userfilters'
+
+        uf_sc, uf_json, _ = self._get_conditional(url, 'userfilters_query', self._GD_build_header())
+
+        if uf_sc != 200:
+            logging.debug("Could not list MUFs. Received: %s - %s." % (uf_sc, json.dumps(uf_json)))
+            return None
+
+        return uf_json['query']['entries']
+
+    def _GD_get_objects(self, uris):
+        """
+        A function downloading metadata objects in batches. Batches are downloaded concurrently.
+
+        Parameters
+        ----------
+        self : class
+        uris : list
+            URIs of the objects.
+
+        Returns
+        -------
+        list
+            The objects, e.g. `{"userFilter": {...}}`. If any of the batches could not be downloaded, `None` is
+            returned.
+        """
+
+        url = self.gd_url + f'/gdc/md/{self.pid}/objects/get'
+
+        def _get_batch(batch):
+
+            _data = {'get': {'items': batch}}
+
+            ob_response = self._request('POST', url, endpoint='objects_get', idempotent=True, endpoint_class='read',
+                                        headers=self._GD_build_header(), data=json.dumps(_data))
+            return self.rsp_splitter(ob_response)
+
+        _batches = [uris[i:i + OBJECTS_BATCH_SIZE] for i in range(0, len(uris), OBJECTS_BATCH_SIZE)]
+        _objects = []
+
+        for ob_sc, ob_json in self._fetch_executor.map(_get_batch, _batches):
+
+            if ob_sc != 200:
+                logging.debug("Could not download objects. Received: %s - %s." % (ob_sc, json.dumps(ob_json)))
+                return None
+
+            _objects += ob_json['objects']['items']
+
+        return _objects
+
     def rsp_splitter(self, rsp):
         """
         A function for splitting requests.response class.
@@ -312,6 +869,27 @@ class clientGoodDataKeboola:
     def _GD_get_attribute_values(self, attribute_uri):
         """
         A function for obtaining attribute values for given attribute.
+        Concurrent calls for the same URI are coalesced into a single request, see SingleFlight.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        See _GD_fetch_attribute_values.
+        """
+
+        return self.single_flight.do(('attribute_values', attribute_uri), self._GD_fetch_attribute_values,
+                                     attribute_uri)
+
+    def _GD_fetch_attribute_values(self, attribute_uri):
+        """
+        A function for obtaining attribute values for given attribute. The first page of elements reveals the
+        total number of elements, after which all remaining pages are downloaded concurrently. Each page is added
+        to the index of values as soon as it's downloaded and dropped afterwards.
 
         Parameters
         ----------
@@ -323,49 +901,364 @@ class clientGoodDataKeboola:
         -------
         tuple
             A tuple of lenght 2. First element indicates success of the operation. In case the operation is successful
-            the second element is a list of dictionaries with attribute values and their URI. If unsuccessful, the
+            the second element is a CompactElementIndex of attribute values and their URIs. If unsuccessful, the
             second element is an error message.
         """
 
-        self._GD_build_header()
+        _start = time.monotonic()
+        _elmts = self._GD_get_attribute_elements_uri(attribute_uri)
+
+        if _elmts is None:
+            return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+        _first_sc, _first_page = self._GD_get_elements_page(_elmts, 0)
+
+        if _first_sc != 200:
+            logging.error(
+                "Could not obtain attribute values for attribute %s." % attribute_uri)
+
+            return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+        _builder = CompactElementIndexBuilder()
+        _count = self._add_elements(_builder, _first_page['elements'])
+        _step = len(_first_page['elements'])
+        _paging = _first_page['paging']
+        _total = _paging.get('total')
+        del _first_page
+
+        if _total is None:
+
+            # Total count is not available, follow the links to the next pages one by one.
+            _offset_url = _paging.get('next')
+
+            while _offset_url:
+
+                el_response = self._request('GET', self.gd_url + _offset_url, endpoint='attribute_elements',
+                                            headers=self._GD_build_header())
+                el_sc, el_json = self.rsp_splitter(el_response)
+
+                if el_sc != 200:
+                    return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+                _count += self._add_elements(_builder, el_json['attributeElements']['elements'])
+                _offset_url = el_json['attributeElements']['paging']['next']
+                del el_json
+
+            _pages = None
+
+        else:
+
+            # GoodData may return fewer elements than requested, hence the pages are as large as the first one.
+            if _step == 0 and _total > 0:
+                logging.error("Could not obtain attribute values for attribute %s. The first page is empty, "
+                              "although the attribute has %s values." % (attribute_uri, _total))
+                return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+            _offsets = iter(range(_step, _total, _step) if _step else [])
+            _futures = deque()
+            _pages = 1
+
+            # Pages are added to the index in their order, while only a limited number of them is downloaded
+            # ahead, so that downloaded pages don't pile up in memory.
+            for o in islice(_offsets, self._fetch_window):
+                _futures.append(self._fetch_executor.submit(self._GD_get_elements_page, _elmts, o))
+
+            while _futures:
+
+                el_sc, el_page = _futures.popleft().result()
+
+                if el_sc != 200:
+
+                    for _f in _futures:
+                        _f.cancel()
+
+                    return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+                for o in islice(_offsets, 1):
+                    _futures.append(self._fetch_executor.submit(self._GD_get_elements_page, _elmts, o))
+
+                _count += self._add_elements(_builder, el_page['elements'])
+                _pages += 1
+                del el_page
+
+            if _count != _total:
+                logging.error("Could not obtain attribute values for attribute %s. Downloaded %s values instead of %s."
+                              % (attribute_uri, _count, _total))
+                return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+        _values = CompactElementIndex(_builder)
+
+        _elapsed = time.monotonic() - _start
+        self.metrics.record('attribute_values_download', 200, _elapsed)
+
+        logging.info("Values of attribute %s downloaded in %.2f seconds. Elements: %s, pages: %s."
+                     % (attribute_uri, _elapsed, _count, _pages if _pages is not None else 'unknown'))
+
+        return True, _values
+
+    @staticmethod
+    def _add_elements(builder, elements):
+        """
+        A function adding a page of attribute elements to an index builder.
+
+        Parameters
+        ----------
+        builder : CompactElementIndexBuilder
+            A builder of the index of attribute values.
+        elements : list
+            Elements of the page, each with `title` and `uri`.
+
+        Returns
+        -------
+        int
+            Number of elements on the page.
+        """
+
+        builder.add((e['title'], e['uri']) for e in elements)
+
+        return len(elements)
+
+    def _GD_get_attribute(self, attribute_uri):
+        """
+        A function obtaining the definition of an attribute.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        dict
+            The attribute object, or `None` if the attribute could not be obtained or the object is not an attribute.
+        """
 
         url = self.gd_url + attribute_uri
 
-        attr_response = requests.get(url, headers=self._GD_header)
-        att_sc = attr_response.status_code
+        attr_response = self._request('GET', url, endpoint='attribute', headers=self._GD_build_header())
+        att_sc, att_json = self.rsp_splitter(attr_response)
 
         if att_sc != 200:
             logging.error(
                 "Could not obtain attribute values for attribute %s." % attribute_uri)
 
-            return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+            return None
+
+        _attribute = att_json.get('attribute')
+
+        if _attribute is None:
+            logging.error("Object %s is not an attribute." % attribute_uri)
+
+        return _attribute
+
+    def _GD_get_attribute_elements_uri(self, attribute_uri):
+        """
+        A function obtaining a URI of elements of the attribute's default display form.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        str
+            A URI of elements, or `None` if the attribute could not be obtained.
+        """
+
+        _attribute = self._GD_get_attribute(attribute_uri)
+
+        if _attribute is None:
+            return None
+
+        return _attribute['content']['displayForms'][0]['links']['elements']
+
+    def _GD_get_attribute_state(self, attribute_uri):
+        """
+        A function obtaining the last update of an attribute and the number of its elements.
+        Concurrent calls for the same URI are coalesced into a single request, see SingleFlight.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
 
-        _elmts = attr_response.json(
-        )['attribute']['content']['displayForms'][0]['links']['elements']
+        Returns
+        -------
+        See _GD_fetch_attribute_state.
+        """
+
+        return self.single_flight.do(('attribute_state', attribute_uri), self._GD_fetch_attribute_state, attribute_uri)
+
+    def _GD_fetch_attribute_state(self, attribute_uri):
+        """
+        A function obtaining the last update of an attribute and the number of its elements, without downloading
+        the elements. Together these identify a version of the attribute's elements.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        dict
+            A dictionary with `updated` timestamp, number of `elements` and `elements_uri` of the default display
+            form, or `None` if the state could not be obtained.
+        """
 
-        _paging = _elmts + '?limit=10000'
-        self._GD_build_header()
+        _attribute = self._GD_get_attribute(attribute_uri)
 
-        hasMore = True
+        if _attribute is None:
+            return None
+
+        _elmts = _attribute['content']['displayForms'][0]['links']['elements']
+        url = self.gd_url + _elmts
+
+        el_response = self._request('GET', url, endpoint='attribute_elements', headers=self._GD_build_header(),
+                                    params={'limit': 1})
+        el_sc, el_json = self.rsp_splitter(el_response)
+
+        if el_sc != 200:
+            return None
+
+        return {'updated': _attribute.get('meta', {}).get('updated'),
+                'elements': el_json['attributeElements']['paging'].get('total'),
+                'elements_uri': _elmts}
+
+    def _GD_find_attribute_elements(self, attribute_uri, titles, elements_uri=None):
+        """
+        A function looking up elements of an attribute by their titles. Each title is searched using the filter
+        of the elements resource, hence only the matching elements are downloaded. Since the filter matches
+        titles partially and regardless of case, only elements with exactly the same title are returned.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute, whose elements shall be looked up.
+        titles : list
+            Titles of the elements.
+        elements_uri : str
+            A URI of elements of the attribute's default display form, see `_GD_get_attribute_state`. If not
+            provided, the attribute is obtained to find it.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 2. First element indicates success of the operation. In case the operation is successful
+            the second element is a list of dictionaries with found attribute values and their URI. Titles, which
+            were not found, are not present in the list. If unsuccessful, the second element is an error message.
+        """
+
+        _elmts = elements_uri or self._GD_get_attribute_elements_uri(attribute_uri)
+
+        if _elmts is None:
+            return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+        _futures = [self._fetch_executor.submit(self._GD_find_element, _elmts, t) for t in set(titles)]
         _out_elements = []
-        while hasMore:
 
-            el_url = self.gd_url + _paging
+        for _future in _futures:
 
-            el_response = requests.get(el_url, headers=self._GD_header)
-            el_sc, el_json = self.rsp_splitter(el_response)
+            _sc, _element = _future.result()
 
-            _out_elements += el_json['attributeElements']['elements']
+            if _sc is False:
 
-            _offset_url = el_json['attributeElements']['paging']['next']
+                for _f in _futures:
+                    _f.cancel()
 
-            if _offset_url:
-                _paging = _offset_url
-            else:
-                hasMore = False
+                return False, "Could not obtain attribute values for attribute %s." % attribute_uri
+
+            if _element is not None:
+                _out_elements += [_element]
+
+        logging.debug("Found %s of %s values of attribute %s." % (len(_out_elements), len(_futures), attribute_uri))
 
         return True, _out_elements
 
+    def _GD_find_element(self, elements_uri, title):
+        """
+        A function looking up a single element by its title. All pages of elements matching the filter are
+        searched, until the exact title is found.
+
+        Parameters
+        ----------
+        self : class
+        elements_uri : str
+            A URI of elements of the attribute's display form.
+        title : str
+            A title of the element.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 2. First element indicates success of the operation. The second element is
+            a dictionary with the title and URI of the element, or `None` if no element has the title.
+        """
+
+        _offset = 0
+
+        while True:
+
+            el_sc, el_page = self._GD_get_elements_page(elements_uri, _offset, title)
+
+            if el_sc != 200:
+                return False, None
+
+            for e in el_page['elements']:
+
+                if e['title'] == title:
+                    return True, e
+
+            _offset += len(el_page['elements'])
+
+            if not el_page['paging'].get('next') or len(el_page['elements']) == 0:
+                return True, None
+
+    def _GD_get_elements_page(self, elements_uri, offset, title_filter=None):
+        """
+        A function downloading a single page of attribute elements.
+
+        Parameters
+        ----------
+        self : class
+        elements_uri : str
+            A URI of elements of the attribute's display form.
+        offset : int
+            Offset of the first element on the page.
+        title_filter : str
+            If provided, only elements with titles containing the string are returned.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 2. The first element is the status code. If the request was successful, the second
+            element is a dictionary with `elements` and `paging` keys, otherwise it's the received response.
+        """
+
+        url = self.gd_url + elements_uri
+        _params = {'limit': self.elements_page_size, 'offset': offset}
+
+        if title_filter is not None:
+            _params['filter'] = title_filter
+
+        el_response = self._request('GET', url, endpoint='attribute_elements', headers=self._GD_build_header(),
+                                    params=_params)
+        el_sc, el_json = self.rsp_splitter(el_response)
+
+        if el_sc != 200:
+            logging.error("Could not obtain page of elements %s at offset %s. Received: %s - %s."
+                          % (elements_uri, offset, el_sc, json.dumps(el_json)))
+
+            return el_sc, el_json
+
+        return el_sc, el_json['attributeElements']
+
     def _KBC_get_projects(self):
         """
         A function to obtain all projects within a KBC project.
@@ -387,7 +1280,7 @@ class clientGoodDataKeboola:
 
         url = self.kbc_url + '/projects'
 
-        prj_response = requests.get(url, headers=self._KBC_header)
+        prj_response = self._request('GET', url, endpoint='kbc_projects', headers=self._KBC_header)
 
         prj_sc, prj_json = self.rsp_splitter(prj_response)
 
@@ -433,8 +1326,8 @@ class clientGoodDataKeboola:
             if paginationToken is not None:
                 params['nextPageToken'] = paginationToken
 
-            usr_response = requests.get(url, headers=self._KBC_header, params=params)
-            paginationUrl = usr_response.headers['Link']
+            usr_sc, usr_json, usr_headers = self._get_conditional(url, 'kbc_users', self._KBC_header, params=params)
+            paginationUrl = usr_headers['Link']
 
             if paginationUrl == '':
 
@@ -444,8 +1337,6 @@ class clientGoodDataKeboola:
 
                 paginationToken = re.findall(r'nextPageToken=.*;', paginationUrl)[0].replace('nextPageToken=', '')
 
-            usr_sc, usr_json = self.rsp_splitter(usr_response)
-
             if usr_sc in (200, 201, 202):
 
                 allUsers += usr_json
@@ -495,7 +1386,7 @@ class clientGoodDataKeboola:
 
         logging.debug(_data)
 
-        cu_response = requests.post(url, headers=self._KBC_header, json=_data)
+        cu_response = self._request('POST', url, endpoint='kbc_user_create', headers=self._KBC_header, json=_data)
 
         return self.rsp_splitter(cu_response)
 
@@ -517,7 +1408,7 @@ class clientGoodDataKeboola:
 
         url = self.kbc_url + f'/projects/{self.pid}/users/{login}'
 
-        du_response = requests.delete(url, headers=self._KBC_header)
+        du_response = self._request('DELETE', url, endpoint='kbc_project_user_remove', headers=self._KBC_header)
 
         return self.rsp_splitter(du_response)
 
@@ -546,13 +1437,32 @@ class clientGoodDataKeboola:
         }}
         '''
 
-        au_response = requests.post(url, headers=self._KBC_header, data=_data)
+        au_response = self._request('POST', url, endpoint='kbc_project_user_add',
+                                    headers=self._KBC_header, data=_data, idempotent=True)
 
         return self.rsp_splitter(au_response)
 
     def _GD_get_role_details(self, role_uri):
         """
         A function for getting details about roles in GoodData.
+        Concurrent calls for the same URI are coalesced into a single request, see SingleFlight.
+
+        Parameters
+        ----------
+        self : class
+        role_uri : str
+            URI of a GD role.
+
+        Returns
+        -------
+        See _GD_fetch_role_details.
+        """
+
+        return self.single_flight.do(('role_details', role_uri), self._GD_fetch_role_details, role_uri)
+
+    def _GD_fetch_role_details(self, role_uri):
+        """
+        A function for getting details about roles in GoodData.
 
         Parameters
         ----------
@@ -567,23 +1477,25 @@ class clientGoodDataKeboola:
         """
 
         url = self.gd_url + role_uri
-        self._GD_build_header()
 
-        role_detail_request = requests.get(url, headers=self._GD_header)
+        role_detail_request = self._request('GET', url, endpoint='role_details', headers=self._GD_build_header())
         return self.rsp_splitter(role_detail_request)
 
-    def _GD_get_roles(self):
+    def _GD_get_roles(self, cached_roles=None):
         """
-        A function for getting all roles and their details.
+        A function for getting all roles and their details. Details of all roles are downloaded concurrently.
 
         Parameters
         ----------
         self : class
+        cached_roles : dict
+            Roles obtained by a previous run. If the project has the same role URIs, the cached roles are returned
+            and details of the roles are not downloaded.
 
         Returns
         -------
-        tuple
-            See rsp_splitter.
+        dict
+            A dictionary with role identifier as a key and role URI as a value.
 
         Raises
         ------
@@ -593,10 +1505,7 @@ class clientGoodDataKeboola:
 
         url = self.gd_url + f'/gdc/projects/{self.pid}/roles'
 
-        self._GD_build_header()
-
-        roles_response = requests.get(url, headers=self._GD_header)
-        roles_sc, roles_json = self.rsp_splitter(roles_response)
+        roles_sc, roles_json, _ = self._get_conditional(url, 'roles', self._GD_build_header())
 
         if roles_sc != 200:
             logging.error("Could not fetch project roles. Received code %s" % roles_sc)
@@ -609,161 +1518,106 @@ class clientGoodDataKeboola:
             logging.error(f"Received: {roles_sc} - {roles_json}.")
             sys.exit(1)
 
+        if cached_roles and set(cached_roles.values()) == set(_roles):
+            logging.info("Roles of the project did not change since the previous run.")
+            return dict(cached_roles)
+
         _GD_roles = {}
 
-        for r in _roles:
-            _, _details = self._GD_get_role_details(r)
+        for r, (_sc, _details) in zip(_roles, self._fetch_executor.map(self._GD_get_role_details, _roles)):
 
-            # logging.debug(_details)
+            if _sc != 200:
+                logging.error("Could not fetch details of role %s. Received code %s" % (r, _sc))
+                logging.error("Response: %s" % json.dumps(_details))
+                sys.exit(1)
 
             _role_title = _details['projectRole']['meta']['identifier']
             _GD_roles[_role_title] = r
 
         return _GD_roles
 
-    def _GD_add_user_to_project(self, user_uri, role_uri):
+    def _GD_update_project_users(self, updates):
         """
-        A function for adding user to a project using GD API.
+        A function to update status and role of multiple users in a project in a single request.
 
         Parameters
         ----------
         self : class
-        user_uri : str
-            URI of an account to be added to the project.
-        role_uri : str
-            An URI of a role to be assigned to the person.
+        updates : list
+            A list of tuples of length 3, a URI of the user, the target status (`ENABLED` or `DISABLED`) and a URI
+            of a role to be assigned to the user. If the role is `None`, the role of the user is not changed.
 
         Returns
         -------
         tuple
-            See rsp_splitter.
+            See rsp_splitter. The response contains `projectUsersUpdateResult` with lists of `successful` and `failed`
+            users.
         """
 
         url = self.gd_url + f'/gdc/projects/{self.pid}/users'
 
-        self._GD_build_header()
-
-        _data = f'''{{
-            "user": {{
-                "content": {{
-                    "status": "ENABLED",
-                    "userRoles": [
-                        "{role_uri}"
-                    ]
-                }},
-                "links": {{
-                    "self": "{user_uri}"
-                }}
-            }}
-        }}
-        '''
-
-        au_response = requests.post(url, headers=self._GD_header, data=_data)
-
-        return self.rsp_splitter(au_response)
+        _users = []
 
-    def _GD_disable_user_in_project(self, user_uri):
-        """
-        A function to disable users in a project using GD API.
+        for _user_uri, _status, _role_uri in updates:
 
-        Parameters
-        ----------
-        self : class
-        user_uri : str
-            A URI of an account to be disabled in the project.
+            _content = {'status': _status}
 
-        Returns
-        -------
-        tuple
-            See rsp_splitter.
-        """
+            if _role_uri is not None:
+                _content['userRoles'] = [_role_uri]
 
-        url = self.gd_url + f'/gdc/projects/{self.pid}/users'
+            _users += [{'user': {'content': _content, 'links': {'self': _user_uri}}}]
 
-        self._GD_build_header()
+        _data = json.dumps({'users': _users})
 
-        _data = f'''{{
-            "user": {{
-                "content": {{
-                    "status": "DISABLED"
-                }},
-                "links": {{
-                    "self": "{user_uri}"
-                }}
-            }}
-        }}
-        '''
+        logging.debug(_data)
 
-        ru_response = requests.post(url, headers=self._GD_header, data=_data)
+        pu_response = self._request('POST', url, endpoint='project_users_update',
+                                    headers=self._GD_build_header(), data=_data, idempotent=True,
+                                    concurrency_key='project_users')
 
-        return self.rsp_splitter(ru_response)
+        return self.rsp_splitter(pu_response)
 
-    def _GD_invite_users_to_project(self, invitation_dict):
+    def _GD_invite_users(self, emails, role, userFilters):
         """
-        A function to create invitations to the GD project.
+        A function to create invitations to the GD project for multiple users with the same role and data filters
+        in a single request.
 
         Parameters
         ----------
         self : class
-        invitation_dict : dict
-            A dictionary containing information about login, role and data filters to be applied.
+        emails : list
+            E-mails of the invited users.
+        role : str
+            A URI of the role of the invited users.
+        userFilters : list
+            A list of filters to be applied.
 
         Returns
         -------
         tuple
-            See rsp_splitter.
+            See rsp_splitter. The response contains `createdInvitations` with lists of `loginsDomainMismatch` and
+            `loginsAlreadyInProject`.
         """
 
         url = self.gd_url + f'/gdc/projects/{self.pid}/invitations'
 
-        self._GD_build_header()
+        _invitations = [{'invitation': {'content': {'email': e,
+                                                    'userFilters': userFilters,
+                                                    'role': role,
+                                                    'firstname': '',
+                                                    'lastname': '',
+                                                    'action': {}}}} for e in emails]
 
-        _email = invitation_dict['_email']
-        _role = invitation_dict['_role']
-        _usrFilter = invitation_dict['_usrFilter']
-        _usrFilter_str = self.list_to_str(_usrFilter)
-
-        _data = f'''{{
-            "invitations": [
-              {{
-                "invitation": {{
-                  "content": {{
-                    "email": "{_email}",
-                    "userFilters": {_usrFilter_str},
-                    "role": "{_role}",
-                    "firstname": "",
-                    "lastname": "",
-                    "action": {{}}
-                  }}
-                }}
-                }}
-              ]
-            }}
-        '''
+        _data = json.dumps({'invitations': _invitations})
 
         logging.debug(_data)
 
-        inv_response = requests.post(url, headers=self._GD_header, data=_data)
+        inv_response = self._request('POST', url, endpoint='invitations_create',
+                                     headers=self._GD_build_header(), data=_data,
+                                     concurrency_key='invitations')
 
         return self.rsp_splitter(inv_response)
 
-    @staticmethod
-    def list_to_str(listToStr):
-        """
-        A function to convert list to list-like string.
-
-        Parameters
-        ----------
-        l : list
-
-        Returns
-        -------
-        str
-            A string that represents inputted list..
-        """
-
-        return '[' + ','.join('"{0}"'.format(x) for x in listToStr) + ']'
-
     def _GD_create_MUF(self, expression, name):
         """
         A function to create MUF expressions in the project.
@@ -784,8 +1638,6 @@ class clientGoodDataKeboola:
 
         url = self.gd_url + f'/gdc/md/{self.pid}/obj'
 
-        self._GD_build_header()
-
         _data = f'''{{
             "userFilter": {{
               "content": {{
@@ -801,49 +1653,37 @@ class clientGoodDataKeboola:
 
         logging.debug(_data)
 
-        dp_rsp = requests.post(url, headers=self._GD_header, data=_data)
+        dp_rsp = self._request('POST', url, endpoint='userfilter_create',
+                               headers=self._GD_build_header(), data=_data, concurrency_key='create_muf')
 
         return self.rsp_splitter(dp_rsp)
 
-    def _GD_assign_MUF(self, user, userFilters):
+    def _GD_assign_MUFs(self, assignments):
         """
-        A function to assign MUFs to a user.
+        A function to assign MUFs to multiple users in a single request.
 
         Parameters
         ----------
         self : class
-        user : str
-            A login, to which the filter should be applied.
-        userFilters : list
-            A list of filter to be applied.
+        assignments : list
+            A list of tuples of length 2, a URI of the user and a list of filters to be applied.
 
         Returns
         -------
         tuple
-            See rsp_splitter.
+            See rsp_splitter. The response contains `userFiltersUpdateResult` with lists of `successful` and `failed`
+            users.
         """
 
         url = self.gd_url + f'/gdc/md/{self.pid}/userfilters'
 
-        self._GD_build_header()
-
-        userFilters_str = self.list_to_str(userFilters)
-
-        _data = f'''{{
-            "userFilters": {{
-                "items": [
-                    {{
-                        "user": "{user}",
-                        "userFilters": {userFilters_str}
-                    }}
-                ]
-            }}
-        }}
-        '''
+        _data = json.dumps({'userFilters': {'items': [{'user': u, 'userFilters': f} for u, f in assignments]}})
 
         logging.debug(_data)
 
-        af_rsp = requests.post(url, headers=self._GD_header, data=_data)
+        af_rsp = self._request('POST', url, endpoint='userfilters_assign',
+                               headers=self._GD_build_header(), data=_data, idempotent=True,
+                               concurrency_key='assign_muf')
 
         return self.rsp_splitter(af_rsp)
 
@@ -865,13 +1705,11 @@ class clientGoodDataKeboola:
 
         url = self.gd_url + f'/gdc/md/{self.pid}/userfilters'
 
-        self._GD_build_header()
-
         _params = {"users": f'{user_uri}'}
 
         logging.debug(_params)
 
-        uf_rsp = requests.get(url, headers=self._GD_header, params=_params)
+        uf_rsp = self._request('GET', url, endpoint='userfilters', headers=self._GD_build_header(), params=_params)
 
         return self.rsp_splitter(uf_rsp)
 
@@ -895,8 +1733,7 @@ class clientGoodDataKeboola:
         _user_uid = user_uri.split('/')[-1]
 
         url = self.gd_url + f'/gdc/projects/{self.pid}/users/{_user_uid}'
-        self._GD_build_header()
 
-        du_rsp = requests.delete(url, headers=self._GD_header)
+        du_rsp = self._request('DELETE', url, endpoint='project_user_remove', headers=self._GD_build_header())
 
         return self.rsp_splitter(du_rsp)
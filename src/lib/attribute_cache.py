@@ -0,0 +1,138 @@
+import logging
+import threading
+from collections import OrderedDict
+from lib.compact_element_index import CompactElementIndex
+
+ATTRIBUTE_CACHE_MAX_ELEMENTS = 1000000
+
+
+class AttributeCache:
+    """
+    A thread-safe cache of attribute values, kept for the whole run.
+
+    Entries are either complete maps of values' titles to their URIs (see CompactElementIndex), single URIs of
+    looked up values, or `False`, which marks a failed download, so that the download is not repeated for every
+    user referencing the attribute.
+    The size of the cache is bounded by the total number of cached elements; once exceeded, the least recently
+    used entries are evicted. An entry larger than the whole cache is kept as the only entry, so that the largest
+    attributes are not downloaded again by the next user. Hits, misses and evictions are counted in the run metrics.
+    """
+
+    def __init__(self, max_elements=ATTRIBUTE_CACHE_MAX_ELEMENTS, metrics=None):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        max_elements : int
+            Maximum number of elements held in the cache.
+        metrics : MetricsCollector
+            A collector, to which hits, misses and evictions are reported.
+        """
+
+        self.max_elements = max_elements
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.size = 0
+
+    @staticmethod
+    def _get_weight(value):
+        """
+        A function returning number of elements held by a cache entry.
+
+        Parameters
+        ----------
+        value : any
+            A cached value.
+
+        Returns
+        -------
+        int
+            Number of elements, at least 1.
+        """
+
+        return max(len(value), 1) if isinstance(value, (dict, CompactElementIndex)) else 1
+
+    def _increment(self, counter):
+        """
+        A function reporting a counter to the run metrics.
+
+        Parameters
+        ----------
+        self : class
+        counter : str
+            Name of the counter.
+        """
+
+        if self.metrics is not None:
+            self.metrics.increment('attribute_cache.' + counter)
+
+    def get(self, key):
+        """
+        A function returning a cached value.
+
+        Parameters
+        ----------
+        self : class
+        key : str or tuple
+            A key of the entry, e.g. attribute URI.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 2. The first element marks, whether the value was found in the cache, the second
+            element is the cached value.
+        """
+
+        with self._lock:
+
+            if key not in self._entries:
+                _hit, _value = False, None
+
+            else:
+                self._entries.move_to_end(key)
+                _hit, _value = True, self._entries[key]
+
+        self._increment('hit' if _hit else 'miss')
+
+        return _hit, _value
+
+    def put(self, key, value):
+        """
+        A function storing a value in the cache and evicting least recently used entries, if the cache is full.
+        A value larger than the whole cache evicts all other entries.
+
+        Parameters
+        ----------
+        self : class
+        key : str or tuple
+            A key of the entry, e.g. attribute URI.
+        value : any
+            A value to be stored, `False` marks a failed download.
+        """
+
+        _weight = self._get_weight(value)
+        _evicted = 0
+
+        if _weight > self.max_elements:
+            logging.info("Entry %s with %s elements exceeds the size of the attribute cache, other entries are "
+                         "evicted. Consider increasing parameter attribute_cache_size." % (key, _weight))
+            self._increment('oversized')
+
+        with self._lock:
+
+            if key in self._entries:
+                self.size -= self._get_weight(self._entries.pop(key))
+
+            self._entries[key] = value
+            self.size += _weight
+
+            while self.size > self.max_elements and len(self._entries) > 1:
+                _, _old = self._entries.popitem(last=False)
+                self.size -= self._get_weight(_old)
+                _evicted += 1
+
+        if _evicted and self.metrics is not None:
+            self.metrics.increment('attribute_cache.eviction', _evicted)
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+
+BATCH_SIZE = 50
+BATCH_MAX_DELAY = 0.5
+
+
+class BatcherGroup:
+    """
+    A class tracking batchers, which are fed by the same pool of workers.
+
+    Workers report, when they start and finish processing of an item. Once every active worker waits for a result
+    of a batch, none of the batches can grow any more, hence all of them are processed immediately instead of
+    waiting for `max_delay`. E.g. a single worker never waits for a batch to be filled.
+    """
+
+    def __init__(self):
+        """
+        Init function.
+        """
+
+        self.active = 0
+        self._batchers = []
+
+    def add(self, batcher):
+        """
+        A function adding a batcher to the group.
+
+        Parameters
+        ----------
+        self : class
+        batcher : AsyncBatcher
+            A batcher fed by the workers of the group.
+        """
+
+        self._batchers += [batcher]
+
+    def start(self):
+        """
+        A function marking, that a worker started processing of an item.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        self.active += 1
+
+    def finish(self):
+        """
+        A function marking, that a worker finished processing of an item. Batches, which can't grow any more
+        without the worker, are processed.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        self.active -= 1
+        self.check()
+
+    def check(self):
+        """
+        A function processing all pending batches, if every active worker waits for one of them.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        if sum(b.pending for b in self._batchers) < self.active:
+            return
+
+        for b in self._batchers:
+            b._flush()
+
+
+class AsyncBatcher:
+    """
+    A class collecting items submitted by concurrent tasks and processing them in batches.
+
+    A batch is processed, once it contains `batch_size` items, or `max_delay` seconds after its first item was
+    submitted, whichever comes first. If the batcher belongs to a BatcherGroup, a batch is also processed, once
+    no other worker of the group can add an item to it. Each task awaits the result of its own item. The batcher
+    must be created and used within a running event loop.
+    """
+
+    def __init__(self, flush_function, batch_size=BATCH_SIZE, max_delay=BATCH_MAX_DELAY, name='batch', group=None):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        flush_function : coroutine function
+            A function processing a list of items and returning a list of results in the same order.
+        batch_size : int
+            Maximum number of items in a single batch.
+        max_delay : float
+            Maximum number of seconds an item waits for the batch to be filled.
+        name : str
+            Name of the batcher, used for logging.
+        group : BatcherGroup
+            A group of batchers fed by the same workers, see BatcherGroup.
+        """
+
+        self.flush_function = flush_function
+        self.batch_size = max(int(batch_size), 1)
+        self.max_delay = max_delay
+        self.name = name
+        self.group = group
+
+        self._items = []
+        self._futures = []
+        self._timer = None
+        self._flushes = set()
+
+        if group is not None:
+            group.add(self)
+
+    @property
+    def pending(self):
+        """
+        Number of items waiting in the current batch.
+        """
+
+        return len(self._items)
+
+    async def submit(self, item):
+        """
+        A function adding an item to the current batch and waiting for its result.
+
+        Parameters
+        ----------
+        self : class
+        item : any
+            An item to be processed.
+
+        Returns
+        -------
+        any
+            Result of the item returned by the flush function.
+        """
+
+        _future = asyncio.get_event_loop().create_future()
+
+        self._items += [item]
+        self._futures += [_future]
+
+        if len(self._items) >= self.batch_size:
+            self._flush()
+
+        elif self.group is not None:
+            self.group.check()
+
+        if self._items and self._timer is None:
+            self._timer = asyncio.get_event_loop().call_later(self.max_delay, self._flush)
+
+        return await _future
+
+    def _flush(self):
+        """
+        A function starting processing of the current batch in a separate task.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._items:
+            return
+
+        _items, _futures = self._items, self._futures
+        self._items, self._futures = [], []
+
+        _task = asyncio.ensure_future(self._process(_items, _futures))
+        self._flushes.add(_task)
+        _task.add_done_callback(self._flushes.discard)
+
+    async def _process(self, items, futures):
+        """
+        A function processing a batch and distributing results to the waiting tasks.
+
+        Parameters
+        ----------
+        self : class
+        items : list
+            Items of the batch.
+        futures : list
+            Futures of the waiting tasks, in the same order as items.
+        """
+
+        logging.debug("Processing %s batch of %s items." % (self.name, len(items)))
+
+        try:
+            _results = await self.flush_function(items)
+
+        except BaseException as e:
+
+            for _future in futures:
+                if not _future.done():
+                    _future.set_exception(e)
+
+            if not isinstance(e, Exception):
+                raise
+
+            return
+
+        for _future, _result in zip(futures, _results):
+            if not _future.done():
+                _future.set_result(_result)
@@ -0,0 +1,313 @@
+import heapq
+import re
+from array import array
+from itertools import islice
+
+ELEMENT_URI_REGEX = re.compile(r'^(.*[?&]id=)(\d+)$')
+# Number of elements sorted at once by the builder, when it receives all elements in a single iterable.
+BUILDER_CHUNK_SIZE = 10000
+
+
+class CompactElementIndexBuilder:
+    """
+    A class collecting elements for CompactElementIndex incrementally, e.g. page by page as they are downloaded.
+
+    Each added chunk of elements is sorted and stored in the compact form, so that the chunk can be dropped by the
+    caller right away. Sorted chunks are merged, once the index is built, hence all elements are never held as
+    separate objects at the same time.
+    """
+
+    def __init__(self):
+        """
+        Init function.
+        """
+
+        self.prefix = None
+        self._others = {}
+        self._chunks = []
+        self._sequence = 0
+
+    def add(self, items):
+        """
+        A function adding elements to the index.
+
+        Parameters
+        ----------
+        self : class
+        items : iterable
+            Pairs of element title and URI. If a title is present more than once, the last URI is kept.
+
+        Returns
+        -------
+        CompactElementIndexBuilder
+            The builder itself.
+        """
+
+        _items = iter(items)
+
+        while True:
+
+            _chunk = list(islice(_items, BUILDER_CHUNK_SIZE))
+
+            if not _chunk:
+                return self
+
+            self._add_chunk(_chunk)
+
+    def _add_chunk(self, items):
+        """
+        A function sorting a chunk of elements and storing it in the compact form.
+
+        Parameters
+        ----------
+        self : class
+        items : list
+            Pairs of element title and URI.
+        """
+
+        _pairs = []
+
+        for _title, _uri in items:
+
+            self._sequence += 1
+            _match = ELEMENT_URI_REGEX.match(_uri)
+
+            if _match and self.prefix is None:
+                self.prefix = _match.group(1)
+
+            if _match and _match.group(1) == self.prefix:
+                _pairs += [(_title.encode('utf-8'), self._sequence, int(_match.group(2)))]
+
+            else:
+                self._others[_title] = (self._sequence, _uri)
+
+        if not _pairs:
+            return
+
+        # UTF-8 encoded titles sort in the same order as the titles themselves.
+        _pairs.sort()
+
+        _titles = b''.join(p[0] for p in _pairs)
+        _offsets = array('q', [0])
+
+        for p in _pairs:
+            _offsets.append(_offsets[-1] + len(p[0]))
+
+        self._chunks += [(_titles, _offsets, array('q', (p[1] for p in _pairs)), array('q', (p[2] for p in _pairs)))]
+
+    @staticmethod
+    def _iterate_chunk(chunk):
+        """
+        A function iterating over elements of a sorted chunk.
+
+        Parameters
+        ----------
+        chunk : tuple
+            Titles, their offsets, sequence numbers and IDs of the elements.
+
+        Returns
+        -------
+        iterator
+            Triples of encoded title, sequence number and ID, in the order of titles.
+        """
+
+        _titles, _offsets, _sequences, _ids = chunk
+
+        for _i in range(len(_ids)):
+            yield _titles[_offsets[_i]:_offsets[_i + 1]], _sequences[_i], _ids[_i]
+
+    def build(self):
+        """
+        A function merging all added elements.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        tuple
+            A tuple of length 5, the common prefix of URIs, IDs, offsets of titles, titles and URIs, which do not
+            share the common prefix. See CompactElementIndex.
+        """
+
+        _ids = array('q')
+        _offsets = array('q', [0])
+        _titles = bytearray()
+        _others = self._others
+
+        _merged = heapq.merge(*[self._iterate_chunk(c) for c in self._chunks])
+        _previous = None
+
+        for _element in _merged:
+
+            # Duplicated titles are sorted by their sequence number, only the last one is kept.
+            if _previous is not None and _previous[0] != _element[0]:
+                self._append(_previous, _ids, _offsets, _titles, _others)
+
+            _previous = _element
+
+        if _previous is not None:
+            self._append(_previous, _ids, _offsets, _titles, _others)
+
+        self._chunks = []
+
+        return self.prefix, _ids, _offsets, bytes(_titles), {t: u for t, (_, u) in _others.items()}
+
+    @staticmethod
+    def _append(element, ids, offsets, titles, others):
+        """
+        A function appending an element to the merged index, unless the same title was added later with a URI,
+        which does not share the common prefix.
+
+        Parameters
+        ----------
+        element : tuple
+            Encoded title, sequence number and ID of the element.
+        ids : array
+            IDs of merged elements.
+        offsets : array
+            Offsets of titles of merged elements.
+        titles : bytearray
+            Titles of merged elements.
+        others : dict
+            Titles of elements, which do not share the common prefix, with their sequence numbers and URIs.
+        """
+
+        _title, _sequence, _id = element
+
+        if others:
+
+            _other = others.get(_title.decode('utf-8'))
+
+            if _other is not None:
+
+                if _other[0] > _sequence:
+                    return
+
+                del others[_title.decode('utf-8')]
+
+        titles += _title
+        ids.append(_id)
+        offsets.append(len(titles))
+
+
+class CompactElementIndex:
+    """
+    A memory efficient, read-only map of elements' titles to their URIs.
+
+    URIs of all elements of an attribute only differ in the element ID, e.g. `/gdc/md/<pid>/obj/123/elements?id=456`.
+    The common prefix is therefore stored only once, IDs are stored in a typed array and titles are stored sorted
+    in a single UTF-8 encoded string with their offsets, so that a title is found by binary search. URIs are built,
+    when they're requested. URIs, which do not share the common prefix, are stored as they are.
+    """
+
+    def __init__(self, items=()):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        items : iterable or CompactElementIndexBuilder
+            Pairs of element title and URI, or a builder, to which the elements were added. If a title is present
+            more than once, the last URI is kept.
+        """
+
+        _builder = items if isinstance(items, CompactElementIndexBuilder) else CompactElementIndexBuilder().add(items)
+
+        self.prefix, self._ids, self._offsets, self._titles, self._others = _builder.build()
+
+    def __len__(self):
+
+        return len(self._ids) + len(self._others)
+
+    def __contains__(self, title):
+
+        return self.get(title) is not None
+
+    def __getitem__(self, title):
+
+        _uri = self.get(title)
+
+        if _uri is None:
+            raise KeyError(title)
+
+        return _uri
+
+    def _get_title(self, position):
+        """
+        A function decoding a title at a position in the sorted titles.
+
+        Parameters
+        ----------
+        self : class
+        position : int
+            A position of the title.
+
+        Returns
+        -------
+        str
+            The title.
+        """
+
+        return self._titles[self._offsets[position]:self._offsets[position + 1]].decode('utf-8')
+
+    def get(self, title, default=None):
+        """
+        A function returning a URI of an element.
+
+        Parameters
+        ----------
+        self : class
+        title : str
+            A title of the element.
+        default : any
+            A value returned, if there's no element with the title. Titles, which are not strings, e.g. numbers
+            from a MUF, never match any element.
+
+        Returns
+        -------
+        str
+            A URI of the element.
+        """
+
+        if not isinstance(title, str):
+            return default
+
+        if title in self._others:
+            return self._others[title]
+
+        _low, _high = 0, len(self._ids)
+
+        while _low < _high:
+
+            _mid = (_low + _high) // 2
+
+            if self._get_title(_mid) < title:
+                _low = _mid + 1
+            else:
+                _high = _mid
+
+        if _low < len(self._ids) and self._get_title(_low) == title:
+            return self.prefix + str(self._ids[_low])
+
+        return default
+
+    def items(self):
+        """
+        A function iterating over all elements.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        iterator
+            Pairs of element title and URI.
+        """
+
+        for _i in range(len(self._ids)):
+            yield self._get_title(_i), self.prefix + str(self._ids[_i])
+
+        yield from self._others.items()
@@ -1,10 +1,26 @@
+import asyncio
 import csv
+import functools
+import hashlib
 import json
 import logging
+import math
 import os
+import re
 import sys
-from lib.GD_KB_client import clientGoodDataKeboola
+import threading
+from urllib.parse import urlsplit
+from lib.GD_KB_client import clientGoodDataKeboola, GD_POOL_SIZE, KBC_POOL_SIZE, USERS_PAGE_SIZE, ELEMENTS_PAGE_SIZE, \
+    READ_TIMEOUT
+from lib.GD_KB_async_client import asyncClientGoodDataKeboola
+from lib.batcher import AsyncBatcher, BatcherGroup, BATCH_SIZE
+from lib.attribute_cache import AttributeCache, ATTRIBUTE_CACHE_MAX_ELEMENTS
+from lib.element_index import ElementIndex
+from lib.snapshot_store import SnapshotStore
+from lib.concurrency_controller import AIMDController, AIMD_LATENCY_THRESHOLD
 from lib.logger import Logger
+from lib.rate_limiter import RateLimiter, RATE_LIMIT_READ, RATE_LIMIT_WRITE
+from lib.retry import RetryPolicy, RETRY_MAX_ATTEMPTS
 from lib.user import User
 from kbc.env_handler import KBCEnvHandler
 
@@ -25,6 +41,27 @@ KEY_RUN_ID = 'KBC_RUNID'
 KEY_DEBUG = 'debug'
 KEY_RE_INVITE_USERS = "re_invite_users"
 KEY_FAIL_ON_ERROR = "fail_on_error"
+KEY_GD_POOL_SIZE = 'gd_pool_size'
+KEY_KBC_POOL_SIZE = 'kbc_pool_size'
+KEY_CONCURRENCY = 'concurrency'
+KEY_RETRY_MAX_ATTEMPTS = 'retry_max_attempts'
+KEY_REQUEST_TIMEOUT = 'request_timeout'
+KEY_RATE_LIMIT_READ = 'rate_limit_read'
+KEY_RATE_LIMIT_WRITE = 'rate_limit_write'
+KEY_ADAPTIVE_MAX_CONCURRENCY = 'adaptive_max_concurrency'
+KEY_ADAPTIVE_LATENCY_THRESHOLD = 'adaptive_latency_threshold'
+KEY_USERS_PAGE_SIZE = 'users_page_size'
+KEY_ELEMENTS_PAGE_SIZE = 'elements_page_size'
+KEY_ELEMENT_LOOKUP = 'element_lookup'
+KEY_ATTRIBUTE_CACHE_SIZE = 'attribute_cache_size'
+KEY_ELEMENT_INDEX = 'element_index'
+KEY_WARM_START = 'warm_start'
+KEY_RESOLVE_ATTRIBUTES_BY_IDENTIFIER = 'resolve_attributes_by_identifier'
+KEY_PREFETCH_LOOKAHEAD = 'prefetch_lookahead'
+KEY_MUF_ASSIGN_BATCH_SIZE = 'muf_assign_batch_size'
+KEY_INVITE_BATCH_SIZE = 'invite_batch_size'
+KEY_PROJECT_USERS_BATCH_SIZE = 'project_users_batch_size'
+KEY_REUSE_MUFS = 'reuse_mufs'
 
 KEY_PBP = 'pbp'
 KEY_CUSTOM_PID = '#pid'
@@ -33,6 +70,18 @@ KEY_CUSTOM_GDAPI_URL = 'api_url'
 
 MANDATORY_PARS = [KEY_GDUSERNAME, KEY_GDPASSWORD, KEY_GDPID]
 
+DEFAULT_CONCURRENCY = 50
+DEFAULT_PREFETCH_LOOKAHEAD = 20
+# Maximum number of MUFs prefetched at the same time, so that prefetching does not occupy all workers of the client.
+PREFETCH_CONCURRENCY = 2
+
+ELEMENT_LOOKUP_MODES = ('auto', 'full', 'targeted')
+# Number of looked up titles, which are considered as expensive as downloading a single page of elements.
+ELEMENT_LOOKUP_PAGE_COST = 5
+# Prefix of titles of MUF objects created by the component, see `_create_muf_object`.
+MUF_TITLE_PREFIX = 'muf_'
+MUF_TITLE_REGEX = re.compile(r'^' + MUF_TITLE_PREFIX + r'([0-9a-f]{16})_')
+
 
 class Component(KBCEnvHandler):
     """
@@ -45,9 +94,9 @@ class Component(KBCEnvHandler):
         """
         Init function.
         In addition to initialization of the class, the function checks whether provided PID is in the list
-        of PIDs provisioned by the Keboola GD Writer, obtains attributes of the whole GD project, extracts users
-        from both Keboola and GD environments, maps Keboola roles to GD roles, checks admin privileges and ensures
-        the admin user has no data permissions assigned to themselves.
+        of PIDs provisioned by the Keboola GD Writer. Attributes, users from both Keboola and GD environments,
+        mapping of Keboola roles to GD roles and invitations are obtained on their first use. Admin privileges
+        and absence of data permissions of the admin user are checked before the first change in the project.
 
         Parameters
         ----------
@@ -115,30 +164,730 @@ class Component(KBCEnvHandler):
             sapi_token = pbp_gd_api_token
             self.is_pbp_project = True
 
+        gd_pool_size = self.cfg_params.get(KEY_GD_POOL_SIZE, GD_POOL_SIZE)
+        kbc_pool_size = self.cfg_params.get(KEY_KBC_POOL_SIZE, KBC_POOL_SIZE)
+
+        retry_policy = RetryPolicy(max_attempts=self.cfg_params.get(KEY_RETRY_MAX_ATTEMPTS, RETRY_MAX_ATTEMPTS))
+        rate_limiter = RateLimiter(read_rate=self.cfg_params.get(KEY_RATE_LIMIT_READ, RATE_LIMIT_READ),
+                                   write_rate=self.cfg_params.get(KEY_RATE_LIMIT_WRITE, RATE_LIMIT_WRITE))
+        concurrency_controller = AIMDController(
+            maximum=self.cfg_params.get(KEY_ADAPTIVE_MAX_CONCURRENCY, gd_pool_size),
+            latency_threshold=self.cfg_params.get(KEY_ADAPTIVE_LATENCY_THRESHOLD, AIMD_LATENCY_THRESHOLD))
+
+        self.warm_start = self.cfg_params.get(KEY_WARM_START, True)
+        self.state = self.get_state_file() or {}
+        _snapshots = self.state.get('snapshots') or {}
+
+        if self.warm_start is True:
+            self.snapshot_store = SnapshotStore(self.data_path, tags=[pid])
+            _responses = self.snapshot_store.load(_snapshots.get('responses') if _snapshots.get('pid') == pid else {})
+        else:
+            self.snapshot_store = None
+            _responses = {}
+
         self.client = clientGoodDataKeboola(username, password, pid, domain,
-                                            gd_url, kbc_prov_url, sapi_token)
+                                            gd_url, kbc_prov_url, sapi_token,
+                                            gd_pool_size=gd_pool_size, kbc_pool_size=kbc_pool_size,
+                                            retry_policy=retry_policy, rate_limiter=rate_limiter,
+                                            concurrency_controller=concurrency_controller,
+                                            elements_page_size=self.cfg_params.get(KEY_ELEMENTS_PAGE_SIZE,
+                                                                                   ELEMENTS_PAGE_SIZE),
+                                            snapshots=_responses,
+                                            read_timeout=self.cfg_params.get(KEY_REQUEST_TIMEOUT, READ_TIMEOUT))
+
+        self.concurrency = max(int(self.cfg_params.get(KEY_CONCURRENCY, DEFAULT_CONCURRENCY)), 1)
+        self.users_page_size = self.cfg_params.get(KEY_USERS_PAGE_SIZE, USERS_PAGE_SIZE)
+        self.muf_assign_batch_size = self.cfg_params.get(KEY_MUF_ASSIGN_BATCH_SIZE, BATCH_SIZE)
+        self.invite_batch_size = self.cfg_params.get(KEY_INVITE_BATCH_SIZE, BATCH_SIZE)
+        self.project_users_batch_size = self.cfg_params.get(KEY_PROJECT_USERS_BATCH_SIZE, BATCH_SIZE)
+        self.prefetch_lookahead = max(int(self.cfg_params.get(KEY_PREFETCH_LOOKAHEAD, DEFAULT_PREFETCH_LOOKAHEAD)), 0)
+        self.async_client = asyncClientGoodDataKeboola(self.client, max_workers=gd_pool_size + kbc_pool_size)
+
+        self.element_lookup = self.cfg_params.get(KEY_ELEMENT_LOOKUP, 'auto')
+
+        if self.element_lookup not in ELEMENT_LOOKUP_MODES:
+            logging.error("Element lookup must be one of %s." % ', '.join(ELEMENT_LOOKUP_MODES))
+            sys.exit(1)
+
+        self.attribute_cache = AttributeCache(
+            max_elements=self.cfg_params.get(KEY_ATTRIBUTE_CACHE_SIZE, ATTRIBUTE_CACHE_MAX_ELEMENTS),
+            metrics=self.client.metrics)
+
+        if self.cfg_params.get(KEY_ELEMENT_INDEX, False) is True:
+            self.element_index = ElementIndex(self.data_path, tags=[pid], metrics=self.client.metrics)
+        else:
+            self.element_index = None
+
+        self._attribute_states = {}
+        self._muf_expressions = {}
+        self._muf_expressions_lock = threading.Lock()
+
+        self.resolve_attributes_by_identifier = self.cfg_params.get(KEY_RESOLVE_ATTRIBUTES_BY_IDENTIFIER, True)
+        self.reuse_mufs = self.cfg_params.get(KEY_REUSE_MUFS, True)
 
         self.input_files = self.configuration.get_input_tables()
         self.log = Logger(self.data_path, run_id=self.run_id, write_always=fail_on_error)
-        self._get_all_attributes()
-        self._get_all_users()
-        self._map_roles()
-        self._GD_check_user_admin()
-        self._GD_check_admin_permissions()
+        self._element_lookup_modes = {}
+
+        # Attributes, users, roles and invitations are only obtained, once they're needed. See `_load`.
+        self._bootstrap = {}
+        self._bootstrap_locks = {}
+        self._bootstrap_lock = threading.Lock()
+        self._admin_lock = threading.Lock()
+        self._admin_checked = False
+
+        self.encountered_errors = False
+
+    def _load(self, name, loader):
+        """
+        A function returning bootstrap data, which are obtained on the first use. The loader is executed only once,
+        even if the data are requested by multiple threads at the same time. Each loader has its own lock, hence
+        threads waiting for one kind of data do not wait for unrelated loads. The function blocks, hence it must not
+        be called from the event loop; coroutines obtain the data through `asyncClientGoodDataKeboola.run`.
+
+        Parameters
+        ----------
+        self : class
+        name : str
+            Name of the data, e.g. `attributes`.
+        loader : callable
+            A function without arguments, which obtains the data and sets them as an attribute of the class.
+
+        Returns
+        -------
+        any
+            The requested data.
+        """
+
+        if name not in self._bootstrap:
+
+            with self._bootstrap_lock:
+                _lock = self._bootstrap_locks.setdefault(loader.__name__, threading.Lock())
+
+            with _lock:
+
+                if name not in self._bootstrap:
+                    loader()
+
+        return self._bootstrap[name]
+
+    @property
+    def attributes(self):
+        """
+        Attributes referenced in the input tables, see `_get_all_attributes`.
+        """
+
+        return self._load('attributes', self._load_attributes)
+
+    @attributes.setter
+    def attributes(self, value):
+        self._bootstrap['attributes'] = value
+
+    @property
+    def requested_values(self):
+        """
+        Values requested for each attribute URI, see `_get_requested_values`.
+        """
+
+        return self._load('requested_values', self._load_attributes)
+
+    @requested_values.setter
+    def requested_values(self, value):
+        self._bootstrap['requested_values'] = value
+
+    @property
+    def users_GD(self):
+        """
+        Users of the GD project, see `_get_all_users`.
+        """
+
+        return self._load('users_GD', self._get_all_users)
+
+    @users_GD.setter
+    def users_GD(self, value):
+        self._bootstrap['users_GD'] = value
+
+    @property
+    def users_KB(self):
+        """
+        Users provisioned by Keboola, see `_get_all_users`.
+        """
+
+        return self._load('users_KB', self._get_all_users)
+
+    @users_KB.setter
+    def users_KB(self, value):
+        self._bootstrap['users_KB'] = value
+
+    @property
+    def _roles_map(self):
+        """
+        Mapping of Keboola roles to GD roles, see `_map_roles`.
+        """
+
+        return self._load('roles_map', self._map_roles)
+
+    @_roles_map.setter
+    def _roles_map(self, value):
+        self._bootstrap['roles_map'] = value
+
+    @property
+    def invitations(self):
+        """
+        E-mails of pending invitations, see `_get_all_invitations`.
+        """
+
+        return self._load('invitations', self._load_invitations)
+
+    @invitations.setter
+    def invitations(self, value):
+        self._bootstrap['invitations'] = value
+
+    @property
+    def user_filters(self):
+        """
+        URIs of existing MUF objects in the project with their last update, by digests of their expressions, see
+        `_load_user_filters`.
+        """
+
+        return self._load('user_filters', self._load_user_filters)
+
+    @user_filters.setter
+    def user_filters(self, value):
+        self._bootstrap['user_filters'] = value
+
+    def _load_attributes(self):
+        """
+        A function obtaining attributes referenced in the input tables together with their requested values.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        _requested = self._get_requested_values()
+        self._get_all_attributes(set(_requested))
+
+        _attributes = self._bootstrap['attributes']
+        self.requested_values = {_attributes[a]['uri']: v for a, v in _requested.items() if a in _attributes}
+
+    def _load_invitations(self):
+        """
+        A function obtaining pending invitations, if users should not be re-invited.
+
+        Parameters
+        ----------
+        self : class
+        """
+
         if not self.re_invite_users:
             self._get_all_invitations()
         else:
             self.invitations = []
 
-        self.encountered_errors = False
+    def _load_user_filters(self):
+        """
+        A function listing MUF objects created by the component in previous runs. Titles of the objects contain
+        a digest of their expression, see `_create_muf_object`, hence the objects are indexed by the digest without
+        being downloaded. Only candidates with the same digest are downloaded, once a MUF is about to be created,
+        see `_find_user_filter`. The last update of each object is kept, so that expressions stored in the element
+        index are downloaded again, once the object changes. Objects, which no longer exist, are dropped from
+        the element index.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        if self.reuse_mufs is not True:
+            self.user_filters = {}
+            return
+
+        _entries = self.client._GD_get_user_filters()
+
+        if _entries is None:
+            logging.warning("Existing MUFs could not be listed, new MUFs will be created.")
+            self.user_filters = {}
+            return
+
+        _user_filters = {}
+
+        for e in _entries:
+
+            _match = MUF_TITLE_REGEX.match(e.get('title', ''))
+
+            if _match:
+                _user_filters.setdefault(_match.group(1), {})[e['link']] = e.get('updated')
+
+        if self.element_index is not None:
+            self.element_index.prune_user_filters(u for _uris in _user_filters.values() for u in _uris)
+
+        # The index is only set, once it's complete, as other threads read it without waiting, see `_load`.
+        self.user_filters = _user_filters
+
+        logging.info("Found %s existing MUFs created by the component." % sum(len(u) for u in _user_filters.values()))
+
+    def _find_user_filter(self, expression):
+        """
+        A function looking up an existing MUF object with an expression. Expressions of the candidates with the same
+        digest are taken from the element index, unless they were updated since they were stored, or downloaded and
+        stored in the index for the next run.
+
+        Parameters
+        ----------
+        self : class
+        expression : str
+            A normalized expression of the MUF.
+
+        Returns
+        -------
+        str
+            A URI of the existing object, or `None` if there's no object with the expression.
+        """
+
+        _candidates = dict(self.user_filters.get(self._get_muf_digest(expression), {}))
+
+        if not _candidates:
+            return None
+
+        _expressions = self.element_index.get_user_filters(_candidates) if self.element_index is not None else {}
+        _missing = [u for u in _candidates if u not in _expressions]
+
+        if _missing:
+
+            _objects = self.client._GD_get_objects(_missing)
+
+            if _objects is None:
+                logging.warning("Existing MUFs %s could not be downloaded, a new MUF will be created." % _missing)
+                return None
+
+            _downloaded = {o['userFilter']['meta']['uri']: o['userFilter']['content']['expression']
+                           for o in _objects if 'userFilter' in o}
+            self.client.metrics.increment('muf_object.downloaded', len(_downloaded))
+
+            if self.element_index is not None:
+                self.element_index.put_user_filters({u: (_candidates.get(u), e) for u, e in _downloaded.items()})
+
+            _expressions.update(_downloaded)
+
+        for u in _candidates:
+
+            if u in _expressions and self._normalize_muf_expression(_expressions[u]) == expression:
+                return u
+
+        return None
+
+    @staticmethod
+    def _get_muf_digest(expression):
+        """
+        A function returning a digest of a normalized MUF expression, which is part of the title of the MUF object.
+
+        Parameters
+        ----------
+        expression : str
+            A normalized expression of the MUF.
+
+        Returns
+        -------
+        str
+            First 16 hexadecimal characters of the SHA-1 digest of the expression.
+        """
+
+        return hashlib.sha1(expression.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _normalize_muf_expression(expression):
+        """
+        A function normalizing a MUF expression, so that expressions differing only in whitespace are equal.
+
+        Parameters
+        ----------
+        expression : str
+            An expression of the MUF.
+
+        Returns
+        -------
+        str
+            The normalized expression.
+        """
+
+        return ' '.join(expression.split())
+
+    def check_admin(self):
+        """
+        A function checking admin privileges and data permissions of the user used for authentication. The checks
+        are done only once, before the first change in the project.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        if self._admin_checked:
+            return
+
+        with self._admin_lock:
+
+            if not self._admin_checked:
+                self._GD_check_user_admin()
+                self._GD_check_admin_permissions()
+                self._admin_checked = True
 
     def run(self):
         """
-        The main run function
+        The main run function. Users from all input tables are processed concurrently, while rows for the same
+        login are always processed in the order, in which they appear in the table.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        try:
+            asyncio.run(self._run_async())
+
+        finally:
+            self.async_client.close()
+
+            if self.element_index is not None:
+                self.element_index.close()
+
+            self._write_state()
+
+            self.client.metrics.write(self.data_path, run_id=self.run_id, write_always=self.log.write_always)
+
+        logging.info("Connection pool statistics: %s" % json.dumps(self.client.get_pool_statistics()))
+        logging.info("Adaptive concurrency limits: %s" %
+                     json.dumps(self.client.concurrency_controller.get_statistics()))
+
+        if self.encountered_errors:
+            logging.error("The component has encountered errors during the component run. "
+                          "Please check the status table for more info.")
+            sys.exit(1)
+
+    def _write_state(self):
+        """
+        A function saving validators of the bootstrap responses and roles of the project to the state file, so that
+        the next run can revalidate them instead of downloading them again. Bodies of the responses are saved
+        to an output file, see SnapshotStore.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        if self.warm_start is True:
+            self.state['snapshots'] = {'pid': self.client.pid,
+                                       'responses': self.snapshot_store.save(self.client.get_snapshots())}
+        else:
+            self.state.pop('snapshots', None)
+            self.state.pop('roles', None)
+
+        self.write_state_file(self.state)
+
+    async def _run_async(self):
+        """
+        A function reading users from input tables and distributing them among concurrent workers.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        _queue = asyncio.Queue(maxsize=self.concurrency + self.prefetch_lookahead)
+        _login_locks = {}
+
+        self._batcher_group = BatcherGroup()
+        self._muf_assign_batcher = AsyncBatcher(self._assign_mufs, batch_size=self.muf_assign_batch_size,
+                                                name='userfilters_assign', group=self._batcher_group)
+        self._invite_batchers = {}
+        self._muf_objects = {}
+        self._project_users_batcher = AsyncBatcher(self._update_project_users,
+                                                   batch_size=self.project_users_batch_size,
+                                                   name='project_users_update', group=self._batcher_group)
+
+        self._prefetch_slots = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        self._prefetch_tasks = set()
+        self._prefetched = set()
+
+        _tasks = [asyncio.ensure_future(self._read_users(_queue))]
+        _tasks += [asyncio.ensure_future(self._process_users(_queue, _login_locks))
+                   for _ in range(self.concurrency)]
+
+        try:
+            _done, _ = await asyncio.wait(_tasks, return_when=asyncio.FIRST_EXCEPTION)
+
+            for t in _done:
+                t.result()
+
+        finally:
+            for t in _tasks + list(self._prefetch_tasks):
+                t.cancel()
+
+    async def _assign_mufs(self, assignments):
+        """
+        A function assigning MUFs to a batch of users in a single request. See AsyncBatcher.
+
+        Parameters
+        ----------
+        self : class
+        assignments : list
+            A list of tuples of length 2, a URI of the user and a list of MUF URIs.
+
+        Returns
+        -------
+        list
+            A list of tuples of length 3, one for each assignment. The first element marks, whether the assignment was
+            successful, the second element contains details of a failure and the third element is number of attempts
+            made by the request.
+        """
+
+        _sc, _js = await self.async_client._GD_assign_MUFs(assignments)
+        _attempts = self.async_client.last_attempts()
+
+        if _sc != 200:
+            return [(False, _js, _attempts)] * len(assignments)
+
+        _failures = self._get_batch_failures([u for u, _ in assignments],
+                                             _js.get('userFiltersUpdateResult') if isinstance(_js, dict) else None)
+
+        return [(False, f, _attempts) if f is not None else (True, '', _attempts) for f in _failures]
+
+    @staticmethod
+    def _normalize_user_uri(uri):
+        """
+        A function normalizing a URI of a user, so that URIs with and without the host, with a trailing slash
+        or in a different case are equal.
+
+        Parameters
+        ----------
+        uri : str
+            A URI of the user, e.g. `/gdc/account/profile/<id>`.
+
+        Returns
+        -------
+        str
+            The normalized URI, or `None` if the URI is not a string.
+        """
+
+        if not isinstance(uri, str):
+            return None
+
+        return urlsplit(uri.strip()).path.rstrip('/').lower()
+
+    @staticmethod
+    def _get_batch_failures(uris, result):
+        """
+        A function matching failures reported by a batch request to the users of the batch. If the result is
+        missing, or any failure can't be matched to a user of the batch, all users of the batch are marked as
+        failed, since it's not known, which of them were updated.
+
+        Parameters
+        ----------
+        uris : list
+            URIs of the users in the batch.
+        result : dict
+            Result of the batch request, e.g. `userFiltersUpdateResult`, with a list of `failed` entries.
+
+        Returns
+        -------
+        list
+            Details of the failure for each user, in the same order as URIs. `None` marks a successful user.
+        """
+
+        if not isinstance(result, dict) or not isinstance(result.get('failed', []), list):
+            return ["Result of the batch is missing in the response: %s" % result] * len(uris)
+
+        _uris = {Component._normalize_user_uri(u) for u in uris}
+        _failed = {}
+        _unmatched = []
+
+        for f in result.get('failed', []):
+
+            _uri = Component._normalize_user_uri(f.get('user') if isinstance(f, dict) else f)
+
+            if _uri in _uris:
+                _failed[_uri] = f
+            else:
+                _unmatched += [f]
+
+        if _unmatched:
+            logging.warning("Failures %s could not be matched to users of the batch, all %s users of the batch are "
+                            "marked as failed." % (_unmatched, len(uris)))
+            return ["Failures of the batch could not be matched to its users: %s" % _unmatched] * len(uris)
+
+        return [_failed.get(Component._normalize_user_uri(u)) for u in uris]
+
+    async def _update_project_users(self, updates):
+        """
+        A function updating status and role of a batch of users in a single request. See AsyncBatcher.
 
         Parameters
         ----------
         self : class
+        updates : list
+            A list of tuples of length 3, a URI of the user, the target status and a URI of the role, see
+            `clientGoodDataKeboola._GD_update_project_users`.
+
+        Returns
+        -------
+        list
+            A list of tuples of length 3, one for each update. The first element marks, whether the update was
+            successful, the second element contains details of a failure and the third element is number of attempts
+            made by the request.
+        """
+
+        _sc, _js = await self.async_client._GD_update_project_users(updates)
+        _attempts = self.async_client.last_attempts()
+
+        if _sc != 200:
+            return [(False, _js, _attempts)] * len(updates)
+
+        _failures = self._get_batch_failures([u for u, _, _ in updates],
+                                             _js.get('projectUsersUpdateResult') if isinstance(_js, dict) else None)
+
+        return [(False, f, _attempts) if f is not None else (True, '', _attempts) for f in _failures]
+
+    async def invite_user(self, email, role_uri, muf):
+        """
+        A function inviting a user to the project. Invitations with the same role and MUFs are collected and sent
+        in a single request, see AsyncBatcher.
+
+        Parameters
+        ----------
+        self : class
+        email : str
+            E-mail of the invited user.
+        role_uri : str
+            A URI of the role of the user.
+        muf : list
+            A list of MUF URIs.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 3, see `_invite_users`.
+        """
+
+        _group = (role_uri, tuple(muf))
+        _batcher = self._invite_batchers.get(_group)
+
+        if _batcher is None:
+            _batcher = AsyncBatcher(functools.partial(self._invite_users, role_uri, muf),
+                                    batch_size=self.invite_batch_size, name='invitations', group=self._batcher_group)
+            self._invite_batchers[_group] = _batcher
+
+        return await _batcher.submit(email)
+
+    async def _invite_users(self, role_uri, muf, emails):
+        """
+        A function inviting a batch of users with the same role and MUFs in a single request. If the request is
+        rejected, the batch is split in halves, which are sent separately.
+
+        Parameters
+        ----------
+        self : class
+        role_uri : str
+            A URI of the role of the users.
+        muf : list
+            A list of MUF URIs.
+        emails : list
+            E-mails of the invited users.
+
+        Returns
+        -------
+        list
+            A list of tuples of length 3, one for each e-mail. The first element marks, whether the invitation was
+            created, the second element contains details of a failure and the third element is number of attempts
+            made by the request.
+        """
+
+        _sc, _js = await self.async_client._GD_invite_users(emails, role_uri, muf)
+        _attempts = self.async_client.last_attempts()
+
+        # A single invalid e-mail fails the whole request, hence the batch is split, until the failure is attributed
+        # to the invalid e-mails. Throttling and server errors are not caused by the e-mails and are not split.
+        if 400 <= _sc < 500 and _sc != 429 and len(emails) > 1:
+
+            self.client.metrics.increment('invitations.split')
+            _half = len(emails) // 2
+
+            _first, _second = await asyncio.gather(self._invite_users(role_uri, muf, emails[:_half]),
+                                                   self._invite_users(role_uri, muf, emails[_half:]))
+
+            return _first + _second
+
+        if _sc != 200:
+            _details = "Error when creating invitations, please check the email address. Response: " + str(_js)
+            return [(False, _details, _attempts)] * len(emails)
+
+        _created = _js.get('createdInvitations', {})
+        _results = []
+
+        for e in emails:
+
+            _errors = {k: [e] for k in ('loginsDomainMismatch', 'loginsAlreadyInProject')
+                       if e.lower() in [x.lower() for x in _created.get(k, [])]}
+
+            _results += [(False, {'createdInvitations': _errors}, _attempts) if _errors else (True, '', _attempts)]
+
+        return _results
+
+    def _prefetch(self, user):
+        """
+        A function compiling the MUF of a user, who is waiting in the queue, in the background. Attribute values
+        needed by the MUF are therefore downloaded, while the users ahead in the queue are processed. Each distinct
+        MUF is prefetched only once. The function never waits, hence it does not slow down reading of the users;
+        MUFs are skipped, once `prefetch_lookahead` of them wait for a prefetch slot.
+
+        Parameters
+        ----------
+        self : class
+        user : User class
+            A user, who was put to the queue.
+        """
+
+        if self.prefetch_lookahead == 0 or user.action not in ('ENABLE', 'INVITE') or user.muf.strip() == '[]' \
+                or user.muf in self._prefetched or len(self._prefetch_tasks) >= self.prefetch_lookahead:
+            return
+
+        self._prefetched.add(user.muf)
+
+        _task = asyncio.ensure_future(self._prefetch_muf(user.muf))
+        self._prefetch_tasks.add(_task)
+        _task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _prefetch_muf(self, muf_str):
+        """
+        A function compiling a MUF, once a prefetch slot is available. Errors are ignored, since these are
+        reported once the user is processed.
+
+        Parameters
+        ----------
+        self : class
+        muf_str : str
+            A string containing MUF expression.
+        """
+
+        async with self._prefetch_slots:
+
+            try:
+                await self.async_client.run(self.create_muf_expression, muf_str)
+                self.client.metrics.increment('prefetch.muf')
+
+            except Exception as e:
+                logging.debug("Prefetching MUF %s failed. %s" % (muf_str, e))
+
+    async def _read_users(self, queue):
+        """
+        A function reading users from all input tables and putting them to the queue. Once all tables are read,
+        each worker receives a `None`, marking the end of the queue.
+
+        Parameters
+        ----------
+        self : class
+        queue : asyncio.Queue
+            A queue of users to be processed.
         """
 
         for f in self.input_files:
@@ -166,7 +915,6 @@ class Component(KBCEnvHandler):
                             _sso = None
 
                         user = User(_login, _role, _muf, _action, _fn, _ln, _sso)
-                        muf_name = f'muf_{_login}_{self.run_id}'
 
                     except KeyError as e:
 
@@ -174,347 +922,397 @@ class Component(KBCEnvHandler):
                             "Column %s is missing from the .csv file." % e)
                         sys.exit(1)
 
-                    if _login.strip() == self.client.username.lower().strip():
-                        logging.error("Cannot operate on user, who is used for authentication.")
-                        self.log.make_log(user.login, 'PERMISSION_ERROR', False,
-                                          user.role, "Cannot assign filters to user used for authentication.",
-                                          user.muf)
-                        continue
+                    await queue.put(user)
+                    self._prefetch(user)
 
-                    logging.info("Starting process for user %s." % _login)
+        for _ in range(self.concurrency):
+            await queue.put(None)
 
-                    _av_roles = list(self._roles_map.keys())
+    async def _process_users(self, queue, login_locks):
+        """
+        A worker function processing users from the queue until the end of the queue is reached.
 
-                    if _role not in _av_roles:
-                        self.log.make_log(user.login, "ROLE_ERROR", False,
-                                          user.role, "Role must be one of %s" % str(_av_roles), user.muf)
+        Parameters
+        ----------
+        self : class
+        queue : asyncio.Queue
+            A queue of users to be processed.
+        login_locks : dict
+            A dictionary of locks shared by all workers, ensuring rows of the same login are processed in order.
+            Each lock is stored together with number of workers holding or waiting for it and dropped, once the
+            last of them is finished.
+        """
 
-                        logging.warn(
-                            "There were some errors for user %s." % _login)
-                        self.encountered_errors = True
-                        continue
+        while True:
 
-                    self.check_membership(user)
+            user = await queue.get()
 
-                    logging.info("User %s was assigned the following action: %s" % (
-                        user.login, user._app_action))
+            if user is None:
+                return
 
-                    self.log.make_log(user.login, "ASSIGN_ACTION", True,
-                                      user.role, user._app_action, user.muf)
+            _lock = login_locks.setdefault(user.login, [asyncio.Lock(), 0])
+            _lock[1] += 1
 
-                    self.map_role_to_uri(user)
+            self._batcher_group.start()
 
-                    if user._app_action == 'SKIP':
+            try:
+                async with _lock[0]:
+                    await self.process_user(user)
 
-                        self.log.make_log(user.login, "NO_ACTION", True,
-                                          user.role, "No action needed.", user.muf)
+            finally:
+                _lock[1] -= 1
 
-                        logging.debug("Skipping user %s" % user.login)
+                if _lock[1] == 0:
+                    del login_locks[user.login]
 
-                        continue
+                self._batcher_group.finish()
 
-                    elif user._app_action == 'SKIP_NO_REMOVE':
+    async def process_user(self, user):
+        """
+        A function processing a single user from the input table.
 
-                        logging.warn(
-                            "Can't remove the user specified in the login section. The user %s will be skipped!"
-                            % _login)
-                        self.log.make_log(user.login, "REMOVE_FROM_PRJ", False,
-                                          user.role, "Cannot remove the user used to login. Please, "
-                                          + "change the username in parameters.", '')
+        Parameters
+        ----------
+        self : class
+        user : User class
+            A class representing user.
+        """
 
-                    elif user._app_action == 'GD_REMOVE':
+        if user.login.strip() == self.client.username.lower().strip():
+            logging.error("Cannot operate on user, who is used for authentication.")
+            self.log.make_log(user.login, 'PERMISSION_ERROR', False,
+                              user.role, "Cannot assign filters to user used for authentication.",
+                              user.muf)
+            return
 
-                        logging.debug(
-                            "Attempting to remove user %s." % user.login)
+        logging.info("Starting process for user %s." % user.login)
 
-                        _sc, _js = self.client._GD_remove_user_from_project(
-                            user.uri)
+        _av_roles = list((await self.async_client.run(lambda: self._roles_map)).keys())
 
-                        if _sc == 200:
+        if user.role not in _av_roles:
+            self.log.make_log(user.login, "ROLE_ERROR", False,
+                              user.role, "Role must be one of %s" % str(_av_roles), user.muf)
 
-                            self.log.make_log(user.login, "REMOVE_FROM_PRJ", True,
-                                              user.role, '', user.muf)
+            logging.warn(
+                "There were some errors for user %s." % user.login)
+            self.encountered_errors = True
+            return
+
+        # Users and invitations are obtained on the first use, hence the check must not block the event loop.
+        await self.async_client.run(self.check_membership, user)
+
+        logging.info("User %s was assigned the following action: %s" % (
+            user.login, user._app_action))
+
+        self.log.make_log(user.login, "ASSIGN_ACTION", True,
+                          user.role, user._app_action, user.muf)
+
+        self.map_role_to_uri(user)
 
-                        else:
+        if user._app_action not in ('SKIP', 'SKIP_NO_REMOVE'):
+            await self.async_client.run(self.check_admin)
+
+        if user._app_action == 'SKIP':
+
+            self.log.make_log(user.login, "NO_ACTION", True,
+                              user.role, "No action needed.", user.muf)
+
+            logging.debug("Skipping user %s" % user.login)
+
+            return
 
-                            self.log.make_log(user.login, "REMOVE_FROM_PRJ", False,
-                                              user.role, '', user.muf)
+        elif user._app_action == 'SKIP_NO_REMOVE':
 
-                    elif user._app_action == 'GD_DISABLE':
+            logging.warn(
+                "Can't remove the user specified in the login section. The user %s will be skipped!"
+                % user.login)
+            self.log.make_log(user.login, "REMOVE_FROM_PRJ", False,
+                              user.role, "Cannot remove the user used to login. Please, "
+                              + "change the username in parameters.", '')
 
-                        logging.debug(
-                            "Attemmpting to disable user %s" % user.login)
+        elif user._app_action == 'GD_REMOVE':
 
-                        _sc, _js = self.client._GD_disable_user_in_project(
-                            user.uri)
+            logging.debug(
+                "Attempting to remove user %s." % user.login)
 
-                        if _sc == 200:
+            _sc, _js = await self.async_client._GD_remove_user_from_project(
+                user.uri)
 
-                            self.log.make_log(user.login, "DISABLE_IN_PRJ", True,
-                                              user.role, '', user.muf)
+            if _sc == 200:
 
-                        else:
+                self.log.make_log(user.login, "REMOVE_FROM_PRJ", True,
+                                  user.role, '', user.muf,
+                                  attempts=self.async_client.last_attempts())
 
-                            self.log.make_log(user.login, "DISABLE_IN_PRJ", False,
-                                              user.role, _js, user.muf)
+            else:
 
-                    elif user._app_action == 'GD_DISABLE MUF GD_ENABLE':
+                self.log.make_log(user.login, "REMOVE_FROM_PRJ", False,
+                                  user.role, '', user.muf,
+                                  attempts=self.async_client.last_attempts())
 
-                        logging.debug(
-                            "User %s will be disabled, assigned MUFs and re-enabled." % user.login)
-                        logging.debug("Disabling...")
+        elif user._app_action == 'GD_DISABLE':
 
-                        _sc, _js = self.client._GD_disable_user_in_project(
-                            user.uri)
+            logging.debug(
+                "Attemmpting to disable user %s" % user.login)
 
-                        if _sc == 200:
+            _status, _js, _attempts = await self._project_users_batcher.submit((user.uri, 'DISABLED', None))
 
-                            self.log.make_log(user.login, "DISABLE_IN_PRJ", True,
-                                              user.role, '', user.muf)
+            if _status is True:
 
-                        else:
+                self.log.make_log(user.login, "DISABLE_IN_PRJ", True,
+                                  user.role, '', user.muf,
+                                  attempts=_attempts)
 
-                            self.log.make_log(user.login, "DISABLE_IN_PRJ", False,
-                                              user.role, _js, user.muf)
+            else:
 
-                            logging.warn(
-                                "There were some errors for user %s." % _login)
-                            self.encountered_errors = True
-                            continue
+                self.log.make_log(user.login, "DISABLE_IN_PRJ", False,
+                                  user.role, _js, user.muf,
+                                  attempts=_attempts)
 
-                        logging.debug("Creating MUFs...")
-                        _status, _muf = self.create_muf_uri(user, muf_name)
+        elif user._app_action == 'GD_DISABLE MUF GD_ENABLE':
 
-                        logging.debug(_muf)
+            logging.debug(
+                "User %s will be disabled, assigned MUFs and re-enabled." % user.login)
+            logging.debug("Disabling...")
 
-                        if _status is False:
-                            logging.warn(
-                                "There were some errors for user %s when creating URIs for MUFs." % _login)
-                            self.encountered_errors = True
-                            continue
+            _status, _js, _attempts = await self._project_users_batcher.submit((user.uri, 'DISABLED', None))
 
-                        logging.debug("Assigning MUFs...")
-                        _sc, _js = self.client._GD_assign_MUF(user.uri, _muf)
+            if _status is True:
 
-                        if _sc == 200:
+                self.log.make_log(user.login, "DISABLE_IN_PRJ", True,
+                                  user.role, '', user.muf,
+                                  attempts=_attempts)
 
-                            self.log.make_log(user.login, "ASSIGN_MUF", True,
-                                              user.role, '', user.muf)
+            else:
 
-                        else:
+                self.log.make_log(user.login, "DISABLE_IN_PRJ", False,
+                                  user.role, _js, user.muf,
+                                  attempts=_attempts)
 
-                            self.log.make_log(user.login, "ASSIGN_MUF", False,
-                                              user.role, _js, user.muf)
+                logging.warn(
+                    "There were some errors for user %s." % user.login)
+                self.encountered_errors = True
+                return
 
-                            logging.debug(_js)
+            logging.debug("Creating MUFs...")
+            _status, _muf = await self.create_muf_uri(user)
 
-                            logging.warn(
-                                "There were some errors for user %s when assigning MUFs." % _login)
-                            self.encountered_errors = True
-                            continue
+            logging.debug(_muf)
 
-                        logging.debug("Re-enabling user...")
-                        _sc, _js = self.client._GD_add_user_to_project(user.uri, user.role_uri)
+            if _status is False:
+                logging.warn(
+                    "There were some errors for user %s when creating URIs for MUFs." % user.login)
+                self.encountered_errors = True
+                return
 
-                        if _sc == 200:
+            logging.debug("Assigning MUFs...")
+            _status, _js, _attempts = await self._muf_assign_batcher.submit((user.uri, _muf))
 
-                            _failed = _js['projectUsersUpdateResult']['failed']
+            if _status is True:
 
-                            if len(_failed) == 0:
-                                self.log.make_log(user.login, "ENABLE_IN_PRJ", True, user.role, '', user.muf)
+                self.log.make_log(user.login, "ASSIGN_MUF", True,
+                                  user.role, '', user.muf,
+                                  attempts=_attempts)
 
-                            else:
-                                self.log.make_log(user.login, "ENABLE_IN_PRJ", False, user.role,
-                                                  _failed[0]['message'], user.muf)
-                                logging.warn("There were some errors for user %s." % _login)
-                                self.encountered_errors = True
+            else:
 
-                        else:
-                            logging.warn(f"Could not enable user {_login} in the project. Returned: {_sc} - {_js}.")
-                            self.log.make_log(user.login, "ENABLE_IN_PRJ", False, user.role,
-                                              f"Could not enable user {_login} in the project. " +
-                                              f"Returned: {_sc} - {_js}.", user.muf)
+                self.log.make_log(user.login, "ASSIGN_MUF", False,
+                                  user.role, _js, user.muf,
+                                  attempts=_attempts)
 
-                            continue
+                logging.debug(_js)
 
-                    elif user._app_action in ('MUF GD_INVITE', 'TRY_KB_CREATE MUF ENABLE_OR_INVITE'):
+                logging.warn(
+                    "There were some errors for user %s when assigning MUFs." % user.login)
+                self.encountered_errors = True
+                return
 
-                        if user._app_action == 'TRY_KB_CREATE MUF ENABLE_OR_INVITE':
+            logging.debug("Re-enabling user...")
+            _status, _js, _attempts = await self._project_users_batcher.submit((user.uri, 'ENABLED', user.role_uri))
 
-                            logging.info(
-                                "Attempting to create user %s in organization." % user.login)
+            if _status is True:
+                self.log.make_log(user.login, "ENABLE_IN_PRJ", True, user.role, '', user.muf,
+                                  attempts=_attempts)
 
-                            _sc, _js = self.client._KBC_create_user(
-                                user.login, user.first_name, user.last_name, user.sso_provider)
+            elif isinstance(_js, dict) and 'message' in _js:
+                self.log.make_log(user.login, "ENABLE_IN_PRJ", False, user.role,
+                                  _js['message'], user.muf,
+                                  attempts=_attempts)
+                logging.warn("There were some errors for user %s." % user.login)
+                self.encountered_errors = True
 
-                            if _sc == 201:
+            else:
+                logging.warn(f"Could not enable user {user.login} in the project. Returned: {_js}.")
+                self.log.make_log(user.login, "ENABLE_IN_PRJ", False, user.role,
+                                  f"Could not enable user {user.login} in the project. " +
+                                  f"Returned: {_js}.", user.muf,
+                                  attempts=_attempts)
 
-                                user.uri = '/gdc/account/profile/' + _js['uid']
-                                self.log.make_log(
-                                    user.login, "USER_CREATE", True, user.role, user.uri, user.muf)
+                return
 
-                                logging.debug(
-                                    "User created successfully. URI: %s" % user.uri)
+        elif user._app_action in ('MUF GD_INVITE', 'TRY_KB_CREATE MUF ENABLE_OR_INVITE'):
 
-                            elif _sc == 422:
+            if user._app_action == 'TRY_KB_CREATE MUF ENABLE_OR_INVITE':
 
-                                self.log.make_log(
-                                    user.login, "USER_CREATE", False, user.role, _js['errorMessage'], user.muf)
+                logging.info(
+                    "Attempting to create user %s in organization." % user.login)
 
-                                logging.warn(
-                                    "There were some errors for user %s." % _login)
-                                self.encountered_errors = True
-                                continue
+                _sc, _js = await self.async_client._KBC_create_user(
+                    user.login, user.first_name, user.last_name, user.sso_provider)
 
-                            else:
+                if _sc == 201:
 
-                                logging.warn(
-                                    "User %s already exists in a different organization." % user.login)
+                    user.uri = '/gdc/account/profile/' + _js['uid']
+                    self.log.make_log(
+                        user.login, "USER_CREATE", True, user.role, user.uri, user.muf,
+                        attempts=self.async_client.last_attempts())
 
-                        logging.debug("Creating MUFs...")
-                        _status, _muf = self.create_muf_uri(user, muf_name)
+                    logging.debug(
+                        "User created successfully. URI: %s" % user.uri)
 
-                        if _status is False:
-                            logging.warn(
-                                "Could not create MUF for user %s." % _login)
-                            continue
+                elif _sc == 422:
 
-                        if user.uri is None or (user.uri is not None and user.action == 'INVITE'):
+                    self.log.make_log(
+                        user.login, "USER_CREATE", False, user.role, _js['errorMessage'], user.muf,
+                        attempts=self.async_client.last_attempts())
 
-                            logging.debug("Inviting user...")
+                    logging.warn(
+                        "There were some errors for user %s." % user.login)
+                    self.encountered_errors = True
+                    return
 
-                            _dict = {'_email': user.login,
-                                     '_role': user.role_uri,
-                                     '_usrFilter': _muf}
+                else:
 
-                            _sc, _js = self.client._GD_invite_users_to_project(
-                                _dict)
+                    logging.warn(
+                        "User %s already exists in a different organization." % user.login)
 
-                            if _sc == 200:
+            logging.debug("Creating MUFs...")
+            _status, _muf = await self.create_muf_uri(user)
 
-                                _d_mismatch = _js['createdInvitations']['loginsDomainMismatch']
-                                _d_inproject = _js['createdInvitations']['loginsAlreadyInProject']
+            if _status is False:
+                logging.warn(
+                    "Could not create MUF for user %s." % user.login)
+                return
 
-                                if len(_d_mismatch) == 0 and len(_d_inproject) == 0:
+            if user.uri is None or (user.uri is not None and user.action == 'INVITE'):
 
-                                    self.log.make_log(user.login, "INVITE_TO_PRJ", True,
-                                                      user.role, '', user.muf)
+                logging.debug("Inviting user...")
 
-                                else:
+                _status, _js, _attempts = await self.invite_user(user.login, user.role_uri, _muf)
 
-                                    logging.warn(
-                                        "There were some errors when inviting user %s." % _login)
-                                    self.encountered_errors = True
-                                    self.log.make_log(user.login, "INVITE_TO_PRJ", False,
-                                                      user.role, _js, user.muf)
+                if _status is True:
 
-                            else:
+                    self.log.make_log(user.login, "INVITE_TO_PRJ", True,
+                                      user.role, '', user.muf,
+                                      attempts=_attempts)
 
-                                logging.warning(
-                                    "There were some errors when inviting user %s." % _login)
-                                self.encountered_errors = True
-                                self.log.make_log(
-                                    user.login, "INVITE_TO_PRJ", False, user.role,
-                                    "Error when creating invitations, please check the email address. Response: " +
-                                    str(_js),
-                                    user.muf)
+                else:
 
-                        else:
+                    logging.warning(
+                        "There were some errors when inviting user %s." % user.login)
+                    self.encountered_errors = True
+                    self.log.make_log(user.login, "INVITE_TO_PRJ", False,
+                                      user.role, _js, user.muf,
+                                      attempts=_attempts)
 
-                            logging.debug("Assigning MUFs...")
+            else:
 
-                            _sc, _js = self.client._GD_assign_MUF(
-                                user.uri, _muf)
+                logging.debug("Assigning MUFs...")
 
-                            if _sc == 200:
+                _status, _js, _attempts = await self._muf_assign_batcher.submit((user.uri, _muf))
 
-                                self.log.make_log(user.login, "ASSIGN_MUF", True,
-                                                  user.role, '', user.muf)
+                if _status is True:
 
-                            else:
+                    self.log.make_log(user.login, "ASSIGN_MUF", True,
+                                      user.role, '', user.muf,
+                                      attempts=_attempts)
 
-                                self.log.make_log(user.login, "ASSIGN_MUF", False,
-                                                  user.role, _js, user.muf)
+                else:
 
-                                logging.debug(_js)
+                    self.log.make_log(user.login, "ASSIGN_MUF", False,
+                                      user.role, _js, user.muf,
+                                      attempts=_attempts)
 
-                                logging.warn(
-                                    "There were some errors for user %s when assigning MUFs." % _login)
-                                self.encountered_errors = True
-                                continue
+                    logging.debug(_js)
 
-                            logging.debug("Enabling user in the project...")
-                            _sc, _js = self.client._KBC_add_user_to_project(
-                                user.login, user.role)
+                    logging.warn(
+                        "There were some errors for user %s when assigning MUFs." % user.login)
+                    self.encountered_errors = True
+                    return
 
-                            if _sc == 204:
+                logging.debug("Enabling user in the project...")
+                _sc, _js = await self.async_client._KBC_add_user_to_project(
+                    user.login, user.role)
 
-                                self.log.make_log(user.login, "ENABLE_IN_PRJ", True,
-                                                  user.role, '', user.muf)
+                if _sc == 204:
 
-                            else:
+                    self.log.make_log(user.login, "ENABLE_IN_PRJ", True,
+                                      user.role, '', user.muf,
+                                      attempts=self.async_client.last_attempts())
 
-                                self.log.make_log(user.login, "ENABLE_IN_PRJ", False,
-                                                  user.role, _js, user.muf)
+                else:
 
-                                logging.warn(
-                                    "There were some errors for user %s." % _login)
-                                self.encountered_errors = True
+                    self.log.make_log(user.login, "ENABLE_IN_PRJ", False,
+                                      user.role, _js, user.muf,
+                                      attempts=self.async_client.last_attempts())
 
-                    elif user._app_action == 'MUF KB_ENABLE':
+                    logging.warn(
+                        "There were some errors for user %s." % user.login)
+                    self.encountered_errors = True
 
-                        logging.debug(
-                            "User will be assigned MUFs and enabled.")
-                        logging.debug("Creating MUFs...")
+        elif user._app_action == 'MUF KB_ENABLE':
 
-                        _status, _muf = self.create_muf_uri(user, muf_name)
+            logging.debug(
+                "User will be assigned MUFs and enabled.")
+            logging.debug("Creating MUFs...")
 
-                        if _status is False:
-                            logging.warn(
-                                "Could not create MUF for user %s." % user.login)
-                            continue
+            _status, _muf = await self.create_muf_uri(user)
 
-                        logging.debug("Assigning MUFs...")
+            if _status is False:
+                logging.warn(
+                    "Could not create MUF for user %s." % user.login)
+                return
 
-                        _sc, _js = self.client._GD_assign_MUF(user.uri, _muf)
+            logging.debug("Assigning MUFs...")
 
-                        if _sc == 200:
+            _status, _js, _attempts = await self._muf_assign_batcher.submit((user.uri, _muf))
 
-                            self.log.make_log(user.login, "ASSIGN_MUF", True,
-                                              user.role, '', user.muf)
+            if _status is True:
 
-                        else:
+                self.log.make_log(user.login, "ASSIGN_MUF", True,
+                                  user.role, '', user.muf,
+                                  attempts=_attempts)
 
-                            self.log.make_log(user.login, "ASSIGN_MUF", False,
-                                              user.role, _js, user.muf)
+            else:
 
-                            logging.debug(_js)
+                self.log.make_log(user.login, "ASSIGN_MUF", False,
+                                  user.role, _js, user.muf,
+                                  attempts=_attempts)
 
-                            logging.warn(
-                                "There were some errors for user %s when assigning MUFs." % _login)
-                            self.encountered_errors = True
-                            continue
+                logging.debug(_js)
 
-                        logging.debug("Enabling user in the project...")
-                        _sc, _js = self.client._KBC_add_user_to_project(
-                            user.login, user.role)
+                logging.warn(
+                    "There were some errors for user %s when assigning MUFs." % user.login)
+                self.encountered_errors = True
+                return
 
-                        if _sc == 204:
+            logging.debug("Enabling user in the project...")
+            _sc, _js = await self.async_client._KBC_add_user_to_project(
+                user.login, user.role)
 
-                            self.log.make_log(user.login, "ENABLE_IN_PRJ", True,
-                                              user.role, '', user.muf)
+            if _sc == 204:
 
-                        else:
+                self.log.make_log(user.login, "ENABLE_IN_PRJ", True,
+                                  user.role, '', user.muf,
+                                  attempts=self.async_client.last_attempts())
 
-                            self.log.make_log(user.login, "ENABLE_IN_PRJ", False,
-                                              user.role, _js, user.muf)
+            else:
 
-                    logging.info("Process for user %s has ended." % user.login)
+                self.log.make_log(user.login, "ENABLE_IN_PRJ", False,
+                                  user.role, _js, user.muf,
+                                  attempts=self.async_client.last_attempts())
 
-        if self.encountered_errors:
-            logging.error("The component has encountered errors during the component run. "
-                          "Please check the status table for more info.")
-            sys.exit(1)
+        logging.info("Process for user %s has ended." % user.login)
 
     def _compare_projects(self):
         """
@@ -540,18 +1338,53 @@ class Component(KBCEnvHandler):
                 "You can't provision users from a different project than the origin project.")
             sys.exit(1)
 
-    def _get_all_attributes(self):
+    def _get_all_attributes(self, identifiers=None):
         """
-        A function for obtaining all attributes from the GD project.
+        A function for obtaining attributes from the GD project. If identifiers of the needed attributes are
+        provided, only these are resolved to their URIs. Otherwise, or if the identifiers could not be resolved,
+        all attributes of the project are listed.
 
         Parameters
         ----------
         self : class
+        identifiers : set
+            Identifiers of attributes referenced in the input tables. Identifiers of other objects than attributes
+            are not resolved.
         """
 
-        logging.info("Obtaining all attributes for the project.")
         _att_out = {}
 
+        if identifiers is not None and self.resolve_attributes_by_identifier is True:
+
+            logging.info("Resolving %s attributes referenced in the input tables." % len(identifiers))
+            _uris = self.client._GD_get_uris_by_identifiers(sorted(identifiers))
+
+            # Identifiers of labels, facts and other objects are resolved as well, hence only objects, which are
+            # attributes, are kept and the rest is reported as missing.
+            _objects = self.client._GD_get_objects(sorted(set(_uris.values()))) if _uris is not None else None
+
+            if _objects is not None:
+
+                _attribute_uris = {o['attribute']['meta']['uri'] for o in _objects if 'attribute' in o}
+
+                for _identifier, _link in _uris.items():
+
+                    if _link not in _attribute_uris:
+                        logging.warning("Object %s is not an attribute." % _identifier)
+                        continue
+
+                    _att_out[_identifier] = {'identifier': _identifier,
+                                             'uri': _link}
+
+                self.attributes = _att_out
+                self.log.make_log('admin', 'GET_ATTRIBUTES', True, '', '', '')
+
+                return
+
+            logging.warning("Could not resolve attributes by their identifiers. Obtaining all attributes instead.")
+
+        logging.info("Obtaining all attributes for the project.")
+
         _attributes = self.client._GD_get_attributes()['query']['entries']
 
         for a in _attributes:
@@ -564,41 +1397,73 @@ class Component(KBCEnvHandler):
         self.attributes = _att_out
         self.log.make_log('admin', 'GET_ATTRIBUTES', True, '', '', '')
 
-    def _get_all_users(self):
+    def _get_requested_values(self):
         """
-        A function to obtain all users provisioned by Keboola and within GD project.
+        A function scanning MUFs in all input tables and collecting distinct values requested for each attribute.
+        Rows with invalid MUFs are skipped, since these are reported once the rows are processed.
 
         Parameters
         ----------
         self : class
+
+        Returns
+        -------
+        dict
+            A dictionary with attribute identifier as a key and a set of requested values as a value.
         """
 
-        _GD_users = self.client._GD_get_users()['users']
-        _GD_users_out = {}
+        _requested = {}
 
-        for u in _GD_users:
+        for f in self.input_files:
 
-            # logging.debug(u)
+            _path = os.path.join(self.data_path, 'in',
+                                 'tables', f['destination'])
 
-            _email = u['user']['content']['email']
-            _email_identifier = _email.lower()
-            _user_uri = u['user']['links']['self']
-            _role = u['user']['content']['userRoles']
+            with open(_path) as file:
+
+                for row in csv.DictReader(file):
 
-            if _role != []:
+                    try:
+                        _muf_json = json.loads(row.get('muf') or '[]')
 
-                _role_uri = _role[0]
+                    except ValueError:
+                        continue
 
-            else:
+                    if not isinstance(_muf_json, list):
+                        continue
+
+                    for mf in _muf_json:
+
+                        if not isinstance(mf, dict) or not isinstance(mf.get('value'), list):
+                            continue
+
+                        _attr = mf.get('attribute')
+
+                        if not isinstance(_attr, str):
+                            continue
+
+                        _requested.setdefault(_attr, set()).update(v for v in mf['value'] if isinstance(v, str))
+
+        logging.info("Input tables request values of %s attributes." % len(_requested))
 
-                _role_uri = ''
+        return _requested
 
-            _status = u['user']['content']['status']
+    def _get_all_users(self):
+        """
+        A function to obtain all users provisioned by Keboola and within GD project.
+
+        Parameters
+        ----------
+        self : class
+        """
 
-            _GD_users_out[_email_identifier] = {'email': _email,
-                                                'uri': _user_uri,
-                                                'role': _role_uri,
-                                                'status': _status}
+        _GD_users_out = {}
+
+        for u in self.client._GD_get_users(self.users_page_size):
+
+            # logging.debug(u)
+
+            _GD_users_out[u['email'].lower()] = u
 
         self.log.make_log('admin', 'GET_GD_USERS', True, '', '', '')
         self.users_GD = _GD_users_out
@@ -637,13 +1502,14 @@ class Component(KBCEnvHandler):
     def _get_all_invitations(self):
         logging.info("Fetching invited users")
         invitations = self.client._GD_get_project_invitations().get("invitations")
-        self.invitations = []
+        _invitations = []
         for invitation in invitations:
             try:
                 invite_email = invitation.get("invitation").get("content").get("email")
-                self.invitations.append(invite_email)
+                _invitations.append(invite_email)
             except AttributeError:
                 logging.info(f"Error processing invite info: {invitation} ")
+        self.invitations = _invitations
 
     def _map_roles(self):
         """
@@ -661,7 +1527,16 @@ class Component(KBCEnvHandler):
         """
 
         logging.info("Mapping GD roles to KBC equivalents.")
-        _GD_roles = self.client._GD_get_roles()
+
+        _cached_roles = self.state.get('roles') or {}
+
+        if self.warm_start is True and _cached_roles.get('pid') == self.client.pid:
+            _GD_roles = self.client._GD_get_roles(_cached_roles.get('roles'))
+        else:
+            _GD_roles = self.client._GD_get_roles()
+
+        self.state['roles'] = {'pid': self.client.pid,
+                               'roles': _GD_roles}
 
         _KB_roles = ['admin',
                      'dashboardOnly',
@@ -776,6 +1651,8 @@ class Component(KBCEnvHandler):
     def create_muf_expression(self, muf_str):
         """
         A function for creating MUF expressions, i.e. attributes' and values' names are replaced by their URIs.
+        Compiled expressions and validation errors are cached by the canonical form of the MUF, hence each distinct
+        MUF is compiled only once per run.
 
         Parameters
         ----------
@@ -791,17 +1668,109 @@ class Component(KBCEnvHandler):
             second element is an error message.
         """
 
+        with self._muf_expressions_lock:
+            _cached = self._muf_expressions.get(muf_str)
+
+        if _cached is not None:
+            self.client.metrics.increment('muf_expression.hit')
+            return _cached
+
         try:
 
             _muf_json = json.loads(muf_str)
 
         except ValueError as e:
 
-            return False, e
+            _result = False, e
+
+            with self._muf_expressions_lock:
+                self._muf_expressions[muf_str] = _result
+
+            return _result
+
+        _muf_canonical = self._canonicalize_muf(_muf_json)
+        _key = json.dumps(_muf_canonical, sort_keys=True)
+
+        with self._muf_expressions_lock:
+            _cached = self._muf_expressions.get(_key)
+
+        if _cached is not None:
+
+            self.client.metrics.increment('muf_expression.hit')
+
+            with self._muf_expressions_lock:
+                self._muf_expressions[muf_str] = _cached
+
+            return _cached
+
+        self.client.metrics.increment('muf_expression.miss')
+        _status, _result, _cacheable = self._compile_muf_expression(_muf_canonical)
+
+        if _cacheable:
+
+            with self._muf_expressions_lock:
+                self._muf_expressions[muf_str] = self._muf_expressions[_key] = (_status, _result)
+
+        return _status, _result
+
+    @staticmethod
+    def _canonicalize_muf(muf_json):
+        """
+        A method converting a parsed MUF into its canonical form. Operators are upper-cased with normalized
+        whitespace, values and filters are sorted. Parts of the MUF, which are not valid, are left as they are.
+
+        Parameters
+        ----------
+        muf_json : list
+            A parsed MUF.
+
+        Returns
+        -------
+        list
+            A MUF in canonical form.
+        """
+
+        if not isinstance(muf_json, list):
+            return muf_json
+
+        _canonical = []
+
+        for mf in muf_json:
+
+            if isinstance(mf, dict):
+
+                mf = dict(mf)
+
+                if isinstance(mf.get('operator'), str):
+                    mf['operator'] = ' '.join(mf['operator'].upper().split())
+
+                if isinstance(mf.get('value'), list):
+                    mf['value'] = sorted(mf['value'], key=lambda v: json.dumps(v, sort_keys=True))
+
+            _canonical += [mf]
+
+        return sorted(_canonical, key=lambda mf: json.dumps(mf, sort_keys=True))
+
+    def _compile_muf_expression(self, muf_json):
+        """
+        A function compiling a parsed MUF to MUF expressions.
+
+        Parameters
+        ----------
+        self : class
+        muf_json : list
+            A parsed MUF.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 3. The first two elements are the same as in `create_muf_expression`, the third element
+            marks, whether the result can be cached. Results of failed downloads of attribute values are not cached.
+        """
 
         _muf_expr = []
 
-        for mf in _muf_json:
+        for mf in muf_json:
 
             try:
                 _attr = mf['attribute']
@@ -810,7 +1779,7 @@ class Component(KBCEnvHandler):
 
             except KeyError as e:
 
-                return False, "Key %s is missing in MUF json." % e
+                return False, "Key %s is missing in MUF json." % e, True
 
             logging.debug(_attr)
             logging.debug(_val)
@@ -818,11 +1787,11 @@ class Component(KBCEnvHandler):
 
             if not isinstance(_val, list):
 
-                return False, "Attribute values must be a list."
+                return False, "Attribute values must be a list.", True
 
             elif len(_val) > 1 and _oper not in ('IN', 'NOT IN'):
 
-                return False, "Unique value must be provided for non-IN operators."
+                return False, "Unique value must be provided for non-IN operators.", True
 
             # Possible improvement for AND operator in the future.
             if isinstance(_attr, str):
@@ -831,19 +1800,19 @@ class Component(KBCEnvHandler):
 
                 if not _attr_GD:
 
-                    return False, "Attribute %s is not in the project." % _attr
+                    return False, "Attribute %s is not in the project." % _attr, True
 
                 else:
 
                     _attr_uri = _attr_GD.get('uri')
 
                 if not _attr_uri:
-                    return False, "Attribute %s has no URI." % _attr
+                    return False, "Attribute %s has no URI." % _attr, True
 
-                _attr_vals = self.get_attribute_values(_attr_uri)
+                _attr_vals = self.get_attribute_values(_attr_uri, [v for v in _val if isinstance(v, str)])
 
                 if _attr_vals is False:
-                    return False, "Could not obtain values for attribute %s" % _attr_uri
+                    return False, "Could not obtain values for attribute %s" % _attr_uri, False
 
                 _attr_vals_uri = []
 
@@ -857,7 +1826,7 @@ class Component(KBCEnvHandler):
 
                     else:
 
-                        return False, "Attribute %s has no value %s." % (_attr, v)
+                        return False, "Attribute %s has no value %s." % (_attr, v), True
 
                 if _oper in ('IN', 'NOT IN'):
 
@@ -875,11 +1844,110 @@ class Component(KBCEnvHandler):
 
             else:
 
-                return False, "Attribute lists are not yet supported."
+                return False, "Attribute lists are not yet supported.", True
+
+        return True, _muf_expr, True
+
+    def get_attribute_state(self, attribute_uri):
+        """
+        A function obtaining the last update and number of elements of an attribute. The state is obtained only once
+        per run.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        dict
+            A dictionary with `updated` timestamp, number of `elements` and `elements_uri`, or `None` if the state
+            could not be obtained.
+        """
+
+        if attribute_uri not in self._attribute_states:
+            self._attribute_states[attribute_uri] = self.client._GD_get_attribute_state(attribute_uri)
+
+        return self._attribute_states[attribute_uri]
+
+    def _use_element_index(self, attribute_uri):
+        """
+        A function determining, whether the element index can be used for an attribute. Stored elements of the
+        attribute are dropped, if the attribute changed since they were stored.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        bool
+            Whether the element index is enabled and the state of the attribute is known.
+        """
+
+        if self.element_index is None:
+            return False
+
+        _state = self.get_attribute_state(attribute_uri)
+
+        if _state is None:
+            return False
+
+        self.element_index.validate(attribute_uri, _state)
+
+        return True
+
+    def get_element_lookup_mode(self, attribute_uri):
+        """
+        A function deciding, whether values of an attribute are looked up by their titles, or all values are
+        downloaded. Looking up titles is preferred, when the attribute has many elements and the input tables
+        request only a few distinct values of it.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        str
+            Either `targeted` or `full`.
+        """
+
+        if self.element_lookup != 'auto':
+            return self.element_lookup
+
+        _mode = self._element_lookup_modes.get(attribute_uri)
+
+        if _mode is not None:
+            return _mode
+
+        _state = self.get_attribute_state(attribute_uri)
+        _total = _state['elements'] if _state is not None else None
+        _requested = len(self.requested_values.get(attribute_uri, ()))
+
+        if _total is None:
+
+            _mode = 'full'
+
+        else:
+
+            _page_size = self.client.elements_page_size
+            _pages = math.ceil(_total / _page_size)
+            _mode = 'targeted' if _total > _page_size and _requested <= _pages * ELEMENT_LOOKUP_PAGE_COST else 'full'
 
-        return True, _muf_expr
+        logging.info("Values of attribute %s will be obtained using %s lookup. Elements: %s, requested values: %s."
+                     % (attribute_uri, _mode, _total, _requested))
 
-    def get_attribute_values(self, attribute_uri):
+        self._element_lookup_modes[attribute_uri] = _mode
+
+        return _mode
+
+    def get_attribute_values(self, attribute_uri, titles=None):
         """
         A function, getting and parsing the attributes.
 
@@ -887,25 +1955,124 @@ class Component(KBCEnvHandler):
         ----------
         _attribute_uri : str
             A URI of an attribute, for which values are to be obtained.
+        titles : list
+            Titles of values, which are needed. If provided, the values might be looked up by their titles
+            instead of downloading all values of the attribute, see `get_element_lookup_mode`.
 
         Returns
         -------
-        dict
-            A dictionary, with values' title as a key and respective URI as a value.
+        dict or CompactElementIndex
+            A mapping, with values' title as a key and respective URI as a value.
         """
 
-        _sc, _values = self.client._GD_get_attribute_values(attribute_uri)
+        if titles is not None and self.get_element_lookup_mode(attribute_uri) == 'targeted':
+            return self._find_attribute_values(attribute_uri, titles)
+
+        _hit, _val_out = self.attribute_cache.get(attribute_uri)
+
+        if _hit:
+            return _val_out
+
+        _use_index = self._use_element_index(attribute_uri)
+
+        if _use_index and self.element_index.is_complete(attribute_uri):
+
+            _val_out = self.element_index.get_all_values(attribute_uri)
+            self.attribute_cache.put(attribute_uri, _val_out)
+
+            return _val_out
+
+        _sc, _val_out = self.client._GD_get_attribute_values(attribute_uri)
 
         if _sc is False:
+            self.attribute_cache.put(attribute_uri, False)
             return False
 
+        self.attribute_cache.put(attribute_uri, _val_out)
+
+        if _use_index:
+            self.element_index.put_values(attribute_uri, _val_out, complete=True)
+
+        return _val_out
+
+    def _find_attribute_values(self, attribute_uri, titles):
+        """
+        A function looking up values of an attribute by their titles. Values, which were already looked up, are
+        taken from the attribute cache, including values, which do not exist.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute, for which values are to be obtained.
+        titles : list
+            Titles of values to be looked up.
+
+        Returns
+        -------
+        dict
+            A dictionary, with found values' title as a key and respective URI as a value.
+        """
+
         _val_out = {}
+        _missing = []
+
+        for t in titles:
+
+            _hit, _uri = self.attribute_cache.get((attribute_uri, t))
+
+            if not _hit:
+                _missing += [t]
+
+            elif _uri is False:
+                return False
+
+            elif _uri is not None:
+                _val_out[t] = _uri
+
+        if not _missing:
+            return _val_out
+
+        _use_index = self._use_element_index(attribute_uri)
+
+        if _use_index:
+
+            _indexed = self.element_index.get_values(attribute_uri, _missing)
+            _complete = self.element_index.is_complete(attribute_uri)
+
+            for t in _missing:
+
+                if t in _indexed or _complete:
+                    self.attribute_cache.put((attribute_uri, t), _indexed.get(t))
+
+            _val_out.update(_indexed)
+            _missing = [t for t in _missing if t not in _indexed and not _complete]
+
+            if not _missing:
+                return _val_out
+
+        # The state holds the URI of elements, so that the attribute is not obtained again for each lookup.
+        _state = self.get_attribute_state(attribute_uri)
+        _elements_uri = _state.get('elements_uri') if _state is not None else None
+
+        _sc, _values = self.client._GD_find_attribute_elements(attribute_uri, _missing, _elements_uri)
+
+        if _sc is False:
+
+            for t in _missing:
+                self.attribute_cache.put((attribute_uri, t), False)
+
+            return False
+
+        _found = {v['title']: v['uri'] for v in _values}
+
+        if _use_index:
+            self.element_index.put_values(attribute_uri, _found)
 
-        for v in _values:
-            _title = v['title']
-            _uri = v['uri']
+        for t in _missing:
+            self.attribute_cache.put((attribute_uri, t), _found.get(t))
 
-            _val_out[_title] = _uri
+        _val_out.update(_found)
 
         return _val_out
 
@@ -963,9 +2130,10 @@ class Component(KBCEnvHandler):
 
         return '[' + ''.join(_list) + ']'
 
-    def create_muf(self, muf_expr, muf_name: str = None):
+    async def create_muf(self, muf_expr):
         """
-        Creates data permission from a list.
+        Creates data permission from a list. Each distinct expression is created only once per run, see
+        `_create_muf_object`.
 
         Parameters
         ----------
@@ -975,15 +2143,18 @@ class Component(KBCEnvHandler):
         Returns
         -------
         tuple
-            A tuple with 2 elements. First element captures, whether the an attempt to create MUFs for
+            A tuple with 3 elements. First element captures, whether the an attempt to create MUFs for
             all elements in the list was successful. If the first argument returns `SUCCESS`, a list
-            with URIs to filter is returned, otherwise an error message is returned.
+            with URIs to filter is returned, otherwise an error message is returned. The third element is number
+            of attempts made by requests sent for the list.
         """
         _muf_ids = []
+        _attempts = 0
 
         for mf in muf_expr:
 
-            mf_sc, mf_json = self.client._GD_create_MUF(mf, muf_name if muf_name is not None else 'muf')
+            mf_sc, mf_json, mf_attempts = await self._create_muf_object(mf)
+            _attempts += mf_attempts
 
             if mf_sc == 200:
 
@@ -991,17 +2162,82 @@ class Component(KBCEnvHandler):
 
             else:
 
-                # logging.debug("MUF:")
-                # logging.debug(mf)
-
                 logging.debug("Status response:")
                 logging.debug(mf_sc)
 
                 logging.debug("JSON response:")
                 logging.debug(mf_json)
-                return False, "Could not create MUF. Received: %s" % mf_json
+                return False, "Could not create MUF. Received: %s" % mf_json, _attempts
+
+        return True, _muf_ids, _attempts
+
+    async def _create_muf_object(self, expression):
+        """
+        A function creating a MUF object with an expression. Users with the same expression share a single object,
+        named by a digest of the expression; tasks requesting an expression, which is being created, wait for the
+        object instead of creating another one. Failed attempts are not kept, hence the next user with the same
+        expression tries again. If an object with the same expression already exists in the project, it is reused,
+        see `_find_user_filter`.
+
+        Parameters
+        ----------
+        self : class
+        expression : str
+            An expression of the MUF.
+
+        Returns
+        -------
+        tuple
+            A tuple of length 3, see rsp_splitter. The third element is number of attempts made by the request, `0`
+            if the object was created for another user.
+        """
+
+        _future = self._muf_objects.get(expression)
+
+        if _future is not None:
+            self.client.metrics.increment('muf_object.shared')
+            _sc, _js, _ = await asyncio.shield(_future)
+
+            return _sc, _js, 0
+
+        _future = asyncio.get_event_loop().create_future()
+        self._muf_objects[expression] = _future
+
+        _normalized = self._normalize_muf_expression(expression)
+        _digest = self._get_muf_digest(_normalized)
+        _name = MUF_TITLE_PREFIX + '%s_%s' % (_digest, self.run_id)
+
+        try:
+            _existing = await self.async_client.run(self._find_user_filter, _normalized)
+
+            if _existing is not None:
+                self.client.metrics.increment('muf_object.reused')
+                _future.set_result((200, {'uri': _existing}, 0))
+
+                return _future.result()
+
+            _sc, _js = await self.async_client._GD_create_MUF(expression, _name)
+            _attempts = self.async_client.last_attempts()
+
+        except BaseException as e:
+            del self._muf_objects[expression]
+            _future.set_exception(e)
+            raise
+
+        if _sc == 200:
+            self.client.metrics.increment('muf_object.created')
+            # The last update of a new object is not known, hence it's downloaded again by the next run.
+            self.user_filters.setdefault(_digest, {})[_js['uri']] = None
+
+            if self.element_index is not None:
+                await self.async_client.run(self.element_index.put_user_filters, {_js['uri']: (None, expression)})
+
+        else:
+            del self._muf_objects[expression]
+
+        _future.set_result((_sc, _js, _attempts))
 
-        return True, _muf_ids
+        return _future.result()
 
     def check_membership(self, user):
         """
@@ -1124,7 +2360,7 @@ class Component(KBCEnvHandler):
             logging.error("Unknown error while checking for membership.")
             sys.exit(2)
 
-    def create_muf_uri(self, user, muf_name: str):
+    async def create_muf_uri(self, user):
         """
         A function combining creating MUF expression function and creating MUFs.
 
@@ -1150,7 +2386,7 @@ class Component(KBCEnvHandler):
         if _muf_str == '[]':
             return True, []
 
-        _status, _muf_expr = self.create_muf_expression(_muf_str)
+        _status, _muf_expr = await self.async_client.run(self.create_muf_expression, _muf_str)
 
         self.log.make_log(user.login, "CREATE_MUF_EXPR", _status,
                           user.role, str(_muf_expr), user.muf)
@@ -1161,10 +2397,10 @@ class Component(KBCEnvHandler):
         if _status is False:
             return False, []
 
-        _status, _muf_uri = self.create_muf(_muf_expr, muf_name)
+        _status, _muf_uri, _attempts = await self.create_muf(_muf_expr)
 
         self.log.make_log(user.login, "CREATE_MUF", _status,
-                          user.role, str(_muf_uri), user.muf)
+                          user.role, str(_muf_uri), user.muf, attempts=_attempts)
 
         if _status is False:
 
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+
+AIMD_INITIAL_LIMIT = 4
+AIMD_MIN_LIMIT = 1
+AIMD_MAX_LIMIT = 10
+AIMD_INCREASE = 1.0
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_LATENCY_THRESHOLD = 5.0
+
+AIMD_ENDPOINTS = ('create_muf', 'assign_muf', 'invitations', 'project_users')
+
+
+class AIMDLimiter:
+    """
+    A thread-safe limit of requests in flight, adjusted by additive increase and multiplicative decrease.
+
+    Every healthy response increases the limit by `increase / limit`, i.e. by `increase` after a whole window of
+    healthy responses. A throttled (429) or failed (5xx) response, a connection error or a response slower than
+    `latency_threshold` decreases the limit by `decrease_factor`. Only requests sent after the last decrease can
+    decrease the limit again, so that a single congestion event, observed by all requests in flight, is only
+    counted once.
+    """
+
+    def __init__(self, name, initial=AIMD_INITIAL_LIMIT, minimum=AIMD_MIN_LIMIT, maximum=AIMD_MAX_LIMIT,
+                 increase=AIMD_INCREASE, decrease_factor=AIMD_DECREASE_FACTOR,
+                 latency_threshold=AIMD_LATENCY_THRESHOLD):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        name : str
+            Name of the limited endpoint, used for logging.
+        initial : int
+            Initial limit of requests in flight.
+        minimum : int
+            Minimum limit of requests in flight.
+        maximum : int
+            Maximum limit of requests in flight.
+        increase : float
+            Additive increase of the limit per window of healthy responses.
+        decrease_factor : float
+            Multiplicative decrease of the limit on congestion.
+        latency_threshold : float
+            Number of seconds, after which a response is considered a latency spike.
+        """
+
+        self.name = name
+        self.minimum = max(int(minimum), 1)
+        self.maximum = max(int(maximum), self.minimum)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self.decreases = 0
+        self.peak_limit = self.limit
+
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+
+    def acquire(self):
+        """
+        A function blocking until a request can be sent without exceeding the limit.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        float
+            Time, when the slot was acquired. Must be passed to `release`.
+        """
+
+        with self._condition:
+
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+
+            self.in_flight += 1
+
+            return time.monotonic()
+
+    def release(self, started, status_code=None):
+        """
+        A function releasing the slot and adjusting the limit based on the result of the request.
+
+        Parameters
+        ----------
+        self : class
+        started : float
+            Value returned by `acquire`.
+        status_code : int
+            Status code of the response. `None` marks a request, which failed with an exception.
+        """
+
+        _now = time.monotonic()
+        _congested = status_code is None or status_code == 429 or status_code >= 500 or \
+            _now - started > self.latency_threshold
+
+        with self._condition:
+
+            self.in_flight -= 1
+
+            if _congested and started >= self._last_decrease:
+
+                self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+                self._last_decrease = _now
+                self.decreases += 1
+
+                logging.debug("Concurrency limit of %s decreased to %s." % (self.name, int(self.limit)))
+
+            elif not _congested:
+
+                self.limit = min(float(self.maximum), self.limit + self.increase / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+
+            self._condition.notify_all()
+
+
+class AIMDController:
+    """
+    A class holding separate adaptive limits for each kind of mutation sent to GoodData.
+    """
+
+    def __init__(self, maximum=AIMD_MAX_LIMIT, latency_threshold=AIMD_LATENCY_THRESHOLD, endpoints=AIMD_ENDPOINTS):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        maximum : int
+            Maximum limit of requests in flight for each endpoint.
+        latency_threshold : float
+            Number of seconds, after which a response is considered a latency spike.
+        endpoints : tuple
+            Names of endpoints, which are limited.
+        """
+
+        self.limiters = {e: AIMDLimiter(e, initial=min(AIMD_INITIAL_LIMIT, maximum), maximum=maximum,
+                                        latency_threshold=latency_threshold) for e in endpoints}
+
+    def get_limiter(self, endpoint):
+        """
+        A function returning the limiter of an endpoint.
+
+        Parameters
+        ----------
+        self : class
+        endpoint : str
+            Name of the endpoint.
+
+        Returns
+        -------
+        AIMDLimiter
+            The limiter, or `None` if the endpoint is not limited.
+        """
+
+        return self.limiters.get(endpoint)
+
+    def get_statistics(self):
+        """
+        A function returning current state of all limiters.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        dict
+            A dictionary with endpoint name as a key and current limit, peak limit and number of decreases as
+            a value.
+        """
+
+        return {e: {'limit': int(_l.limit), 'peak_limit': int(_l.peak_limit), 'decreases': _l.decreases}
+                for e, _l in self.limiters.items()}
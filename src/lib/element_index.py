@@ -0,0 +1,347 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from lib.compact_element_index import CompactElementIndex, CompactElementIndexBuilder
+
+ELEMENT_INDEX_FILE = 'gd_element_index.sqlite'
+ELEMENT_INDEX_TAG = 'gd_element_index'
+ELEMENT_INDEX_VERSION = 3
+
+
+class ElementIndex:
+    """
+    A persistent index of attribute elements, reused across runs.
+
+    The index is a SQLite database, which is seeded from the input file tagged `gd_element_index` and saved
+    to output files with the same tag at the end of the run. Each attribute is stored together with its last
+    update and number of elements; if either differs from the current state of the attribute, stored elements are
+    dropped and the attribute is downloaded again. Attributes can be stored completely, or only with elements
+    looked up by their titles.
+    The index also holds expressions of MUF objects in the project together with their last update, so that
+    existing objects, which might be reused, are downloaded again only once they change.
+    """
+
+    def __init__(self, data_path, tags=None, metrics=None):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        data_path : str
+            A data path of the component.
+        tags : list
+            Additional tags of the output file.
+        metrics : MetricsCollector
+            A collector, to which hits and misses of the index are reported.
+        """
+
+        self.path = os.path.join(data_path, 'out', 'files', ELEMENT_INDEX_FILE)
+        self.tags = [ELEMENT_INDEX_TAG] + (tags or [])
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._validated = {}
+
+        _seeds = sorted(glob.glob(os.path.join(data_path, 'in', 'files', '*' + ELEMENT_INDEX_FILE)),
+                        key=os.path.getmtime)
+
+        if _seeds:
+            shutil.copyfile(_seeds[-1], self.path)
+            logging.info("Element index loaded from %s." % os.path.basename(_seeds[-1]))
+
+        try:
+            self._connection = self._connect()
+
+        except sqlite3.DatabaseError as e:
+            logging.warning("Element index could not be read, a new index will be created. %s" % e)
+            os.remove(self.path)
+            self._connection = self._connect()
+
+    def _connect(self):
+        """
+        A function opening the database and creating the schema, if the database is new or of a different version.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        sqlite3.Connection
+            An open connection to the database.
+        """
+
+        _connection = sqlite3.connect(self.path, check_same_thread=False)
+
+        if _connection.execute('PRAGMA user_version').fetchone()[0] != ELEMENT_INDEX_VERSION:
+
+            _connection.executescript('''
+                DROP TABLE IF EXISTS attributes;
+                DROP TABLE IF EXISTS elements;
+                DROP TABLE IF EXISTS user_filters;
+                CREATE TABLE attributes (uri TEXT PRIMARY KEY, updated TEXT, element_count INTEGER,
+                                         complete INTEGER NOT NULL);
+                CREATE TABLE elements (attribute_uri TEXT NOT NULL, title TEXT NOT NULL, uri TEXT NOT NULL,
+                                       PRIMARY KEY (attribute_uri, title));
+                CREATE TABLE user_filters (uri TEXT PRIMARY KEY, updated TEXT, expression TEXT NOT NULL);
+                PRAGMA user_version = %s;
+            ''' % ELEMENT_INDEX_VERSION)
+
+        return _connection
+
+    def _increment(self, counter):
+        """
+        A function reporting a counter to the run metrics.
+
+        Parameters
+        ----------
+        self : class
+        counter : str
+            Name of the counter.
+        """
+
+        if self.metrics is not None:
+            self.metrics.increment('element_index.' + counter)
+
+    def validate(self, attribute_uri, state):
+        """
+        A function comparing stored attribute with its current state. If the attribute changed, its stored elements
+        are dropped. Each attribute is validated only once per run.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+        state : dict
+            Current state of the attribute, see `clientGoodDataKeboola._GD_get_attribute_state`.
+
+        Returns
+        -------
+        bool
+            Whether stored elements of the attribute are up to date.
+        """
+
+        with self._lock:
+
+            if attribute_uri in self._validated:
+                return self._validated[attribute_uri]
+
+            _stored = self._connection.execute('SELECT updated, element_count FROM attributes WHERE uri = ?',
+                                               (attribute_uri,)).fetchone()
+
+            _valid = _stored is not None and state['updated'] is not None and \
+                _stored == (state['updated'], state['elements'])
+
+            if not _valid:
+
+                with self._connection:
+                    self._connection.execute('DELETE FROM elements WHERE attribute_uri = ?', (attribute_uri,))
+                    self._connection.execute('INSERT OR REPLACE INTO attributes VALUES (?, ?, ?, 0)',
+                                             (attribute_uri, state['updated'], state['elements']))
+
+            self._validated[attribute_uri] = _valid
+
+        self._increment('valid' if _valid else 'stale')
+
+        return _valid
+
+    def is_complete(self, attribute_uri):
+        """
+        A function returning, whether all elements of an attribute are stored.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        bool
+            Whether the attribute is stored completely.
+        """
+
+        with self._lock:
+
+            _row = self._connection.execute('SELECT complete FROM attributes WHERE uri = ?',
+                                            (attribute_uri,)).fetchone()
+
+        return _row is not None and _row[0] == 1
+
+    def get_values(self, attribute_uri, titles):
+        """
+        A function returning stored elements of an attribute with the given titles.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+        titles : list
+            Titles of requested elements.
+
+        Returns
+        -------
+        dict
+            A dictionary, with values' title as a key and respective URI as a value.
+        """
+
+        _rows = []
+
+        with self._lock:
+
+            for t in titles:
+                _rows += self._connection.execute(
+                    'SELECT title, uri FROM elements WHERE attribute_uri = ? AND title = ?',
+                    (attribute_uri, t)).fetchall()
+
+        self._increment('hit' if _rows else 'miss')
+
+        return dict(_rows)
+
+    def get_all_values(self, attribute_uri):
+        """
+        A function returning all stored elements of an attribute. Rows are added to the index as they're read from
+        the database, hence all elements are never held as separate objects at the same time.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+
+        Returns
+        -------
+        CompactElementIndex
+            An index of values' titles and their URIs.
+        """
+
+        with self._lock:
+
+            _rows = self._connection.execute('SELECT title, uri FROM elements WHERE attribute_uri = ?',
+                                             (attribute_uri,))
+            _values = CompactElementIndex(CompactElementIndexBuilder().add(_rows))
+
+        self._increment('hit' if _values else 'miss')
+
+        return _values
+
+    def put_values(self, attribute_uri, values, complete=False):
+        """
+        A function storing elements of an attribute.
+
+        Parameters
+        ----------
+        self : class
+        attribute_uri : str
+            A URI of an attribute.
+        values : dict
+            A dictionary, with values' title as a key and respective URI as a value.
+        complete : bool
+            Whether the values contain all elements of the attribute.
+        """
+
+        with self._lock, self._connection:
+
+            self._connection.executemany('INSERT OR REPLACE INTO elements VALUES (?, ?, ?)',
+                                         ((attribute_uri, t, u) for t, u in values.items()))
+
+            if complete:
+                self._connection.execute('UPDATE attributes SET complete = 1 WHERE uri = ?', (attribute_uri,))
+
+    def get_user_filters(self, user_filters):
+        """
+        A function returning expressions of stored MUF objects, which did not change since they were stored.
+
+        Parameters
+        ----------
+        self : class
+        user_filters : dict
+            A dictionary, with URI of the MUF object as a key and its last update as a value.
+
+        Returns
+        -------
+        dict
+            A dictionary, with URI of the stored MUF object as a key and its expression as a value. Objects, which
+            were updated since they were stored, are not returned.
+        """
+
+        _expressions = {}
+
+        with self._lock:
+
+            for _uri, _updated in user_filters.items():
+
+                _row = self._connection.execute('SELECT updated, expression FROM user_filters WHERE uri = ?',
+                                                (_uri,)).fetchone()
+
+                if _row is None:
+                    continue
+
+                if _row[0] == _updated:
+                    _expressions[_uri] = _row[1]
+
+                else:
+                    logging.debug("MUF object %s was updated since it was stored." % _uri)
+                    self._increment('user_filter_stale')
+
+        return _expressions
+
+    def put_user_filters(self, user_filters):
+        """
+        A function storing expressions of MUF objects.
+
+        Parameters
+        ----------
+        self : class
+        user_filters : dict
+            A dictionary, with URI of the MUF object as a key and a tuple of its last update and expression
+            as a value.
+        """
+
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO user_filters VALUES (?, ?, ?)',
+                                         ((u, _updated, _expression)
+                                          for u, (_updated, _expression) in user_filters.items()))
+
+    def prune_user_filters(self, uris):
+        """
+        A function dropping stored MUF objects, which no longer exist in the project.
+
+        Parameters
+        ----------
+        self : class
+        uris : iterable
+            URIs of all existing MUF objects.
+        """
+
+        with self._lock, self._connection:
+
+            self._connection.execute('CREATE TEMP TABLE existing_user_filters (uri TEXT PRIMARY KEY)')
+            self._connection.executemany('INSERT OR IGNORE INTO existing_user_filters VALUES (?)',
+                                         ((u,) for u in uris))
+            self._connection.execute('DELETE FROM user_filters WHERE uri NOT IN '
+                                     '(SELECT uri FROM existing_user_filters)')
+            self._connection.execute('DROP TABLE existing_user_filters')
+
+    def close(self):
+        """
+        A function closing the database and writing the manifest of the output file.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        with self._lock:
+            self._connection.close()
+
+        with open(self.path + '.manifest', 'w') as f:
+            json.dump({'is_permanent': False, 'tags': self.tags}, f)
+
+        logging.info("Element index saved to %s." % self.path)
@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import datetime
+import threading
 
 
 class Logger:
@@ -31,9 +32,11 @@ class Logger:
                        'role',
                        'details',
                        'muf',
-                       'run_id']
+                       'run_id',
+                       'attempts']
         self.run_id = run_id
         self.write_always = write_always
+        self._lock = threading.Lock()
         if self.write_always:
             logging.info("Parameter fail_on_error is set to true, the component will end with error if it encounters "
                          "any problems during run.")
@@ -53,7 +56,7 @@ class Logger:
 
         self.create_manifest()
 
-    def make_log(self, user, action, success, role, details, muf):
+    def make_log(self, user, action, success, role, details, muf, attempts=''):
 
         """
         A function, that writes a row to a status file.
@@ -73,6 +76,8 @@ class Logger:
             Any additional details about the action.
         muf : str
             A muf expression used for the user.
+        attempts : int
+            Number of attempts needed to send the request to API, if the action required one.
         """
 
         _ts = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f UTC')
@@ -88,9 +93,10 @@ class Logger:
                      'role': role,
                      'details': details,
                      'muf': muf,
-                     'run_id': self.run_id}
+                     'run_id': self.run_id,
+                     'attempts': attempts}
 
-        with open(self.output_path, 'a') as log_file:
+        with self._lock, open(self.output_path, 'a') as log_file:
 
             writer = csv.DictWriter(log_file,
                                     self.fields,
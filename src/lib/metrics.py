@@ -0,0 +1,218 @@
+import csv
+import json
+import logging
+import math
+import os
+import threading
+from array import array
+from collections import Counter
+
+
+class MetricsCollector:
+    """
+    A class collecting statistics about API calls and internal counters during the run. The statistics are
+    written to a metrics table next to the status file.
+    """
+
+    def __init__(self):
+        """
+        Init function.
+        """
+
+        self.fields = ['run_id',
+                       'endpoint',
+                       'calls',
+                       'status_codes',
+                       'bytes_sent',
+                       'bytes_received',
+                       'latency_p50_ms',
+                       'latency_p95_ms',
+                       'latency_p99_ms',
+                       'latency_total_ms']
+
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._counters = Counter()
+
+    def record(self, endpoint, status_code, latency, bytes_sent=0, bytes_received=0):
+        """
+        A function recording a single call to an endpoint.
+
+        Parameters
+        ----------
+        self : class
+        endpoint : str
+            Logical name of the endpoint, e.g. `users` or `userfilters_assign`.
+        status_code : int
+            Status code of the response, or `error` if the request raised an exception.
+        latency : float
+            Number of seconds the call took.
+        bytes_sent : int
+            Size of the request body.
+        bytes_received : int
+            Size of the response body.
+        """
+
+        with self._lock:
+
+            _stats = self._endpoints.get(endpoint)
+
+            if _stats is None:
+                _stats = {'calls': 0,
+                          'status_codes': Counter(),
+                          'bytes_sent': 0,
+                          'bytes_received': 0,
+                          'latencies': array('d')}
+                self._endpoints[endpoint] = _stats
+
+            _stats['calls'] += 1
+            _stats['status_codes'][str(status_code)] += 1
+            _stats['bytes_sent'] += bytes_sent
+            _stats['bytes_received'] += bytes_received
+            _stats['latencies'].append(latency)
+
+    def increment(self, counter, value=1):
+        """
+        A function increasing an internal counter, e.g. number of cache hits.
+
+        Parameters
+        ----------
+        self : class
+        counter : str
+            Name of the counter.
+        value : int
+            Value, by which the counter is increased.
+        """
+
+        with self._lock:
+            self._counters[counter] += value
+
+    def get_counter(self, counter):
+        """
+        A function returning current value of an internal counter.
+
+        Parameters
+        ----------
+        self : class
+        counter : str
+            Name of the counter.
+
+        Returns
+        -------
+        int
+            Value of the counter.
+        """
+
+        with self._lock:
+            return self._counters[counter]
+
+    @staticmethod
+    def _percentile(sorted_values, percentile):
+        """
+        A function returning a percentile of sorted values using the nearest-rank method.
+
+        Parameters
+        ----------
+        sorted_values : list
+            A sorted list of values.
+        percentile : float
+            Requested percentile, between 0 and 100.
+
+        Returns
+        -------
+        float
+            Value of the percentile, or 0 if there are no values.
+        """
+
+        if len(sorted_values) == 0:
+            return 0.0
+
+        _rank = max(int(math.ceil(percentile / 100 * len(sorted_values))), 1)
+
+        return sorted_values[_rank - 1]
+
+    def get_rows(self, run_id=None):
+        """
+        A function summarizing all collected statistics into rows of the metrics table. Counters are reported
+        as rows with `counter.` prefix, with their value in the `calls` column.
+
+        Parameters
+        ----------
+        self : class
+        run_id : str
+            ID of the current run.
+
+        Returns
+        -------
+        list
+            A list of dictionaries, one per endpoint or counter.
+        """
+
+        _rows = []
+
+        with self._lock:
+
+            for _endpoint, _stats in sorted(self._endpoints.items()):
+
+                _latencies = sorted(_stats['latencies'])
+
+                _rows += [{'run_id': run_id,
+                           'endpoint': _endpoint,
+                           'calls': _stats['calls'],
+                           'status_codes': json.dumps(dict(_stats['status_codes'])),
+                           'bytes_sent': _stats['bytes_sent'],
+                           'bytes_received': _stats['bytes_received'],
+                           'latency_p50_ms': round(self._percentile(_latencies, 50) * 1000, 1),
+                           'latency_p95_ms': round(self._percentile(_latencies, 95) * 1000, 1),
+                           'latency_p99_ms': round(self._percentile(_latencies, 99) * 1000, 1),
+                           'latency_total_ms': round(sum(_latencies) * 1000, 1)}]
+
+            for _counter, _value in sorted(self._counters.items()):
+
+                _rows += [{'run_id': run_id,
+                           'endpoint': 'counter.' + _counter,
+                           'calls': _value}]
+
+        return _rows
+
+    def write(self, data_path, run_id=None, write_always: bool = False):
+        """
+        A function writing the metrics table and its manifest.
+
+        Parameters
+        ----------
+        self : class
+        data_path : str
+            A data path, where the metrics file will be saved.
+        run_id : str
+            ID of the current run.
+        write_always : bool
+            Whether the table should be saved even if the job fails.
+        """
+
+        _out_path = os.path.join(data_path, 'out', 'tables', 'metrics.csv')
+
+        with open(_out_path, 'w') as metrics_file:
+
+            writer = csv.DictWriter(metrics_file,
+                                    self.fields,
+                                    restval='',
+                                    extrasaction='ignore',
+                                    quotechar='"',
+                                    quoting=csv.QUOTE_ALL)
+
+            writer.writeheader()
+            writer.writerows(self.get_rows(run_id))
+
+        _man = {"destination": "out.c-GDUserManagement.metrics",
+                "incremental": True,
+                "delimiter": ","}
+
+        if write_always:
+            _man["write_always"] = True
+
+        with open(_out_path + '.manifest', 'w') as f:
+
+            json.dump(_man, f)
+
+        logging.info("Metrics file saved to %s." % _out_path)
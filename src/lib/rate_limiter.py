@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+
+RATE_LIMIT_READ = 50
+RATE_LIMIT_WRITE = 20
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket, allowing `rate` requests per second on average with bursts of up to `capacity`
+    requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        rate : float
+            Number of tokens added to the bucket every second.
+        capacity : float
+            Maximum number of tokens in the bucket. Defaults to one second worth of tokens.
+        """
+
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(self.rate, 1.0)
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def acquire(self):
+        """
+        A function taking one token from the bucket. If the bucket is empty, the token is reserved and the calling
+        thread sleeps until the reservation is due, hence waiting threads are served in the order of arrival.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        float
+            Number of seconds the calling thread waited.
+        """
+
+        with self._lock:
+
+            _now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (_now - self._updated) * self.rate)
+            self._updated = _now
+
+            self._tokens -= 1
+            _wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if _wait > 0:
+            time.sleep(_wait)
+
+        return _wait
+
+
+class RateLimiter:
+    """
+    A class limiting number of requests per second sent to each host. Reading and writing requests are limited
+    by separate buckets, so that a burst of mutations does not block downloads and vice versa. A single instance
+    is shared by all threads of the client.
+    """
+
+    def __init__(self, read_rate=RATE_LIMIT_READ, write_rate=RATE_LIMIT_WRITE):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        read_rate : float
+            Maximum number of reading requests (GET) per second and host. Value `0` disables the limit.
+        write_rate : float
+            Maximum number of writing requests (POST, PUT, DELETE) per second and host. Value `0` disables the limit.
+        """
+
+        self.rates = {'read': read_rate, 'write': write_rate}
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+        logging.info("Requests are limited to %s reads and %s writes per second." % (read_rate, write_rate))
+
+    @staticmethod
+    def get_endpoint_class(method):
+        """
+        A function classifying a request as reading or writing.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request.
+
+        Returns
+        -------
+        str
+            Either `read` or `write`.
+        """
+
+        return 'read' if method.upper() in READ_METHODS else 'write'
+
+    def acquire(self, host, endpoint_class):
+        """
+        A function blocking until a request to the host is allowed to be sent.
+
+        Parameters
+        ----------
+        self : class
+        host : str
+            Host, to which the request is sent.
+        endpoint_class : str
+            Either `read` or `write`, see `get_endpoint_class`.
+
+        Returns
+        -------
+        float
+            Number of seconds the calling thread waited.
+        """
+
+        _rate = self.rates.get(endpoint_class)
+
+        if not _rate:
+            return 0.0
+
+        _key = (host, endpoint_class)
+
+        with self._lock:
+
+            _bucket = self._buckets.get(_key)
+
+            if _bucket is None:
+                _bucket = TokenBucket(_rate)
+                self._buckets[_key] = _bucket
+
+        return _bucket.acquire()
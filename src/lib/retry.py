@@ -0,0 +1,188 @@
+import datetime
+import random
+import requests
+from email.utils import parsedate_to_datetime
+
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30.0
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+class RetryPolicy:
+    """
+    A class deciding, whether a failed request should be repeated and how long to wait before the next attempt.
+
+    Throttled requests (429) were not processed by the server and are always safe to repeat. Server errors and
+    connection errors are only repeated for idempotent requests, since a non-idempotent request (e.g. creating
+    a user filter) might have been processed before the error occured. The delay is computed using exponential
+    backoff with full jitter, unless the server specifies the delay in the `Retry-After` header.
+    """
+
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, backoff_base=RETRY_BACKOFF_BASE,
+                 backoff_max=RETRY_BACKOFF_MAX):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        max_attempts : int
+            Maximum number of attempts for a single request, including the first one.
+        backoff_base : float
+            Number of seconds, which is exponentially increased with each attempt.
+        backoff_max : float
+            Maximum number of seconds to wait between two attempts.
+        """
+
+        self.max_attempts = max(int(max_attempts), 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @staticmethod
+    def is_idempotent(method, idempotent=None):
+        """
+        A function determining, whether a request can be safely repeated.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request.
+        idempotent : bool
+            Explicit classification of the request. If not provided, the classification is based on the method.
+
+        Returns
+        -------
+        bool
+            Whether the request is idempotent.
+        """
+
+        if idempotent is not None:
+            return idempotent
+
+        return method.upper() in IDEMPOTENT_METHODS
+
+    def should_retry(self, method, status_code, attempt, idempotent=None):
+        """
+        A function determining, whether a request should be repeated based on the status code of the response.
+
+        Parameters
+        ----------
+        self : class
+        method : str
+            HTTP method of the request.
+        status_code : int
+            Status code of the response.
+        attempt : int
+            Number of the attempt, which received the response.
+        idempotent : bool
+            Explicit classification of the request, see `is_idempotent`.
+
+        Returns
+        -------
+        bool
+            Whether the request should be repeated.
+        """
+
+        if attempt >= self.max_attempts or status_code not in RETRY_STATUS_CODES:
+            return False
+
+        if status_code == 429:
+            return True
+
+        return self.is_idempotent(method, idempotent)
+
+    def should_retry_exception(self, method, exception, attempt, idempotent=None):
+        """
+        A function determining, whether a request should be repeated after it raised an exception.
+
+        Parameters
+        ----------
+        self : class
+        method : str
+            HTTP method of the request.
+        exception : Exception
+            An exception raised by the request.
+        attempt : int
+            Number of the attempt, which raised the exception.
+        idempotent : bool
+            Explicit classification of the request, see `is_idempotent`.
+
+        Returns
+        -------
+        bool
+            Whether the request should be repeated.
+        """
+
+        if attempt >= self.max_attempts:
+            return False
+
+        # The connection was not established, hence the request never reached the server.
+        if isinstance(exception, requests.exceptions.ConnectTimeout):
+            return True
+
+        if isinstance(exception, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return self.is_idempotent(method, idempotent)
+
+        return False
+
+    def get_delay(self, attempt, retry_after=None):
+        """
+        A function returning number of seconds to wait before the next attempt.
+
+        Parameters
+        ----------
+        self : class
+        attempt : int
+            Number of the attempt, which failed.
+        retry_after : str
+            Value of the `Retry-After` header, if it was present in the response.
+
+        Returns
+        -------
+        float
+            Number of seconds to wait.
+        """
+
+        _retry_after = self.parse_retry_after(retry_after)
+
+        if _retry_after is not None:
+            return min(_retry_after, self.backoff_max)
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def parse_retry_after(retry_after):
+        """
+        A function parsing the `Retry-After` header, which contains either number of seconds or an HTTP date.
+
+        Parameters
+        ----------
+        retry_after : str
+            Value of the header.
+
+        Returns
+        -------
+        float
+            Number of seconds to wait or `None`, if the header is missing or could not be parsed.
+        """
+
+        if not retry_after:
+            return None
+
+        try:
+            return max(float(retry_after), 0.0)
+
+        except ValueError:
+            pass
+
+        try:
+            _date = parsedate_to_datetime(retry_after)
+
+        except (TypeError, ValueError):
+            return None
+
+        _now = datetime.datetime.now(_date.tzinfo or datetime.timezone.utc)
+
+        return max((_date - _now).total_seconds(), 0.0)
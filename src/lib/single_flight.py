@@ -0,0 +1,100 @@
+import threading
+
+
+class _Call:
+    """
+    A single in-flight call, shared by all threads requesting the same key.
+    """
+
+    def __init__(self):
+
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    A class coalescing concurrent calls with the same key into a single call.
+
+    The first thread requesting a key executes the call, while threads requesting the same key in the meantime
+    wait for it and receive the same result, or the same exception. Results are not kept after the call finishes,
+    hence a later request with the same key executes the call again.
+    """
+
+    def __init__(self, metrics=None):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        metrics : MetricsCollector
+            A collector, to which number of shared calls is reported.
+        """
+
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        A function executing the callable, unless a call with the same key is already in flight, in which case
+        the result of that call is returned.
+
+        Parameters
+        ----------
+        self : class
+        key : tuple
+            A key identifying the call, e.g. name of the resource and its URI.
+        func : callable
+            A function to be executed.
+        *args, **kwargs
+            Arguments passed to the function.
+
+        Returns
+        -------
+        any
+            Return value of the function.
+
+        Raises
+        ------
+        BaseException
+            Any exception raised by the function, re-raised in all waiting threads.
+        """
+
+        with self._lock:
+
+            _call = self._calls.get(key)
+            _leader = _call is None
+
+            if _leader:
+                _call = _Call()
+                self._calls[key] = _call
+
+        if not _leader:
+
+            if self.metrics is not None:
+                self.metrics.increment('single_flight.' + str(key[0]))
+
+            _call.done.wait()
+
+        else:
+
+            try:
+                _call.result = func(*args, **kwargs)
+
+            except BaseException as e:
+                _call.error = e
+
+            finally:
+
+                with self._lock:
+                    del self._calls[key]
+
+                _call.done.set()
+
+        if _call.error is not None:
+            raise _call.error
+
+        return _call.result
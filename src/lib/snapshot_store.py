@@ -0,0 +1,138 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+
+SNAPSHOT_FILE = 'gd_snapshots.json'
+SNAPSHOT_TAG = 'gd_snapshots'
+
+
+class SnapshotStore:
+    """
+    A store of responses saved for revalidation by the next run, see `clientGoodDataKeboola._get_conditional`.
+
+    Bodies of the responses contain e-mails of users, hence they're not saved to the state of the configuration.
+    The state only holds validators of the responses (`ETag`, `Last-Modified`) with a digest of each body, while
+    the bodies are saved to an output file tagged `gd_snapshots`. The file is seeded from input files with the same
+    name; a saved response is only used, if its body matches the digest in the state.
+    """
+
+    def __init__(self, data_path, tags=None):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        data_path : str
+            A data path of the component.
+        tags : list
+            Additional tags of the output file.
+        """
+
+        self.path = os.path.join(data_path, 'out', 'files', SNAPSHOT_FILE)
+        self.tags = [SNAPSHOT_TAG] + (tags or [])
+
+        _seeds = sorted(glob.glob(os.path.join(data_path, 'in', 'files', '*' + SNAPSHOT_FILE)),
+                        key=os.path.getmtime)
+        self.seed = _seeds[-1] if _seeds else None
+
+    @staticmethod
+    def get_digest(body):
+        """
+        A function returning a digest of a saved response.
+
+        Parameters
+        ----------
+        body : dict
+            Headers and json of the response.
+
+        Returns
+        -------
+        str
+            A hexadecimal SHA-1 digest of the response.
+        """
+
+        return hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def load(self, validators):
+        """
+        A function joining validators from the state with bodies saved to the input file.
+
+        Parameters
+        ----------
+        self : class
+        validators : dict
+            A dictionary with URI of the request as a key and validators of the response as a value, see `save`.
+
+        Returns
+        -------
+        dict
+            Saved responses, see `clientGoodDataKeboola.get_snapshots`. Responses without a matching body are
+            not returned.
+        """
+
+        if not validators:
+            return {}
+
+        if self.seed is None:
+            logging.info("File %s is not among input files, saved responses will be downloaded again."
+                         % SNAPSHOT_FILE)
+            return {}
+
+        try:
+            with open(self.seed) as f:
+                _bodies = json.load(f)
+
+        except (OSError, ValueError) as e:
+            logging.warning("Saved responses could not be read, they will be downloaded again. %s" % e)
+            return {}
+
+        _snapshots = {}
+
+        for _key, _validator in validators.items():
+
+            _body = _bodies.get(_key)
+
+            if _body is not None and self.get_digest(_body) == _validator.get('digest'):
+                _snapshots[_key] = {'etag': _validator.get('etag'),
+                                    'last_modified': _validator.get('last_modified'),
+                                    'size': _validator.get('size', 0),
+                                    'headers': _body['headers'],
+                                    'json': _body['json']}
+
+        logging.info("Loaded %s of %s responses saved by the previous run." % (len(_snapshots), len(validators)))
+
+        return _snapshots
+
+    def save(self, snapshots):
+        """
+        A function writing bodies of the responses and the manifest of the output file.
+
+        Parameters
+        ----------
+        self : class
+        snapshots : dict
+            Responses to be saved, see `clientGoodDataKeboola.get_snapshots`.
+
+        Returns
+        -------
+        dict
+            A dictionary with URI of the request as a key and validators of the response as a value, which are
+            saved to the state.
+        """
+
+        _bodies = {k: {'headers': s['headers'], 'json': s['json']} for k, s in snapshots.items()}
+
+        with open(self.path, 'w') as f:
+            json.dump(_bodies, f)
+
+        with open(self.path + '.manifest', 'w') as f:
+            json.dump({'is_permanent': False, 'tags': self.tags}, f)
+
+        logging.info("Saved responses written to %s." % self.path)
+
+        return {k: {'etag': s['etag'],
+                    'last_modified': s['last_modified'],
+                    'size': s['size'],
+                    'digest': self.get_digest(_bodies[k])} for k, s in snapshots.items()}
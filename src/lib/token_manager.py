@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+
+TT_TOKEN_LIFETIME = 600
+TT_TOKEN_REFRESH_MARGIN = 60
+
+
+class TokenManager:
+    """
+    A class caching the GoodData TT token for its whole lifetime.
+
+    GoodData TT tokens are valid for 10 minutes. The token is re-used by all requests until it's about to expire
+    or until it's rejected by the API, after which a new token is minted. The manager is safe to share between
+    threads; only one thread mints a new token while the others wait for it.
+    """
+
+    def __init__(self, mint_function, lifetime=TT_TOKEN_LIFETIME, refresh_margin=TT_TOKEN_REFRESH_MARGIN):
+        """
+        Init function.
+
+        Parameters
+        ----------
+        mint_function : callable
+            A function without arguments, which obtains a new TT token from GoodData.
+        lifetime : int
+            Number of seconds the token is considered valid after it was minted.
+        refresh_margin : int
+            Number of seconds before the expiration, when the token is refreshed ahead of time.
+        """
+
+        self._mint_function = mint_function
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self.refresh_count = 0
+
+    def get_token(self):
+        """
+        A function returning a valid TT token. A new token is minted, if there's no token or it's about to expire.
+
+        Parameters
+        ----------
+        self : class
+
+        Returns
+        -------
+        str
+            A TT token.
+        """
+
+        with self._lock:
+
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                self._refresh()
+
+            return self._token
+
+    def invalidate(self, token=None):
+        """
+        A function discarding the cached token, e.g. when it was rejected by the API.
+
+        Parameters
+        ----------
+        self : class
+        token : str
+            The token, which was rejected. If another thread has already refreshed the token in the meantime,
+            the fresh token is kept. If not provided, the cached token is always discarded.
+        """
+
+        with self._lock:
+
+            if token is None or token == self._token:
+                logging.debug("TT token was invalidated.")
+                self._token = None
+
+    def _refresh(self):
+        """
+        A function minting a new token. Must be called with the lock acquired.
+
+        Parameters
+        ----------
+        self : class
+        """
+
+        self._token = self._mint_function()
+        self._expires_at = time.monotonic() + self.lifetime
+        self.refresh_count += 1
+
+        logging.debug("TT token was refreshed, refresh no. %s." % self.refresh_count)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules of the component import each other as `lib.*`, the same way as when `src/main.py` is executed.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
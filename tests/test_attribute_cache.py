@@ -0,0 +1,74 @@
+import unittest
+
+from lib.attribute_cache import AttributeCache
+from lib.compact_element_index import CompactElementIndex
+from lib.metrics import MetricsCollector
+
+PREFIX = '/gdc/md/pid/obj/101/elements?id='
+
+
+def make_values(count):
+
+    return CompactElementIndex(('value %s' % i, PREFIX + str(i)) for i in range(count))
+
+
+class TestAttributeCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.metrics = MetricsCollector()
+        self.cache = AttributeCache(max_elements=10, metrics=self.metrics)
+
+    def test_get(self):
+
+        self.cache.put('a', make_values(3))
+        self.cache.put(('b', 'title'), None)
+        self.cache.put('c', False)
+
+        self.assertEqual(self.cache.get('a')[0], True)
+        self.assertEqual(self.cache.get(('b', 'title')), (True, None))
+        self.assertEqual(self.cache.get('c'), (True, False))
+        self.assertEqual(self.cache.get('d'), (False, None))
+        self.assertEqual(self.cache.size, 5)
+        self.assertEqual(self.metrics.get_counter('attribute_cache.hit'), 3)
+        self.assertEqual(self.metrics.get_counter('attribute_cache.miss'), 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+
+        self.cache.put('a', make_values(4))
+        self.cache.put('b', make_values(4))
+        self.cache.get('a')
+        self.cache.put('c', make_values(4))
+
+        self.assertEqual(self.cache.get('b'), (False, None))
+        self.assertTrue(self.cache.get('a')[0])
+        self.assertTrue(self.cache.get('c')[0])
+        self.assertEqual(self.cache.size, 8)
+        self.assertEqual(self.metrics.get_counter('attribute_cache.eviction'), 1)
+
+    def test_replaced_entry_is_weighted_once(self):
+
+        self.cache.put('a', make_values(4))
+        self.cache.put('a', make_values(6))
+
+        self.assertEqual(self.cache.size, 6)
+        self.assertEqual(len(self.cache.get('a')[1]), 6)
+
+    def test_oversized_entry_is_kept_alone(self):
+
+        self.cache.put('a', make_values(4))
+        self.cache.put('b', make_values(25))
+
+        self.assertEqual(self.cache.get('a'), (False, None))
+        self.assertEqual(len(self.cache.get('b')[1]), 25)
+        self.assertEqual(self.metrics.get_counter('attribute_cache.oversized'), 1)
+
+        self.cache.put('c', make_values(30))
+
+        self.assertEqual(self.cache.get('b'), (False, None))
+        self.assertTrue(self.cache.get('c')[0])
+
+        self.cache.put('d', make_values(2))
+
+        self.assertEqual(self.cache.get('c'), (False, None))
+        self.assertEqual(self.cache.size, 2)
@@ -0,0 +1,158 @@
+import asyncio
+import unittest
+
+from lib.batcher import AsyncBatcher, BatcherGroup
+
+
+class Recorder:
+
+    def __init__(self, error=None):
+
+        self.batches = []
+        self.error = error
+
+    async def flush(self, items):
+
+        self.batches += [list(items)]
+
+        if self.error is not None:
+            raise self.error
+
+        return [i * 10 for i in items]
+
+
+class TestAsyncBatcher(unittest.TestCase):
+
+    def test_full_batch_is_processed_immediately(self):
+
+        _recorder = Recorder()
+
+        async def run():
+
+            _batcher = AsyncBatcher(_recorder.flush, batch_size=3, max_delay=60)
+            return await asyncio.wait_for(asyncio.gather(*[_batcher.submit(i) for i in range(6)]), 5)
+
+        self.assertEqual(asyncio.run(run()), [0, 10, 20, 30, 40, 50])
+        self.assertEqual(_recorder.batches, [[0, 1, 2], [3, 4, 5]])
+
+    def test_partial_batch_is_processed_after_delay(self):
+
+        _recorder = Recorder()
+
+        async def run():
+
+            _batcher = AsyncBatcher(_recorder.flush, batch_size=10, max_delay=0.01)
+            return await asyncio.wait_for(asyncio.gather(*[_batcher.submit(i) for i in range(4)]), 5)
+
+        self.assertEqual(asyncio.run(run()), [0, 10, 20, 30])
+        self.assertEqual(_recorder.batches, [[0, 1, 2, 3]])
+
+    def test_exception_is_propagated_to_all_items(self):
+
+        _recorder = Recorder(ValueError('boom'))
+
+        async def run():
+
+            _batcher = AsyncBatcher(_recorder.flush, batch_size=2, max_delay=60)
+            return await asyncio.gather(*[_batcher.submit(i) for i in range(2)], return_exceptions=True)
+
+        _results = asyncio.run(run())
+
+        self.assertEqual(len(_results), 2)
+        self.assertTrue(all(isinstance(r, ValueError) for r in _results))
+
+
+class TestBatcherGroup(unittest.TestCase):
+
+    @staticmethod
+    async def worker(group, batcher, item):
+
+        group.start()
+
+        try:
+            # Workers of the component await other requests, before they submit an item to a batch.
+            await asyncio.sleep(0)
+            return await batcher.submit(item)
+
+        finally:
+            group.finish()
+
+    def test_single_worker_does_not_wait(self):
+
+        _recorder = Recorder()
+
+        async def run():
+
+            _group = BatcherGroup()
+            _batcher = AsyncBatcher(_recorder.flush, batch_size=50, max_delay=60, group=_group)
+
+            return [await asyncio.wait_for(self.worker(_group, _batcher, i), 5) for i in range(3)]
+
+        self.assertEqual(asyncio.run(run()), [0, 10, 20])
+        self.assertEqual(_recorder.batches, [[0], [1], [2]])
+
+    def test_batch_is_processed_once_all_workers_wait(self):
+
+        _recorder = Recorder()
+
+        async def run():
+
+            _group = BatcherGroup()
+            _batcher = AsyncBatcher(_recorder.flush, batch_size=50, max_delay=60, group=_group)
+
+            return await asyncio.wait_for(asyncio.gather(*[self.worker(_group, _batcher, i) for i in range(4)]), 5)
+
+        self.assertEqual(asyncio.run(run()), [0, 10, 20, 30])
+        self.assertEqual(_recorder.batches, [[0, 1, 2, 3]])
+
+    def test_batchers_of_group_are_processed_together(self):
+
+        _first, _second = Recorder(), Recorder()
+
+        async def run():
+
+            _group = BatcherGroup()
+            _batcher_1 = AsyncBatcher(_first.flush, batch_size=50, max_delay=60, group=_group)
+            _batcher_2 = AsyncBatcher(_second.flush, batch_size=50, max_delay=60, group=_group)
+
+            return await asyncio.wait_for(asyncio.gather(self.worker(_group, _batcher_1, 1),
+                                                         self.worker(_group, _batcher_2, 2),
+                                                         self.worker(_group, _batcher_1, 3)), 5)
+
+        self.assertEqual(asyncio.run(run()), [10, 20, 30])
+        self.assertEqual(_first.batches, [[1, 3]])
+        self.assertEqual(_second.batches, [[2]])
+
+    def test_busy_worker_keeps_batch_open(self):
+
+        _recorder = Recorder()
+
+        async def run():
+
+            _group = BatcherGroup()
+            _batcher = AsyncBatcher(_recorder.flush, batch_size=50, max_delay=60, group=_group)
+            _busy = asyncio.Event()
+
+            async def busy_worker():
+
+                _group.start()
+
+                try:
+                    await _busy.wait()
+                    return await _batcher.submit(2)
+
+                finally:
+                    _group.finish()
+
+            _tasks = [asyncio.ensure_future(self.worker(_group, _batcher, 1)), asyncio.ensure_future(busy_worker())]
+            await asyncio.sleep(0.01)
+
+            self.assertEqual(_recorder.batches, [])
+            self.assertEqual(_batcher.pending, 1)
+
+            _busy.set()
+
+            return await asyncio.wait_for(asyncio.gather(*_tasks), 5)
+
+        self.assertEqual(asyncio.run(run()), [10, 20])
+        self.assertEqual(_recorder.batches, [[1, 2]])
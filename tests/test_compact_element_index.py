@@ -0,0 +1,135 @@
+import unittest
+
+from lib import compact_element_index
+from lib.compact_element_index import CompactElementIndex, CompactElementIndexBuilder
+
+PREFIX = '/gdc/md/pid/obj/101/elements?id='
+
+
+class TestCompactElementIndex(unittest.TestCase):
+
+    def test_get(self):
+
+        _index = CompactElementIndex([('b', PREFIX + '2'), ('a', PREFIX + '1'), ('c', PREFIX + '3')])
+
+        self.assertEqual(len(_index), 3)
+        self.assertEqual(_index.prefix, PREFIX)
+        self.assertEqual(_index.get('a'), PREFIX + '1')
+        self.assertEqual(_index['c'], PREFIX + '3')
+        self.assertIn('b', _index)
+
+    def test_missing_title(self):
+
+        _index = CompactElementIndex([('b', PREFIX + '2'), ('d', PREFIX + '4')])
+
+        for _title in ('', 'a', 'c', 'e', 'bb'):
+            self.assertIsNone(_index.get(_title))
+            self.assertNotIn(_title, _index)
+
+        self.assertEqual(_index.get('c', 'default'), 'default')
+
+        with self.assertRaises(KeyError):
+            _index['c']
+
+    def test_title_not_string(self):
+
+        _index = CompactElementIndex([('2019', PREFIX + '1'), ('b', PREFIX + '2'), ('c', 'not an element uri')])
+
+        for _title in (2019, 2019.0, None, True, ['b'], {'b': 1}):
+            self.assertIsNone(_index.get(_title))
+            self.assertNotIn(_title, _index)
+
+        self.assertEqual(_index.get(2019, 'default'), 'default')
+
+    def test_empty(self):
+
+        _index = CompactElementIndex()
+
+        self.assertEqual(len(_index), 0)
+        self.assertIsNone(_index.get('a'))
+        self.assertEqual(list(_index.items()), [])
+
+    def test_unicode_titles(self):
+
+        _titles = ['Žilina', 'Zlín', 'Ústí', 'Brno', '北京', 'émoji 🙂', '']
+        _index = CompactElementIndex((t, PREFIX + str(i)) for i, t in enumerate(_titles))
+
+        for _i, _title in enumerate(_titles):
+            self.assertEqual(_index[_title], PREFIX + str(_i))
+
+    def test_titles_sharing_prefix(self):
+
+        _titles = ['a', 'ab', 'abc', 'abd', 'b', 'ba']
+        _index = CompactElementIndex((t, PREFIX + str(i)) for i, t in enumerate(reversed(_titles)))
+
+        self.assertEqual([t for t, _ in _index.items()], _titles)
+        self.assertEqual(_index['ab'], PREFIX + '4')
+
+    def test_last_duplicate_wins(self):
+
+        _index = CompactElementIndex([('a', PREFIX + '1'), ('b', PREFIX + '2'), ('a', PREFIX + '3')])
+
+        self.assertEqual(len(_index), 2)
+        self.assertEqual(_index['a'], PREFIX + '3')
+
+    def test_uris_without_common_prefix(self):
+
+        _other = '/gdc/md/pid/obj/202/elements?id=7'
+        _index = CompactElementIndex([('a', PREFIX + '1'), ('b', _other), ('c', 'not an element uri')])
+
+        self.assertEqual(len(_index), 3)
+        self.assertEqual(_index['a'], PREFIX + '1')
+        self.assertEqual(_index['b'], _other)
+        self.assertEqual(_index['c'], 'not an element uri')
+        self.assertEqual(dict(_index.items()), {'a': PREFIX + '1', 'b': _other, 'c': 'not an element uri'})
+
+    def test_duplicate_with_and_without_common_prefix(self):
+
+        _other = '/gdc/md/pid/obj/202/elements?id=7'
+
+        _index = CompactElementIndex([('a', PREFIX + '1'), ('a', _other)])
+        self.assertEqual(len(_index), 1)
+        self.assertEqual(_index['a'], _other)
+
+        _index = CompactElementIndex([('a', PREFIX + '1'), ('a', _other), ('a', PREFIX + '3')])
+        self.assertEqual(len(_index), 1)
+        self.assertEqual(_index['a'], PREFIX + '3')
+
+
+class TestCompactElementIndexBuilder(unittest.TestCase):
+
+    def setUp(self):
+
+        self._chunk_size = compact_element_index.BUILDER_CHUNK_SIZE
+        compact_element_index.BUILDER_CHUNK_SIZE = 7
+
+    def tearDown(self):
+
+        compact_element_index.BUILDER_CHUNK_SIZE = self._chunk_size
+
+    def test_pages_are_merged(self):
+
+        _builder = CompactElementIndexBuilder()
+        _expected = {}
+
+        for _page in range(5):
+
+            _items = [('title %s' % ((_page * 13 + i) % 40), PREFIX + str(_page * 100 + i)) for i in range(13)]
+            _builder.add(_items)
+            _expected.update(_items)
+
+        _index = CompactElementIndex(_builder)
+
+        self.assertEqual(len(_index), len(_expected))
+        self.assertEqual(dict(_index.items()), _expected)
+
+        for _title, _uri in _expected.items():
+            self.assertEqual(_index[_title], _uri)
+
+    def test_single_iterable_is_split_to_chunks(self):
+
+        _items = [('t%03d' % (i % 25), PREFIX + str(i)) for i in range(60)]
+        _builder = CompactElementIndexBuilder().add(iter(_items))
+
+        self.assertGreater(len(_builder._chunks), 1)
+        self.assertEqual(dict(CompactElementIndex(_builder).items()), dict(_items))
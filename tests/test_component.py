@@ -0,0 +1,386 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import types
+import unittest
+
+from lib.batcher import BatcherGroup
+from lib.compact_element_index import CompactElementIndex
+from lib.element_index import ElementIndex
+from lib.metrics import MetricsCollector
+from lib.component import Component
+from lib.user import User
+
+
+def make_component(**attributes):
+    """
+    Creates the component without reading the configuration, with only the attributes needed by the test.
+    """
+
+    _component = Component.__new__(Component)
+    _component.__dict__.update(attributes)
+
+    return _component
+
+
+class TestProcessUsers(unittest.TestCase):
+
+    def test_rows_of_same_login_are_processed_in_order(self):
+
+        _processed = []
+
+        async def process_user(user):
+            await asyncio.sleep(0.01 if user.role == 'first' else 0)
+            _processed.append((user.login, user.role))
+
+        async def run():
+
+            _queue = asyncio.Queue()
+            _login_locks = {}
+
+            for _login, _role in (('a', 'first'), ('a', 'second'), ('b', 'first'), ('a', 'third')):
+                _queue.put_nowait(User(_login, _role, '[]', 'ENABLE', '', ''))
+
+            for _ in range(3):
+                _queue.put_nowait(None)
+
+            _component = make_component(_batcher_group=BatcherGroup(), process_user=process_user)
+            await asyncio.gather(*[_component._process_users(_queue, _login_locks) for _ in range(3)])
+
+            return _login_locks
+
+        _login_locks = asyncio.run(run())
+
+        self.assertEqual([r for _login, r in _processed if _login == 'a'], ['first', 'second', 'third'])
+        self.assertIn(('b', 'first'), _processed)
+        self.assertEqual(_login_locks, {})
+
+
+class TestCompileMufExpression(unittest.TestCase):
+
+    ATTRIBUTE_URI = '/gdc/md/pid/obj/100'
+    ELEMENTS_PREFIX = '/gdc/md/pid/obj/101/elements?id='
+
+    def make_component(self):
+
+        _values = CompactElementIndex([('2019', self.ELEMENTS_PREFIX + '1'), ('2020', self.ELEMENTS_PREFIX + '2')])
+
+        return make_component(_bootstrap={'attributes': {'attr.year': {'uri': self.ATTRIBUTE_URI}}},
+                              get_attribute_values=lambda attribute_uri, titles=None: _values)
+
+    def test_values_not_strings_are_missing(self):
+
+        _component = self.make_component()
+
+        for _value in (2019, None, 2019.0):
+            self.assertEqual(_component._compile_muf_expression([{'attribute': 'attr.year', 'value': [_value],
+                                                                  'operator': '='}]),
+                             (False, "Attribute attr.year has no value %s." % _value, True))
+
+    def test_expression(self):
+
+        _status, _expressions, _ = self.make_component()._compile_muf_expression(
+            [{'attribute': 'attr.year', 'value': ['2019', '2020'], 'operator': 'IN'}])
+
+        self.assertTrue(_status)
+        self.assertEqual(_expressions, ['[{0}] IN ([{1}1],[{1}2])'.format(self.ATTRIBUTE_URI, self.ELEMENTS_PREFIX)])
+
+
+class TestCreateMufExpression(unittest.TestCase):
+
+    def setUp(self):
+
+        self.compiled = []
+        self.results = []
+
+        def compile_muf_expression(muf_json):
+            self.compiled += [muf_json]
+            return self.results.pop(0) if self.results else (True, ['expression'], True)
+
+        self.component = make_component(client=types.SimpleNamespace(metrics=MetricsCollector()),
+                                        _muf_expressions={}, _muf_expressions_lock=threading.Lock(),
+                                        _compile_muf_expression=compile_muf_expression)
+
+    def test_canonical_form(self):
+
+        _muf = [{'attribute': 'b', 'value': ['y', 'x'], 'operator': ' not   in'},
+                {'attribute': 'a', 'value': ['z'], 'operator': '='},
+                'not a filter']
+
+        self.assertEqual(Component._canonicalize_muf(_muf),
+                         ['not a filter',
+                          {'attribute': 'a', 'value': ['z'], 'operator': '='},
+                          {'attribute': 'b', 'value': ['x', 'y'], 'operator': 'NOT IN'}])
+        self.assertEqual(Component._canonicalize_muf({'attribute': 'a'}), {'attribute': 'a'})
+
+    def test_equivalent_mufs_are_compiled_once(self):
+
+        _mufs = ['[{"attribute": "a", "value": ["x", "y"], "operator": "IN"}]',
+                 '[{"operator": "in", "value": ["y", "x"], "attribute": "a"}]',
+                 '[{"attribute": "a", "value": ["x", "y"], "operator": "IN"}]']
+
+        for _muf in _mufs:
+            self.assertEqual(self.component.create_muf_expression(_muf), (True, ['expression']))
+
+        self.assertEqual(self.compiled, [[{'attribute': 'a', 'value': ['x', 'y'], 'operator': 'IN'}]])
+        self.assertEqual(self.component.client.metrics.get_counter('muf_expression.miss'), 1)
+        self.assertEqual(self.component.client.metrics.get_counter('muf_expression.hit'), 2)
+
+    def test_invalid_json_is_cached(self):
+
+        _status, _error = self.component.create_muf_expression('[{')
+
+        self.assertFalse(_status)
+        self.assertIsInstance(_error, ValueError)
+        self.assertIs(self.component.create_muf_expression('[{')[1], _error)
+        self.assertEqual(self.compiled, [])
+
+    def test_failed_download_is_not_cached(self):
+
+        _muf = '[{"attribute": "a", "value": ["x"], "operator": "="}]'
+        self.results = [(False, 'Could not obtain values for attribute a', False)]
+
+        self.assertEqual(self.component.create_muf_expression(_muf), (False, 'Could not obtain values for attribute a'))
+        self.assertEqual(self.component.create_muf_expression(_muf), (True, ['expression']))
+        self.assertEqual(len(self.compiled), 2)
+
+
+class TestFindUserFilter(unittest.TestCase):
+
+    EXPRESSION = '[/gdc/md/pid/obj/100] = [/gdc/md/pid/obj/100/elements?id=1]'
+
+    def setUp(self):
+
+        self.data_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.data_path, 'out', 'files'))
+
+        self.objects = {}
+        self.downloaded = []
+
+        def get_objects(uris):
+            self.downloaded += list(uris)
+            return [{'userFilter': {'meta': {'uri': u}, 'content': {'expression': self.objects[u]}}} for u in uris]
+
+        self.client = types.SimpleNamespace(metrics=MetricsCollector(), _GD_get_objects=get_objects)
+        self.element_index = ElementIndex(self.data_path, metrics=self.client.metrics)
+
+    def tearDown(self):
+
+        self.element_index.close()
+        shutil.rmtree(self.data_path)
+
+    def find(self, updated):
+
+        _digest = Component._get_muf_digest(self.EXPRESSION)
+        _component = make_component(client=self.client, element_index=self.element_index,
+                                    _bootstrap={'user_filters': {_digest: {'/obj/1': updated}}})
+
+        return _component._find_user_filter(self.EXPRESSION)
+
+    def test_expression_is_downloaded_once(self):
+
+        self.objects['/obj/1'] = self.EXPRESSION
+
+        self.assertEqual(self.find('2020-01-01 00:00:00'), '/obj/1')
+        self.assertEqual(self.find('2020-01-01 00:00:00'), '/obj/1')
+        self.assertEqual(self.downloaded, ['/obj/1'])
+
+    def test_updated_object_is_downloaded_again(self):
+
+        self.objects['/obj/1'] = self.EXPRESSION
+        self.assertEqual(self.find('2020-01-01 00:00:00'), '/obj/1')
+
+        self.objects['/obj/1'] = '[/gdc/md/pid/obj/100] = [/gdc/md/pid/obj/100/elements?id=2]'
+
+        self.assertIsNone(self.find('2021-01-01 00:00:00'))
+        self.assertEqual(self.downloaded, ['/obj/1', '/obj/1'])
+        self.assertEqual(self.client.metrics.get_counter('element_index.user_filter_stale'), 1)
+
+
+class StatusLog:
+
+    def __init__(self):
+
+        self.rows = []
+
+    def make_log(self, login, action, success, role, details, muf, *args, **kwargs):
+
+        self.rows += [(login, action, success, details)]
+
+
+class TestGetAllAttributes(unittest.TestCase):
+
+    URIS = {'attr.region': '/gdc/md/pid/obj/100', 'label.region': '/gdc/md/pid/obj/101'}
+
+    def make_component(self, objects):
+
+        _client = types.SimpleNamespace(
+            _GD_get_uris_by_identifiers=lambda identifiers: {i: self.URIS[i] for i in identifiers if i in self.URIS},
+            _GD_get_objects=lambda uris: objects,
+            _GD_get_attributes=lambda: {'query': {'entries': [{'identifier': 'attr.all', 'link': '/obj/1'}]}})
+
+        return make_component(client=_client, log=StatusLog(), resolve_attributes_by_identifier=True, _bootstrap={})
+
+    def test_objects_other_than_attributes_are_missing(self):
+
+        _component = self.make_component([{'attribute': {'meta': {'uri': '/gdc/md/pid/obj/100'}}},
+                                          {'attributeDisplayForm': {'meta': {'uri': '/gdc/md/pid/obj/101'}}}])
+
+        with self.assertLogs(level='WARNING'):
+            _component._get_all_attributes({'attr.region', 'label.region', 'attr.missing'})
+
+        self.assertEqual(_component.attributes, {'attr.region': {'identifier': 'attr.region',
+                                                                 'uri': '/gdc/md/pid/obj/100'}})
+
+    def test_all_attributes_are_listed_if_objects_are_not_obtained(self):
+
+        _component = self.make_component(None)
+        _component._get_all_attributes({'attr.region'})
+
+        self.assertEqual(list(_component.attributes), ['attr.all'])
+
+
+class AsyncClient:
+    """
+    Answers batch requests with the given responses and records them in `sent`.
+    """
+
+    def __init__(self, responses):
+
+        self.responses = responses
+        self.sent = []
+
+    def __getattr__(self, name):
+
+        async def request(*args):
+            self.sent += [(name, args)]
+            return self.responses.pop(0)
+
+        return request
+
+    @staticmethod
+    def last_attempts():
+
+        return 1
+
+
+class TestAssignMufs(unittest.TestCase):
+
+    ASSIGNMENTS = [('/gdc/account/profile/aaa', ['/muf/1']), ('/gdc/account/profile/bbb', ['/muf/2'])]
+
+    def assign(self, *responses):
+
+        _component = make_component(async_client=AsyncClient(list(responses)))
+
+        return asyncio.run(_component._assign_mufs(self.ASSIGNMENTS))
+
+    def test_failures_are_matched_to_users(self):
+
+        _failure = {'user': 'https://secure.gooddata.com/gdc/account/profile/BBB/', 'reason': 'boom'}
+        _results = self.assign((200, {'userFiltersUpdateResult': {'successful': ['/gdc/account/profile/aaa'],
+                                                                  'failed': [_failure]}}))
+
+        self.assertEqual(_results, [(True, '', 1), (False, _failure, 1)])
+
+    def test_unmatched_failure_fails_whole_batch(self):
+
+        for _failure in ({'reason': 'boom'}, {'user': '/gdc/account/profile/ccc'}, None):
+
+            with self.assertLogs(level='WARNING'):
+                _results = self.assign((200, {'userFiltersUpdateResult': {'failed': [_failure]}}))
+
+            self.assertEqual([r[0] for r in _results], [False, False])
+
+    def test_missing_result_fails_whole_batch(self):
+
+        self.assertEqual([r[0] for r in self.assign((200, {}))], [False, False])
+
+    def test_failed_request_fails_whole_batch(self):
+
+        self.assertEqual(self.assign((400, {'error': 'boom'})), [(False, {'error': 'boom'}, 1)] * 2)
+
+
+class TestUpdateProjectUsers(unittest.TestCase):
+
+    UPDATES = [('/gdc/account/profile/aaa', 'DISABLED', None),
+               ('/gdc/account/profile/bbb', 'ENABLED', '/gdc/projects/pid/roles/2')]
+
+    def update(self, *responses):
+
+        _component = make_component(async_client=AsyncClient(list(responses)))
+
+        return asyncio.run(_component._update_project_users(self.UPDATES))
+
+    def test_failures_are_matched_to_users(self):
+
+        _failure = {'user': '/gdc/account/profile/aaa', 'message': 'User is not in the project.'}
+        _results = self.update((200, {'projectUsersUpdateResult': {'successful': ['/gdc/account/profile/bbb'],
+                                                                   'failed': [_failure]}}))
+
+        self.assertEqual(_results, [(False, _failure, 1), (True, '', 1)])
+
+    def test_unmatched_failure_fails_whole_batch(self):
+
+        with self.assertLogs(level='WARNING'):
+            _results = self.update((200, {'projectUsersUpdateResult': {'failed': [{'message': 'boom'}]}}))
+
+        self.assertEqual([r[0] for r in _results], [False, False])
+
+    def test_missing_result_fails_whole_batch(self):
+
+        self.assertEqual([r[0] for r in self.update((200, {'projectUsersUpdateResult': None}))], [False, False])
+
+
+class InvitationsClient(AsyncClient):
+    """
+    Rejects invitations containing any e-mail starting with `invalid`.
+    """
+
+    async def _GD_invite_users(self, emails, role_uri, muf):
+
+        self.sent += [list(emails)]
+
+        if any(e.startswith('invalid') for e in emails):
+            return 400, {'error': {'message': 'Invalid e-mail.'}}
+
+        return 200, {'createdInvitations': {'uri': [], 'loginsAlreadyInProject': [e for e in emails
+                                                                                  if e.startswith('member')]}}
+
+
+class TestInviteUsers(unittest.TestCase):
+
+    def invite(self, emails):
+
+        self.async_client = InvitationsClient([])
+        _component = make_component(async_client=self.async_client,
+                                    client=types.SimpleNamespace(metrics=MetricsCollector()))
+
+        return asyncio.run(_component._invite_users('/gdc/projects/pid/roles/2', [], emails))
+
+    def test_batch(self):
+
+        _results = self.invite(['a@x.com', 'member@x.com', 'b@x.com'])
+
+        self.assertEqual([r[0] for r in _results], [True, False, True])
+        self.assertEqual(_results[1][1], {'createdInvitations': {'loginsAlreadyInProject': ['member@x.com']}})
+        self.assertEqual(len(self.async_client.sent), 1)
+
+    def test_invalid_email_fails_only_its_user(self):
+
+        _emails = ['a@x.com', 'b@x.com', 'invalid@x', 'c@x.com', 'member@x.com', 'd@x.com', 'invalid2@x']
+        _results = self.invite(_emails)
+
+        self.assertEqual([r[0] for r in _results], [True, True, False, True, False, True, False])
+        self.assertIn('please check the email address', _results[2][1])
+        self.assertEqual(sorted(e for b in self.async_client.sent if len(b) == 1 for e in b
+                                if e.startswith('invalid')), ['invalid2@x', 'invalid@x'])
+        self.assertLess(len(self.async_client.sent), 2 * len(_emails))
+
+    def test_single_invalid_email(self):
+
+        _results = self.invite(['invalid@x'])
+
+        self.assertEqual([r[0] for r in _results], [False])
+        self.assertEqual(len(self.async_client.sent), 1)
@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from lib.concurrency_controller import AIMDController, AIMDLimiter
+
+
+class TestAIMDLimiter(unittest.TestCase):
+
+    def test_additive_increase(self):
+
+        _limiter = AIMDLimiter('test', initial=2, maximum=10)
+
+        for _ in range(2):
+            _limiter.release(_limiter.acquire(), 200)
+
+        self.assertAlmostEqual(_limiter.limit, 2.0 + 1 / 2.0 + 1 / 2.5)
+        self.assertEqual(_limiter.in_flight, 0)
+
+    def test_increase_is_capped(self):
+
+        _limiter = AIMDLimiter('test', initial=2, maximum=3)
+
+        for _ in range(50):
+            _limiter.release(_limiter.acquire(), 200)
+
+        self.assertEqual(_limiter.limit, 3.0)
+        self.assertEqual(_limiter.peak_limit, 3.0)
+
+    def test_multiplicative_decrease(self):
+
+        _limiter = AIMDLimiter('test', initial=8, minimum=1)
+
+        for _status_code in (429, 503, None):
+            _limiter.release(_limiter.acquire(), _status_code)
+
+        self.assertEqual(_limiter.limit, 1.0)
+        self.assertEqual(_limiter.decreases, 3)
+
+        _limiter.release(_limiter.acquire(), 429)
+        self.assertEqual(_limiter.limit, 1.0)
+
+    def test_latency_spike_decreases_limit(self):
+
+        _limiter = AIMDLimiter('test', initial=8, latency_threshold=5.0)
+        _limiter.release(_limiter.acquire() - 10.0, 200)
+
+        self.assertEqual(_limiter.limit, 4.0)
+
+    def test_congestion_is_counted_once_per_window(self):
+
+        _limiter = AIMDLimiter('test', initial=8)
+        _started = [_limiter.acquire() for _ in range(4)]
+
+        for _s in _started:
+            _limiter.release(_s, 429)
+
+        self.assertEqual(_limiter.limit, 4.0)
+        self.assertEqual(_limiter.decreases, 1)
+
+    def test_acquire_blocks_at_limit(self):
+
+        _limiter = AIMDLimiter('test', initial=1, maximum=1)
+        _started = _limiter.acquire()
+        _acquired = threading.Event()
+
+        def acquire():
+            _limiter.release(_limiter.acquire(), 200)
+            _acquired.set()
+
+        _thread = threading.Thread(target=acquire)
+        _thread.start()
+
+        time.sleep(0.05)
+        self.assertFalse(_acquired.is_set())
+
+        _limiter.release(_started, 200)
+        _thread.join(5)
+
+        self.assertTrue(_acquired.is_set())
+
+
+class TestAIMDController(unittest.TestCase):
+
+    def test_limiters(self):
+
+        _controller = AIMDController(maximum=2, endpoints=('create_muf',))
+
+        self.assertIsNone(_controller.get_limiter('users'))
+        self.assertEqual(_controller.get_limiter('create_muf').limit, 2.0)
+        self.assertEqual(_controller.get_statistics(),
+                         {'create_muf': {'limit': 2, 'peak_limit': 2, 'decreases': 0}})
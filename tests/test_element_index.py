@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lib.compact_element_index import CompactElementIndex
+from lib.element_index import ELEMENT_INDEX_FILE, ElementIndex
+
+ATTRIBUTE = '/gdc/md/pid/obj/100'
+STATE = {'updated': '2020-01-01 00:00:00', 'elements': 2}
+VALUES = {'a': ATTRIBUTE + '/elements?id=1', 'b': ATTRIBUTE + '/elements?id=2'}
+
+
+class TestElementIndex(unittest.TestCase):
+
+    def setUp(self):
+
+        self.data_path = tempfile.mkdtemp()
+
+        for _folder in ('in', 'out'):
+            os.makedirs(os.path.join(self.data_path, _folder, 'files'))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.data_path)
+
+    def reopen(self, index):
+        """
+        Saves the index and seeds a new one from it, as if it was passed to the next run.
+        """
+
+        index.close()
+        shutil.move(index.path, os.path.join(self.data_path, 'in', 'files', '123_' + ELEMENT_INDEX_FILE))
+
+        return ElementIndex(self.data_path)
+
+    def test_new_attribute_is_stale(self):
+
+        _index = ElementIndex(self.data_path)
+
+        self.assertFalse(_index.validate(ATTRIBUTE, STATE))
+        self.assertFalse(_index.is_complete(ATTRIBUTE))
+        self.assertEqual(dict(_index.get_all_values(ATTRIBUTE).items()), {})
+
+        _index.close()
+
+    def test_values_are_kept_across_runs(self):
+
+        _index = ElementIndex(self.data_path)
+        _index.validate(ATTRIBUTE, STATE)
+        _index.put_values(ATTRIBUTE, VALUES, complete=True)
+
+        _index = self.reopen(_index)
+
+        self.assertTrue(_index.validate(ATTRIBUTE, STATE))
+        self.assertTrue(_index.is_complete(ATTRIBUTE))
+        self.assertEqual(dict(_index.get_all_values(ATTRIBUTE).items()), VALUES)
+        self.assertIsInstance(_index.get_all_values(ATTRIBUTE), CompactElementIndex)
+        self.assertEqual(_index.get_values(ATTRIBUTE, ['b', 'c']), {'b': VALUES['b']})
+
+        _index.close()
+
+        with open(_index.path + '.manifest') as f:
+            self.assertEqual(json.load(f), {'is_permanent': False, 'tags': ['gd_element_index']})
+
+    def test_changed_attribute_is_dropped(self):
+
+        for _state in ({'updated': '2021-01-01 00:00:00', 'elements': 2},
+                       {'updated': STATE['updated'], 'elements': 3},
+                       {'updated': None, 'elements': 2}):
+
+            _index = ElementIndex(self.data_path)
+            _index.validate(ATTRIBUTE, STATE)
+            _index.put_values(ATTRIBUTE, VALUES, complete=True)
+
+            _index = self.reopen(_index)
+
+            self.assertFalse(_index.validate(ATTRIBUTE, _state))
+            self.assertFalse(_index.is_complete(ATTRIBUTE))
+            self.assertEqual(dict(_index.get_all_values(ATTRIBUTE).items()), {})
+
+            _index.close()
+
+    def test_attribute_is_validated_once_per_run(self):
+
+        _index = ElementIndex(self.data_path)
+
+        self.assertFalse(_index.validate(ATTRIBUTE, STATE))
+        _index.put_values(ATTRIBUTE, VALUES)
+
+        self.assertFalse(_index.validate(ATTRIBUTE, STATE))
+        self.assertEqual(dict(_index.get_all_values(ATTRIBUTE).items()), VALUES)
+        self.assertFalse(_index.is_complete(ATTRIBUTE))
+
+        _index.close()
+
+    def test_user_filters(self):
+
+        _index = ElementIndex(self.data_path)
+        _index.put_user_filters({'/obj/1': ('2020-01-01 00:00:00', 'expression 1'),
+                                 '/obj/2': ('2020-01-01 00:00:00', 'expression 2'),
+                                 '/obj/3': (None, 'expression 3')})
+        _index.prune_user_filters(['/obj/1', '/obj/3', '/obj/4'])
+
+        _index = self.reopen(_index)
+
+        self.assertEqual(_index.get_user_filters({'/obj/1': '2020-01-01 00:00:00', '/obj/2': '2020-01-01 00:00:00',
+                                                  '/obj/3': None}),
+                         {'/obj/1': 'expression 1', '/obj/3': 'expression 3'})
+
+        _index.prune_user_filters([])
+        self.assertEqual(_index.get_user_filters({'/obj/1': '2020-01-01 00:00:00', '/obj/3': None}), {})
+
+        _index.close()
+
+    def test_updated_user_filters_are_stale(self):
+
+        _index = ElementIndex(self.data_path)
+        _index.put_user_filters({'/obj/1': ('2020-01-01 00:00:00', 'expression 1'), '/obj/2': (None, 'expression 2')})
+
+        self.assertEqual(_index.get_user_filters({'/obj/1': '2021-01-01 00:00:00', '/obj/2': '2021-01-01 00:00:00'}),
+                         {})
+
+        _index.put_user_filters({'/obj/1': ('2021-01-01 00:00:00', 'expression 1b')})
+
+        self.assertEqual(_index.get_user_filters({'/obj/1': '2021-01-01 00:00:00'}), {'/obj/1': 'expression 1b'})
+
+        _index.close()
+
+    def test_corrupted_seed_is_replaced(self):
+
+        with open(os.path.join(self.data_path, 'in', 'files', ELEMENT_INDEX_FILE), 'w') as f:
+            f.write('not a database' * 100)
+
+        _index = ElementIndex(self.data_path)
+
+        self.assertFalse(_index.validate(ATTRIBUTE, STATE))
+
+        _index.close()
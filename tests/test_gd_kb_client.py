@@ -0,0 +1,93 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+from lib.GD_KB_client import clientGoodDataKeboola
+
+GD_URL = 'https://gd.example.com'
+USERS_URL = GD_URL + '/gdc/projects/pid/users'
+
+
+def make_response(status_code, body=None, headers=None):
+
+    _response = requests.Response()
+    _response.status_code = status_code
+    _response._content = json.dumps(body).encode('utf-8') if body is not None else b''
+    _response.headers.update(headers or {})
+
+    return _response
+
+
+def make_client(responses, snapshots=None):
+    """
+    Creates the client without logging in. Requests are answered by the given responses and recorded
+    in `client.sent`.
+    """
+
+    with mock.patch.object(clientGoodDataKeboola, '_GD_get_SST_token'):
+        _client = clientGoodDataKeboola('user', 'password', 'pid', '', GD_URL, 'https://kbc.example.com', 'token',
+                                        snapshots=snapshots)
+
+    _client.sent = []
+
+    def request(method, url, endpoint=None, headers=None, params=None, **kwargs):
+        _client.sent += [(method, url, dict(headers), params)]
+        return responses.pop(0)
+
+    _client._request = request
+
+    return _client
+
+
+class TestGetConditional(unittest.TestCase):
+
+    def test_not_modified_response_is_reused(self):
+
+        _users = {'users': [{'email': 'a@example.com'}]}
+        _client = make_client([make_response(200, _users, {'ETag': '"v1"', 'Link': '<next>'})])
+
+        self.assertEqual(_client._get_conditional(USERS_URL, 'users', {}, {'offset': 0})[:2], (200, _users))
+        self.assertNotIn('If-None-Match', _client.sent[0][2])
+        self.assertEqual(_client.metrics.get_counter('snapshot.new'), 1)
+
+        _next = make_client([make_response(304)], snapshots=_client.get_snapshots())
+        _sc, _json, _headers = _next._get_conditional(USERS_URL, 'users', {}, {'offset': 0})
+
+        self.assertEqual((_sc, _json, _headers), (200, _users, {'Link': '<next>'}))
+        self.assertEqual(_next.sent[0][2]['If-None-Match'], '"v1"')
+        self.assertEqual(_next.metrics.get_counter('snapshot.not_modified'), 1)
+        self.assertEqual(list(_next.get_snapshots()), [USERS_URL + '?offset=0'])
+
+    def test_modified_response_replaces_snapshot(self):
+
+        _client = make_client([make_response(200, {'v': 1}, {'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})])
+        _client._get_conditional(USERS_URL, 'users', {})
+
+        _next = make_client([make_response(200, {'v': 2}, {'Last-Modified': 'Tue, 02 Jan 2024 00:00:00 GMT'})],
+                            snapshots=_client.get_snapshots())
+
+        self.assertEqual(_next._get_conditional(USERS_URL, 'users', {})[1], {'v': 2})
+        self.assertEqual(_next.sent[0][2]['If-Modified-Since'], 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(_next.get_snapshots()[USERS_URL]['json'], {'v': 2})
+        self.assertEqual(_next.metrics.get_counter('snapshot.modified'), 1)
+
+    def test_response_without_validators_is_logged_once(self):
+
+        _client = make_client([make_response(200, {'v': 1}), make_response(200, {'v': 1})])
+
+        with self.assertLogs(level='INFO') as _logs:
+            _client._get_conditional(USERS_URL, 'users', {})
+            _client._get_conditional(USERS_URL, 'users', {}, {'offset': 1})
+
+        self.assertEqual(len([m for m in _logs.output if 'no ETag or Last-Modified' in m]), 1)
+        self.assertEqual(_client.get_snapshots(), {})
+        self.assertEqual(_client.metrics.get_counter('snapshot.no_validator'), 2)
+
+    def test_failed_response_is_not_saved(self):
+
+        _client = make_client([make_response(500, {'error': 'boom'}, {'ETag': '"v1"'})])
+
+        self.assertEqual(_client._get_conditional(USERS_URL, 'users', {})[0], 500)
+        self.assertEqual(_client.get_snapshots(), {})
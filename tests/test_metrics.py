@@ -0,0 +1,73 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lib.metrics import MetricsCollector
+
+
+class TestMetricsCollector(unittest.TestCase):
+
+    def test_percentile(self):
+
+        _values = list(range(1, 101))
+
+        self.assertEqual(MetricsCollector._percentile([], 50), 0.0)
+        self.assertEqual(MetricsCollector._percentile([7], 99), 7)
+        self.assertEqual(MetricsCollector._percentile(_values, 0), 1)
+        self.assertEqual(MetricsCollector._percentile(_values, 50), 50)
+        self.assertEqual(MetricsCollector._percentile(_values, 95), 95)
+        self.assertEqual(MetricsCollector._percentile(_values, 100), 100)
+
+    def test_rows(self):
+
+        _metrics = MetricsCollector()
+
+        for _i in range(1, 11):
+            _metrics.record('users', 200 if _i < 10 else 429, _i / 1000, bytes_sent=1, bytes_received=10)
+
+        _metrics.record('invitations', 'error', 0.5)
+        _metrics.increment('cache.hit')
+        _metrics.increment('cache.hit', 2)
+
+        self.assertEqual(_metrics.get_counter('cache.hit'), 3)
+        self.assertEqual(_metrics.get_counter('cache.miss'), 0)
+
+        _rows = _metrics.get_rows(run_id='123')
+
+        self.assertEqual([r['endpoint'] for r in _rows], ['invitations', 'users', 'counter.cache.hit'])
+        self.assertEqual(json.loads(_rows[0]['status_codes']), {'error': 1})
+        self.assertEqual(_rows[1]['calls'], 10)
+        self.assertEqual(json.loads(_rows[1]['status_codes']), {'200': 9, '429': 1})
+        self.assertEqual((_rows[1]['bytes_sent'], _rows[1]['bytes_received']), (10, 100))
+        self.assertEqual((_rows[1]['latency_p50_ms'], _rows[1]['latency_p95_ms']), (5.0, 10.0))
+        self.assertEqual(_rows[1]['latency_total_ms'], 55.0)
+        self.assertEqual(_rows[2], {'run_id': '123', 'endpoint': 'counter.cache.hit', 'calls': 3})
+
+    def test_write(self):
+
+        _data_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(_data_path, 'out', 'tables'))
+
+        try:
+            _metrics = MetricsCollector()
+            _metrics.record('users', 200, 0.1)
+            _metrics.write(_data_path, run_id='123', write_always=True)
+
+            _path = os.path.join(_data_path, 'out', 'tables', 'metrics.csv')
+
+            with open(_path) as f:
+                _rows = list(csv.DictReader(f))
+
+            with open(_path + '.manifest') as f:
+                _manifest = json.load(f)
+
+        finally:
+            shutil.rmtree(_data_path)
+
+        self.assertEqual(len(_rows), 1)
+        self.assertEqual((_rows[0]['run_id'], _rows[0]['endpoint'], _rows[0]['calls']), ('123', 'users', '1'))
+        self.assertTrue(_manifest['write_always'])
+        self.assertEqual(_manifest['destination'], 'out.c-GDUserManagement.metrics')
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+from lib.rate_limiter import RateLimiter, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_up_to_capacity_does_not_wait(self):
+
+        with mock.patch('lib.rate_limiter.time.monotonic', return_value=100.0):
+
+            _bucket = TokenBucket(rate=10, capacity=3)
+
+            self.assertEqual([_bucket.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+
+    def test_waiting_threads_are_served_in_order(self):
+
+        with mock.patch('lib.rate_limiter.time.monotonic', return_value=100.0), \
+                mock.patch('lib.rate_limiter.time.sleep') as _sleep:
+
+            _bucket = TokenBucket(rate=10, capacity=1)
+            _waits = [_bucket.acquire() for _ in range(3)]
+
+        self.assertEqual(_waits[0], 0.0)
+        self.assertAlmostEqual(_waits[1], 0.1)
+        self.assertAlmostEqual(_waits[2], 0.2)
+        self.assertEqual(_sleep.call_count, 2)
+
+    def test_tokens_are_refilled(self):
+
+        _now = [100.0]
+
+        with mock.patch('lib.rate_limiter.time.monotonic', side_effect=lambda: _now[0]), \
+                mock.patch('lib.rate_limiter.time.sleep'):
+
+            _bucket = TokenBucket(rate=10, capacity=2)
+            _bucket.acquire()
+            _bucket.acquire()
+
+            _now[0] += 0.15
+            self.assertEqual(_bucket.acquire(), 0.0)
+
+            _now[0] += 10
+            self.assertEqual([_bucket.acquire() for _ in range(2)], [0.0, 0.0])
+            self.assertGreater(_bucket.acquire(), 0.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_endpoint_class(self):
+
+        self.assertEqual(RateLimiter.get_endpoint_class('get'), 'read')
+        self.assertEqual(RateLimiter.get_endpoint_class('HEAD'), 'read')
+        self.assertEqual(RateLimiter.get_endpoint_class('POST'), 'write')
+        self.assertEqual(RateLimiter.get_endpoint_class('DELETE'), 'write')
+
+    def test_disabled_limit(self):
+
+        _limiter = RateLimiter(read_rate=0, write_rate=1)
+
+        self.assertEqual([_limiter.acquire('host', 'read') for _ in range(100)], [0.0] * 100)
+        self.assertEqual(_limiter._buckets, {})
+
+    def test_buckets_are_separate_per_host_and_class(self):
+
+        _limiter = RateLimiter(read_rate=1, write_rate=1)
+
+        with mock.patch('lib.rate_limiter.time.sleep'):
+
+            self.assertEqual(_limiter.acquire('a', 'read'), 0.0)
+            self.assertEqual(_limiter.acquire('a', 'write'), 0.0)
+            self.assertEqual(_limiter.acquire('b', 'read'), 0.0)
+            self.assertGreater(_limiter.acquire('a', 'read'), 0.0)
+
+        self.assertEqual(set(_limiter._buckets), {('a', 'read'), ('a', 'write'), ('b', 'read')})
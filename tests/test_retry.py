@@ -0,0 +1,89 @@
+import datetime
+import unittest
+from email.utils import format_datetime
+
+import requests
+
+from lib.retry import RetryPolicy
+
+
+class TestParseRetryAfter(unittest.TestCase):
+
+    def test_missing(self):
+
+        self.assertIsNone(RetryPolicy.parse_retry_after(None))
+        self.assertIsNone(RetryPolicy.parse_retry_after(''))
+
+    def test_seconds(self):
+
+        self.assertEqual(RetryPolicy.parse_retry_after('120'), 120.0)
+        self.assertEqual(RetryPolicy.parse_retry_after('1.5'), 1.5)
+        self.assertEqual(RetryPolicy.parse_retry_after('-3'), 0.0)
+
+    def test_http_date(self):
+
+        _date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+        _seconds = RetryPolicy.parse_retry_after(format_datetime(_date, usegmt=True))
+
+        self.assertGreater(_seconds, 55)
+        self.assertLessEqual(_seconds, 60)
+
+    def test_http_date_in_past(self):
+
+        self.assertEqual(RetryPolicy.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_invalid(self):
+
+        self.assertIsNone(RetryPolicy.parse_retry_after('soon'))
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+
+        self.policy = RetryPolicy(max_attempts=3, backoff_base=0.5, backoff_max=4.0)
+
+    def test_throttled_requests_are_always_retried(self):
+
+        self.assertTrue(self.policy.should_retry('GET', 429, 1))
+        self.assertTrue(self.policy.should_retry('POST', 429, 1))
+
+    def test_server_errors_are_retried_only_if_idempotent(self):
+
+        self.assertTrue(self.policy.should_retry('GET', 503, 1))
+        self.assertTrue(self.policy.should_retry('put', 500, 1))
+        self.assertFalse(self.policy.should_retry('POST', 503, 1))
+        self.assertTrue(self.policy.should_retry('POST', 503, 1, idempotent=True))
+        self.assertFalse(self.policy.should_retry('GET', 503, 1, idempotent=False))
+
+    def test_other_status_codes_are_not_retried(self):
+
+        for _status_code in (200, 400, 401, 404, 501):
+            self.assertFalse(self.policy.should_retry('GET', _status_code, 1))
+
+    def test_attempts_are_limited(self):
+
+        self.assertTrue(self.policy.should_retry('GET', 429, 2))
+        self.assertFalse(self.policy.should_retry('GET', 429, 3))
+        self.assertFalse(RetryPolicy(max_attempts=0).should_retry('GET', 429, 1))
+
+    def test_exceptions(self):
+
+        _connect_timeout = requests.exceptions.ConnectTimeout()
+        _read_timeout = requests.exceptions.ReadTimeout()
+
+        self.assertTrue(self.policy.should_retry_exception('POST', _connect_timeout, 1))
+        self.assertTrue(self.policy.should_retry_exception('GET', _read_timeout, 1))
+        self.assertFalse(self.policy.should_retry_exception('POST', _read_timeout, 1))
+        self.assertTrue(self.policy.should_retry_exception('GET', requests.exceptions.ConnectionError(), 1))
+        self.assertFalse(self.policy.should_retry_exception('GET', ValueError(), 1))
+        self.assertFalse(self.policy.should_retry_exception('POST', _connect_timeout, 3))
+
+    def test_delay(self):
+
+        self.assertEqual(self.policy.get_delay(1, '2'), 2.0)
+        self.assertEqual(self.policy.get_delay(1, '3600'), 4.0)
+
+        for _attempt, _maximum in ((1, 0.5), (2, 1.0), (3, 2.0), (10, 4.0)):
+            for _ in range(20):
+                self.assertTrue(0 <= self.policy.get_delay(_attempt) <= _maximum)
@@ -0,0 +1,99 @@
+import threading
+import unittest
+
+from lib.single_flight import SingleFlight
+
+
+class Metrics:
+
+    def __init__(self):
+
+        self.counters = {}
+
+    def increment(self, counter):
+
+        self.counters[counter] = self.counters.get(counter, 0) + 1
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def run_concurrently(self, single_flight, func, count=5):
+
+        _results = [None] * count
+
+        def call(index):
+
+            try:
+                _results[index] = single_flight.do(('resource', 'uri'), func)
+
+            except Exception as e:
+                _results[index] = e
+
+        _threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+
+        for _t in _threads:
+            _t.start()
+
+        return _threads, _results
+
+    def test_concurrent_calls_share_result(self):
+
+        _metrics = Metrics()
+        _single_flight = SingleFlight(_metrics)
+        _release = threading.Event()
+        _calls = []
+
+        def func():
+            _calls.append(1)
+            _release.wait(5)
+            return 'result'
+
+        _threads, _results = self.run_concurrently(_single_flight, func)
+
+        # All followers are waiting, once each of them reported the shared call.
+        while sum(_metrics.counters.values()) < len(_threads) - 1:
+            threading.Event().wait(0.001)
+
+        _release.set()
+
+        for _t in _threads:
+            _t.join(5)
+
+        self.assertEqual(len(_calls), 1)
+        self.assertEqual(_results, ['result'] * len(_threads))
+        self.assertEqual(_metrics.counters, {'single_flight.resource': len(_threads) - 1})
+
+    def test_exception_is_raised_in_all_threads(self):
+
+        _metrics = Metrics()
+        _single_flight = SingleFlight(_metrics)
+        _release = threading.Event()
+
+        def func():
+            _release.wait(5)
+            raise ValueError('boom')
+
+        _threads, _results = self.run_concurrently(_single_flight, func)
+
+        while sum(_metrics.counters.values()) < len(_threads) - 1:
+            threading.Event().wait(0.001)
+
+        _release.set()
+
+        for _t in _threads:
+            _t.join(5)
+
+        self.assertTrue(all(isinstance(r, ValueError) for r in _results))
+
+    def test_later_call_is_executed_again(self):
+
+        _single_flight = SingleFlight()
+        _calls = []
+
+        def func():
+            _calls.append(1)
+            return len(_calls)
+
+        self.assertEqual(_single_flight.do(('resource', 'uri'), func), 1)
+        self.assertEqual(_single_flight.do(('resource', 'uri'), func), 2)
+        self.assertEqual(_single_flight._calls, {})
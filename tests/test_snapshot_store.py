@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lib.snapshot_store import SNAPSHOT_FILE, SnapshotStore
+
+SNAPSHOTS = {'https://gd.example.com/gdc/projects/pid/users?offset=0':
+             {'etag': '"v1"', 'last_modified': None, 'size': 100, 'headers': {'Link': '<next>'},
+              'json': {'users': [{'email': 'a@example.com'}]}}}
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+
+        self.data_path = tempfile.mkdtemp()
+
+        for _folder in ('in', 'out'):
+            os.makedirs(os.path.join(self.data_path, _folder, 'files'))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.data_path)
+
+    def save(self):
+        """
+        Saves the snapshots and passes the output file to the next run. Returns validators saved to the state.
+        """
+
+        _store = SnapshotStore(self.data_path, tags=['pid'])
+        _validators = _store.save(SNAPSHOTS)
+
+        with open(_store.path + '.manifest') as f:
+            self.assertEqual(json.load(f), {'is_permanent': False, 'tags': ['gd_snapshots', 'pid']})
+
+        shutil.move(_store.path, os.path.join(self.data_path, 'in', 'files', '123_' + SNAPSHOT_FILE))
+
+        return _validators
+
+    def test_state_holds_only_validators(self):
+
+        _validators = self.save()
+
+        self.assertNotIn('a@example.com', json.dumps(_validators))
+        self.assertEqual(set(list(_validators.values())[0]), {'etag', 'last_modified', 'size', 'digest'})
+
+    def test_snapshots_are_loaded(self):
+
+        _validators = self.save()
+
+        self.assertEqual(SnapshotStore(self.data_path).load(_validators), SNAPSHOTS)
+
+    def test_body_not_matching_digest_is_dropped(self):
+
+        _validators = self.save()
+        _path = os.path.join(self.data_path, 'in', 'files', '123_' + SNAPSHOT_FILE)
+
+        with open(_path) as f:
+            _bodies = json.load(f)
+
+        for _body in _bodies.values():
+            _body['json']['users'] += [{'email': 'b@example.com'}]
+
+        with open(_path, 'w') as f:
+            json.dump(_bodies, f)
+
+        self.assertEqual(SnapshotStore(self.data_path).load(_validators), {})
+
+    def test_missing_or_corrupted_file(self):
+
+        _validators = self.save()
+        _path = os.path.join(self.data_path, 'in', 'files', '123_' + SNAPSHOT_FILE)
+
+        with open(_path, 'w') as f:
+            f.write('{')
+
+        self.assertEqual(SnapshotStore(self.data_path).load(_validators), {})
+
+        os.remove(_path)
+
+        self.assertEqual(SnapshotStore(self.data_path).load(_validators), {})
+        self.assertEqual(SnapshotStore(self.data_path).load({}), {})
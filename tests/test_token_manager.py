@@ -0,0 +1,82 @@
+import threading
+import unittest
+from unittest import mock
+
+from lib.token_manager import TokenManager
+
+
+class Minter:
+
+    def __init__(self):
+
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+
+        with self._lock:
+            self.count += 1
+            return 'token %s' % self.count
+
+
+class TestTokenManager(unittest.TestCase):
+
+    def test_token_is_reused(self):
+
+        _minter = Minter()
+        _manager = TokenManager(_minter)
+
+        self.assertEqual(_manager.get_token(), 'token 1')
+        self.assertEqual(_manager.get_token(), 'token 1')
+        self.assertEqual(_manager.refresh_count, 1)
+
+    def test_token_is_refreshed_before_expiration(self):
+
+        _minter = Minter()
+        _manager = TokenManager(_minter, lifetime=600, refresh_margin=60)
+
+        with mock.patch('lib.token_manager.time.monotonic', return_value=1000.0):
+            self.assertEqual(_manager.get_token(), 'token 1')
+
+        with mock.patch('lib.token_manager.time.monotonic', return_value=1539.0):
+            self.assertEqual(_manager.get_token(), 'token 1')
+
+        with mock.patch('lib.token_manager.time.monotonic', return_value=1540.0):
+            self.assertEqual(_manager.get_token(), 'token 2')
+
+    def test_invalidate(self):
+
+        _manager = TokenManager(Minter())
+        _manager.get_token()
+
+        _manager.invalidate()
+        self.assertEqual(_manager.get_token(), 'token 2')
+
+    def test_stale_token_does_not_invalidate_fresh_one(self):
+
+        _manager = TokenManager(Minter())
+        _stale = _manager.get_token()
+
+        _manager.invalidate(_stale)
+        _fresh = _manager.get_token()
+
+        _manager.invalidate(_stale)
+        self.assertEqual(_manager.get_token(), _fresh)
+        self.assertEqual(_manager.refresh_count, 2)
+
+    def test_token_is_minted_once_for_concurrent_threads(self):
+
+        _minter = Minter()
+        _manager = TokenManager(_minter)
+        _tokens = []
+
+        _threads = [threading.Thread(target=lambda: _tokens.append(_manager.get_token())) for _ in range(10)]
+
+        for _t in _threads:
+            _t.start()
+
+        for _t in _threads:
+            _t.join(5)
+
+        self.assertEqual(_tokens, ['token 1'] * 10)
+        self.assertEqual(_minter.count, 1)